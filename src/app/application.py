@@ -103,8 +103,13 @@ class App:
 def start_application(app_title: str, window_width: int, window_height: int) -> None:
     dpg.create_context()
     dpg.create_viewport(title=app_title, width=window_width, height=window_height)
-    App().build()
+    app = App()
+    app.build()
     dpg.setup_dearpygui()
     dpg.show_viewport()
-    dpg.start_dearpygui()
+
+    while dpg.is_dearpygui_running():
+        app.figure_registry.canvas.updateDetail()
+        dpg.render_dearpygui_frame()
+
     dpg.destroy_context()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+from bench.suite import Benchmark
+from bench.suite import BenchmarkReport
+from tools.filetool import FileTool
+
+RES_PATH = Path(__file__).parent.parent.parent / "res"
+DEFAULT_BASELINE_PATH = RES_PATH / "bench" / "baseline.json"
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUICK_SIZES = (1_000, 10_000, 100_000)
+
+
+def main() -> int:
+    parser = ArgumentParser(prog="python -m bench", description="Сквозные измерения генерации и компиляции")
+    parser.add_argument("--sizes", nargs="+", type=float, default=None, help=f"количества точек наборов (по умолчанию {' '.join(map(str, SIZES))})")
+    parser.add_argument("--quick", action="store_true", help=f"только небольшие наборы ({' '.join(map(str, QUICK_SIZES))})")
+    parser.add_argument("--repeats", type=int, default=3, help="наименьшее количество запусков этапа (берётся медиана времени)")
+    parser.add_argument("--min-seconds", type=float, default=Benchmark.MIN_SECONDS, help="наименьшая суммарная длительность запусков этапа")
+    parser.add_argument("--no-memory", action="store_true", help="не измерять пик памяти")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="файл отчёта JSON (по умолчанию - стандартный вывод)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH, help="базовый отчёт для поиска регрессий")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить отчёт как базовый")
+    parser.add_argument("--allow-missing-baseline", action="store_true", help="не считать ошибкой отсутствие базового отчёта")
+    parser.add_argument("--tolerance", type=float, default=0.35, help="допустимое относительное ухудшение (разброс повторных запусков на одном компьютере - до 25%%)")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else SIZES if args.sizes is None else tuple(map(int, args.sizes))
+
+    benchmark = Benchmark(RES_PATH, repeats=args.repeats, min_seconds=args.min_seconds, trace_memory=not args.no_memory)
+    report = benchmark.run(sizes, lambda measure: print(measure, file=sys.stderr))
+    report_json = json.dumps(report.toJSON(), indent=2)
+
+    if args.output is None:
+        print(report_json)
+
+    else:
+        FileTool.save(args.output, report_json)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        FileTool.save(args.baseline, report_json)
+        print(f"baseline saved: {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not args.baseline.is_file():
+        print(f"baseline not found: {args.baseline}", file=sys.stderr)
+        return 0 if args.allow_missing_baseline else 1
+
+    baseline = BenchmarkReport.fromJSON(FileTool.readJSON(args.baseline))
+
+    if baseline.getIdentity() != report.getIdentity():
+        print(f"baseline {baseline.getIdentity()} measured on another interpreter or host {report.getIdentity()}: regression check skipped", file=sys.stderr)
+        return 0
+
+    regressions = report.findRegressions(baseline, args.tolerance)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import gc
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict
+from dataclasses import dataclass
+from enum import Enum
+from io import BytesIO
+from pathlib import Path
+from typing import Callable
+from typing import Final
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+
+from bench.trajectories import SyntheticTrajectories
+from bytelang.main import ByteLang
+from bytelang.results.abc import CompileResult
+from bytelang.utils import LogFlag
+from gen.code import CodeGenerator
+from gen.settings import Settings
+from gen.trajectory import Trajectory
+from gen.writer import CodeWriter
+from tools.filetool import AnyPath
+from tools.string import FixedStringIO
+
+
+class BenchmarkStage(Enum):
+    """Измеряемые этапы"""
+
+    GENERATE = "generate"
+    """gen.code.CodeGenerator.run: траектории -> исходный код"""
+    COMPILE = "compile"
+    """ByteLang.compile: исходный код -> байт-код"""
+    WRITE = "write"
+    """CodeWriter.run: траектории -> байт-код"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class StageMeasure:
+    """Результат измерения этапа"""
+
+    stage: str
+    """Этап"""
+    points: int
+    """Количество точек траекторий"""
+    seconds: float
+    """Медиана времени запусков"""
+    repeats: int
+    """Количество запусков"""
+    output_bytes: int
+    """Размер результата этапа (исходный код или байт-код)"""
+    peak_memory_bytes: Optional[int]
+    """Пик выделенной памяти (tracemalloc). None, если не измерялся"""
+
+    def getPointsPerSecond(self) -> float:
+        return self.points / self.seconds if self.seconds > 0 else 0
+
+    def getBytesPerSecond(self) -> float:
+        return self.output_bytes / self.seconds if self.seconds > 0 else 0
+
+    def toJSON(self) -> dict:
+        return {**asdict(self), "points_per_second": self.getPointsPerSecond(), "bytes_per_second": self.getBytesPerSecond()}
+
+    @classmethod
+    def fromJSON(cls, data: dict) -> StageMeasure:
+        return cls(stage=data["stage"], points=data["points"], seconds=data["seconds"], repeats=data.get("repeats", 1), output_bytes=data["output_bytes"], peak_memory_bytes=data.get("peak_memory_bytes"))
+
+    def __str__(self) -> str:
+        memory = "-" if self.peak_memory_bytes is None else f"{self.peak_memory_bytes / 2 ** 20:.1f} MB"
+        return f"{self.stage:10} {self.points:>10} points : {self.seconds:9.3f} s ({self.repeats:>4} runs), {self.getPointsPerSecond():12.0f} points/s, {self.getBytesPerSecond() / 2 ** 20:8.2f} MB/s, peak {memory}"
+
+
+@dataclass(frozen=True, kw_only=True)
+class BenchmarkReport:
+    """Отчёт о запуске набора измерений"""
+
+    python: str
+    """Реализация и версия интерпретатора"""
+    machine: str
+    """Описание платформы"""
+    host: str
+    """Имя компьютера"""
+    measures: tuple[StageMeasure, ...]
+    """Измерения"""
+
+    @classmethod
+    def getCurrentIdentity(cls) -> tuple[str, str, str]:
+        """Интерпретатор, платформа и компьютер текущего запуска"""
+        return f"{platform.python_implementation()} {platform.python_version()}", platform.platform(), platform.node()
+
+    def getIdentity(self) -> tuple[str, str, str]:
+        return self.python, self.machine, self.host
+
+    def toJSON(self) -> dict:
+        return {"python": self.python, "machine": self.machine, "host": self.host, "measures": [m.toJSON() for m in self.measures]}
+
+    @classmethod
+    def fromJSON(cls, data: dict) -> BenchmarkReport:
+        return cls(python=data["python"], machine=data["machine"], host=data.get("host", ""), measures=tuple(map(StageMeasure.fromJSON, data["measures"])))
+
+    def findRegressions(self, baseline: BenchmarkReport, tolerance: float) -> tuple[str, ...]:
+        """
+        Сравнить с базовым отчётом. Сравниваются только измерения, присутствующие в обоих отчётах.
+        Время имеет смысл сравнивать только с отчётом того же интерпретатора на том же компьютере (см. getIdentity)
+        :param baseline: Базовый отчёт
+        :param tolerance: Допустимое относительное ухудшение (0.2 - на 20%)
+        :return: Описания регрессий
+        """
+        baseline_measures = {(m.stage, m.points): m for m in baseline.measures}
+        ret = list[str]()
+
+        for current in self.measures:
+            if (base := baseline_measures.get((current.stage, current.points))) is None:
+                continue
+
+            if current.getPointsPerSecond() < base.getPointsPerSecond() * (1 - tolerance):
+                ret.append(f"{current.stage}@{current.points}: {current.getPointsPerSecond():.0f} points/s < baseline {base.getPointsPerSecond():.0f} points/s")
+
+            if current.peak_memory_bytes is not None and base.peak_memory_bytes is not None and current.peak_memory_bytes > base.peak_memory_bytes * (1 + tolerance):
+                ret.append(f"{current.stage}@{current.points}: peak {current.peak_memory_bytes} Bytes > baseline {base.peak_memory_bytes} Bytes")
+
+        return tuple(ret)
+
+
+class Benchmark:
+    """Сквозные измерения генерации и компиляции на синтетических траекториях"""
+
+    DEFAULT_SETTINGS: Final[Settings] = Settings(
+        speed=5,
+        end_speed=10,
+        tool_none=0,
+        disconnect_distance_mm=4,
+        tool_change_duration_ms=200,
+    )
+
+    MIN_SECONDS: Final[float] = 1.0
+    """Наименьшая суммарная длительность запусков этапа: быстрые этапы повторяются, пока она не набрана"""
+    MAX_REPEATS: Final[int] = 1000
+    """Наибольшее количество запусков этапа"""
+
+    def __init__(self, res_path: AnyPath, *, settings: Settings = DEFAULT_SETTINGS, repeats: int = 3, min_seconds: float = MIN_SECONDS, trace_memory: bool = True, trajectories: SyntheticTrajectories = SyntheticTrajectories()) -> None:
+        """
+        :param res_path: Каталог ресурсов (code, bytelang)
+        :param settings: Настройки генерации
+        :param repeats: Наименьшее количество запусков этапа (берётся медиана времени)
+        :param min_seconds: Наименьшая суммарная длительность запусков этапа
+        :param trace_memory: Измерять пик памяти отдельным запуском под tracemalloc (время измеряется без tracemalloc)
+        :param trajectories: Генератор наборов траекторий
+        """
+        res_path = Path(res_path)
+        self.__code_generator = CodeGenerator.load(res_path / "code")
+        self.__bytelang = ByteLang.simpleSetup(res_path / "bytelang")
+        self.__writer = CodeWriter(self.__code_generator, self.__bytelang)
+
+        self.__settings = settings
+        self.__repeats = max(1, repeats)
+        self.__min_seconds = min_seconds
+        self.__trace_memory = trace_memory
+        self.__trajectories = trajectories
+
+    def run(self, sizes: Iterable[int], on_measure: Callable[[StageMeasure], None] = lambda _: None) -> BenchmarkReport:
+        """
+        Выполнить измерения
+        :param sizes: Количества точек наборов
+        :param on_measure: Вызывается после каждого измерения
+        :return: Отчёт
+        """
+        measures = list[StageMeasure]()
+
+        for points in sizes:
+            contours = self.__trajectories.build(points)
+
+            for measure in self.__runSize(points, contours):
+                measures.append(measure)
+                on_measure(measure)
+
+        python, machine, host = BenchmarkReport.getCurrentIdentity()
+        return BenchmarkReport(python=python, machine=machine, host=host, measures=tuple(measures))
+
+    def __runSize(self, points: int, contours: Sequence[Trajectory]) -> Iterable[StageMeasure]:
+        source = ""
+
+        def generate() -> int:
+            nonlocal source
+            stream = FixedStringIO()
+            self.__code_generator.run(stream, self.__settings, contours)
+            source = stream.getvalue()
+            return len(source)
+
+        def compile_() -> int:
+            result = self.__bytelang.compile(FixedStringIO(source), BytesIO(), LogFlag.PROGRAM_SIZE, streaming=True, keep_listing=False)
+            return self.__checkResult(result)
+
+        def write() -> int:
+            return self.__checkResult(self.__writer.run(self.__settings, contours, BytesIO(), LogFlag.PROGRAM_SIZE))
+
+        yield self.__measure(BenchmarkStage.GENERATE, points, generate)
+        yield self.__measure(BenchmarkStage.COMPILE, points, compile_)
+        yield self.__measure(BenchmarkStage.WRITE, points, write)
+
+    @staticmethod
+    def __checkResult(result: CompileResult) -> int:
+        if not result.isOK():
+            raise RuntimeError(f"Compilation failed\n{result.getMessage()}")
+
+        return result.program_size
+
+    def __measure(self, stage: BenchmarkStage, points: int, action: Callable[[], int]) -> StageMeasure:
+        """Медиана времени не менее repeats запусков общей длительностью не менее min_seconds"""
+        times = list[float]()
+        output_bytes = 0
+
+        while len(times) < self.__repeats or (sum(times) < self.__min_seconds and len(times) < self.MAX_REPEATS):
+            gc.collect()
+            start_time = time.perf_counter()
+            output_bytes = action()
+            times.append(time.perf_counter() - start_time)
+
+        return StageMeasure(
+            stage=stage.value,
+            points=points,
+            seconds=statistics.median(times),
+            repeats=len(times),
+            output_bytes=output_bytes,
+            peak_memory_bytes=self.__measureMemory(action)
+        )
+
+    def __measureMemory(self, action: Callable[[], int]) -> Optional[int]:
+        if not self.__trace_memory:
+            return None
+
+        gc.collect()
+        tracemalloc.start()
+
+        try:
+            action()
+            _, peak = tracemalloc.get_traced_memory()
+            return peak
+
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Final
+
+from gen.trajectory import Trajectory
+
+
+@dataclass(frozen=True, kw_only=True)
+class TrajectoryPattern:
+    """Параметры синтетического рисунка"""
+
+    work_area: int = 2000
+    """Половина стороны рабочей области (координаты в диапазоне [-work_area, work_area])"""
+    mean_contour_length: int = 200
+    """Средняя длина контура в точках"""
+    step: int = 2
+    """Наибольшее смещение по оси между соседними точками контура"""
+    gap_probability: float = 0.01
+    """Вероятность разрыва внутри контура (скачок больше расстояния разрыва)"""
+    gap_distance: int = 40
+    """Наибольшее смещение по оси при разрыве"""
+    pause_probability: float = 0.05
+    """Вероятность повтора той же точки (остановка пера)"""
+    tools: tuple[int, ...] = (1, 2)
+    """Инструменты контуров"""
+
+
+class SyntheticTrajectories:
+    """Генератор воспроизводимых наборов траекторий заданного размера"""
+
+    DEFAULT_SEED: Final[int] = 1
+
+    def __init__(self, pattern: TrajectoryPattern = TrajectoryPattern(), seed: int = DEFAULT_SEED) -> None:
+        self.__pattern = pattern
+        self.__seed = seed
+
+    def build(self, points_count: int) -> tuple[Trajectory, ...]:
+        """
+        Построить набор траекторий
+        :param points_count: Суммарное количество точек всех контуров
+        :return: Контуры: случайное блуждание с остановками, разрывами и переездами между контурами
+        """
+        rng = random.Random(self.__seed)
+        pattern = self.__pattern
+
+        contours = list[Trajectory]()
+        points_left = points_count
+
+        while points_left > 0:
+            length = min(points_left, max(2, int(rng.expovariate(1 / pattern.mean_contour_length))))
+            contours.append(self.__buildContour(rng, length))
+            points_left -= length
+
+        return tuple(contours)
+
+    def __buildContour(self, rng: random.Random, length: int) -> Trajectory:
+        pattern = self.__pattern
+        area = pattern.work_area
+
+        x = rng.randint(-area, area)
+        y = rng.randint(-area, area)
+
+        x_positions = list[int]()
+        y_positions = list[int]()
+
+        for _ in range(length):
+            chance = rng.random()
+
+            if chance < pattern.gap_probability:
+                x += rng.randint(-pattern.gap_distance, pattern.gap_distance)
+                y += rng.randint(-pattern.gap_distance, pattern.gap_distance)
+
+            elif chance >= pattern.pause_probability + pattern.gap_probability:
+                x += rng.randint(-pattern.step, pattern.step)
+                y += rng.randint(-pattern.step, pattern.step)
+
+            x = min(area, max(-area, x))
+            y = min(area, max(-area, y))
+
+            x_positions.append(x)
+            y_positions.append(y)
+
+        return Trajectory(x_positions=x_positions, y_positions=y_positions, tool_id=rng.choice(pattern.tools))
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+from bytelang.batch import BatchCompiler
+from bytelang.main import ByteLang
+from bytelang.utils import LogFlag
+
+DEFAULT_BYTELANG_PATH = Path(__file__).parent.parent.parent / "res" / "bytelang"
+
+
+def main() -> int:
+    parser = ArgumentParser(prog="python -m bytelang", description="Пакетная компиляция исходного кода bytelang")
+    parser.add_argument("sources", nargs="+", type=Path, help=f"файлы исходного кода (*.{ByteLang.SOURCE_EXTENSION})")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="каталог байт-кода (по умолчанию - рядом с исходным кодом)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="количество процессов (по умолчанию - по числу ядер)")
+    parser.add_argument("-b", "--bytelang", type=Path, default=DEFAULT_BYTELANG_PATH, help="каталог конфигурации bytelang")
+    parser.add_argument("--no-streaming", action="store_true", help="компилировать без потокового режима")
+    parser.add_argument("-O", "--optimize", action="store_true", help="удалить избыточные инструкции")
+    parser.add_argument("--max-errors", type=int, default=ByteLang.MAX_ERRORS, help="предел количества ошибок в файле (1 - остановка на первой ошибке, 0 - без ограничения)")
+    parser.add_argument("-s", "--statistics", action="store_true", help="собрать статистику компиляции (этапы, память, гистограмма инструкций)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="выводить сообщения компиляции всех файлов")
+    args = parser.parse_args()
+
+    if args.output is not None:
+        args.output.mkdir(parents=True, exist_ok=True)
+
+    jobs = tuple((source, BatchCompiler.getOutputPath(source, args.output)) for source in args.sources)
+
+    log_flags = LogFlag.PROGRAM_SIZE | LogFlag.COMPILATION_TIME
+
+    if args.statistics:
+        log_flags |= LogFlag.STATISTICS
+
+    result = BatchCompiler(args.bytelang, args.jobs, log_flags, streaming=not args.no_streaming, optimize=args.optimize, max_errors=args.max_errors or None).run(jobs)
+    print(result.getMessage(args.verbose))
+    return 0 if result.isOK() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
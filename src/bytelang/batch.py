@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+from typing import Optional
+
+from bytelang.main import ByteLang
+from bytelang.utils import LogFlag
+from tools.filetool import AnyPath
+from tools.reprtool import ReprTool
+from tools.string import StringBuilder
+
+
+@dataclass(frozen=True, kw_only=True)
+class BatchItemResult:
+    """Сводка компиляции одного файла пакета"""
+
+    source_path: Path
+    """Исходный код"""
+    output_path: Path
+    """Байт-код"""
+    is_ok: bool
+    """Статус компиляции"""
+    message: str
+    """Сообщение результата компиляции"""
+    program_size: int
+    """Размер программы в байтах (0 при ошибке)"""
+    compilation_time_seconds: float
+    """Длительность компиляции файла"""
+
+    def __str__(self) -> str:
+        status = "OK" if self.is_ok else "FAILED"
+        return f"{status:6} {self.source_path} -> {self.output_path.name} : {self.program_size} Bytes, {self.compilation_time_seconds:.3f} s"
+
+
+@dataclass(frozen=True, kw_only=True)
+class BatchResult:
+    """Результат пакетной компиляции"""
+
+    items: tuple[BatchItemResult, ...]
+    """Результаты по файлам в порядке задания"""
+    workers: int
+    """Количество процессов"""
+    wall_time_seconds: float
+    """Общая длительность"""
+
+    def isOK(self) -> bool:
+        return all(item.is_ok for item in self.items)
+
+    def getCompilationTimeSeconds(self) -> float:
+        """Суммарное время компиляции всех файлов"""
+        return sum(item.compilation_time_seconds for item in self.items)
+
+    def getMessage(self, verbose: bool = False) -> str:
+        sb = StringBuilder()
+        sb.append(ReprTool.headed("batch", self.items))
+
+        if verbose:
+            for item in self.items:
+                sb.append(ReprTool.title(str(item.source_path))).append(item.message)
+
+        else:
+            for item in self.items:
+                if not item.is_ok:
+                    sb.append(ReprTool.title(str(item.source_path))).append(item.message)
+
+        failed = sum(not item.is_ok for item in self.items)
+        total_size = sum(item.program_size for item in self.items)
+        compilation_time = self.getCompilationTimeSeconds()
+        speedup = compilation_time / self.wall_time_seconds if self.wall_time_seconds > 0 else 0
+
+        sb.append(ReprTool.title(f"files: {len(self.items)}, failed: {failed}, total size: {total_size} Bytes"))
+        sb.append(ReprTool.title(f"workers: {self.workers}, wall time: {self.wall_time_seconds:.3f} s, compilation time: {compilation_time:.3f} s, speedup: {speedup:.2f}"))
+        return sb.toString()
+
+
+_worker_bytelang: Optional[ByteLang] = None
+"""Конфигурация ByteLang процесса-исполнителя (загружается однократно)"""
+
+
+def _initWorker(bytelang_path: Path) -> None:
+    global _worker_bytelang
+    _worker_bytelang = ByteLang.cachedSetup(bytelang_path)
+
+
+def _compileFile(source_path: Path, output_path: Path, log_flags: LogFlag, streaming: bool, optimize: bool, max_errors: Optional[int]) -> BatchItemResult:
+    """
+    Скомпилировать файл. Ошибка чтения или декодирования файла не прерывает пакет, а даёт неудачный результат файла.
+    Байт-код пишется во временный файл, который заменяет output_path только при успешной компиляции
+    """
+    start_time = time.perf_counter()
+    temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+
+    try:
+        with open(source_path, "rt", encoding="utf-8") as source_stream, open(temp_path, "wb") as bytecode_stream:
+            result = _worker_bytelang.compile(source_stream, bytecode_stream, log_flags, streaming=streaming, keep_listing=bool(log_flags & LogFlag.PARSER_RESULTS), optimize=optimize, max_errors=max_errors)
+            message = result.getMessage()
+
+        if result.isOK():
+            os.replace(temp_path, output_path)
+
+    except (OSError, ValueError) as e:
+        result = None
+        message = f"{e.__class__.__name__}: {e}"
+
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+    is_ok = result is not None and result.isOK()
+
+    return BatchItemResult(
+        source_path=source_path,
+        output_path=output_path,
+        is_ok=is_ok,
+        message=message,
+        program_size=result.program_size if is_ok else 0,
+        compilation_time_seconds=time.perf_counter() - start_time
+    )
+
+
+class BatchCompiler:
+    """Пакетная компиляция файлов исходного кода в пуле процессов"""
+
+    def __init__(self, bytelang_path: AnyPath, workers: Optional[int] = None, log_flags: LogFlag = LogFlag.PROGRAM_SIZE, *, streaming: bool = True, optimize: bool = False, max_errors: Optional[int] = ByteLang.MAX_ERRORS) -> None:
+        """
+        :param bytelang_path: Каталог конфигурации bytelang
+        :param workers: Количество процессов (по умолчанию - по числу ядер). 1 - компиляция в текущем процессе
+        :param log_flags: Уровень отображения сообщений компиляции каждого файла
+        :param streaming: Потоковый режим компиляции
+        :param optimize: Удалить избыточные инструкции
+        :param max_errors: Предел количества ошибок компиляции каждого файла (по умолчанию - ByteLang.MAX_ERRORS, None - без ограничения)
+        """
+        self.__bytelang_path = Path(bytelang_path)
+        self.__workers = (os.cpu_count() or 1) if workers is None else max(1, workers)
+        self.__log_flags = log_flags
+        self.__streaming = streaming
+        self.__optimize = optimize
+        self.__max_errors = max_errors
+
+    @staticmethod
+    def getOutputPath(source_path: Path, output_folder: Optional[Path] = None) -> Path:
+        """Путь байт-кода для исходного файла"""
+        output_path = source_path.with_suffix(f".{ByteLang.BYTECODE_EXTENSION}")
+        return output_path if output_folder is None else output_folder / output_path.name
+
+    def run(self, jobs: Iterable[tuple[AnyPath, AnyPath]]) -> BatchResult:
+        """
+        Скомпилировать файлы
+        :param jobs: Пары (исходный код, байт-код)
+        :return: Сводки по файлам и общее время
+        """
+        jobs = tuple((Path(source), Path(output)) for source, output in jobs)
+        workers = min(self.__workers, len(jobs)) or 1
+
+        start_time = time.perf_counter()
+
+        # Снимок реестров обновляется до запуска исполнителей, чтобы они не пересоздавали его одновременно
+        _initWorker(self.__bytelang_path)
+
+        if workers == 1:
+            items = tuple(_compileFile(source, output, self.__log_flags, self.__streaming, self.__optimize, self.__max_errors) for source, output in jobs)
+
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(self.__bytelang_path,)) as executor:
+                futures = tuple(executor.submit(_compileFile, source, output, self.__log_flags, self.__streaming, self.__optimize, self.__max_errors) for source, output in jobs)
+                items = tuple(future.result() for future in futures)
+
+        return BatchResult(items=items, workers=workers, wall_time_seconds=time.perf_counter() - start_time)
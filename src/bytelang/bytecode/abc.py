@@ -15,13 +15,15 @@ from tools.reprtool import ReprTool
 
 
 class Regex:
-    IDENTIFIER = r"^[a-zA-Z_][a-zA-Z\d_]*$"
-    CHAR = r"^'.'$"
-    INTEGER = r"^0$|^([+-]?[1-9][\d_]*)$"
-    EXPONENT = r"^[-+]?\d+[.]\d+([eE][-+]?\d+)?$"
-    HEX_VALUE = r"^0[xX][_\da-fA-F]+$"
-    OCT_VALUE = r"^[+-]?0[_0-7]+$"
-    BIN_VALUE = r"^0[bB][_01]+$"
+    """Фрагменты регулярных выражений лексем (без привязки к началу и концу строки)"""
+
+    IDENTIFIER = r"[a-zA-Z_][a-zA-Z\d_]*"
+    CHAR = r"'\S'"
+    INTEGER = r"0|[+-]?[1-9][\d_]*"
+    EXPONENT = r"[-+]?\d+[.]\d+(?:[eE][-+]?\d+)?"
+    HEX_VALUE = r"0[xX][_\da-fA-F]+"
+    OCT_VALUE = r"[+-]?0[_0-7]+"
+    BIN_VALUE = r"0[bB][_01]+"
 
     NAME = r"[_a-zA-Z\d]+"
 
@@ -141,20 +143,66 @@ class ProgramData:
     marks: dict[int, str]
 
 
+@dataclass(frozen=True, kw_only=True)
+class Relocation:
+    """Ссылка на символ (метку или переменную) в коде перемещаемого сегмента"""
+
+    address: int
+    """Смещение значения аргумента от начала кода сегмента"""
+    primitive: PrimitiveType
+    """Тип значения аргумента"""
+    symbol: str
+    """Имя метки или переменной"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class Segment:
+    """
+    Перемещаемый сегмент: скомпилированный фрагмент программы.
+    Адреса меток и переменных сегмента отсчитываются от начала его кода и блока переменных,
+    ссылки на них и на внешние символы разрешает компоновщик
+    """
+
+    environment: Environment
+    """Окружение, для которого скомпилирован сегмент"""
+    code: bytes
+    """Инструкции сегмента (значения перемещаемых аргументов не окончательны)"""
+    instructions_count: int
+    """Количество инструкций"""
+    marks: dict[str, int]
+    """Метки сегмента и их смещения от начала кода"""
+    variables: tuple[Variable, ...]
+    """Переменные сегмента (адреса - смещения от начала блока переменных сегмента)"""
+    relocations: tuple[Relocation, ...]
+    """Ссылки на символы"""
+
+
 @dataclass(frozen=True, kw_only=True)
 class CodeInstruction:
     """Инструкция кода"""
 
     instruction: EnvironmentInstruction
     """Используемая инструкция"""
-    arguments: tuple[bytes, ...]
-    """Запакованные аргументы"""
+    arguments: tuple[int | float, ...]
+    """Проверенные значения аргументов"""
     address: int
     """адрес расположения инструкции"""
 
-    def write(self, instruction_index: PrimitiveType) -> bytes:
-        return instruction_index.write(self.instruction.index) + b"".join(self.arguments)
+    def write(self) -> bytes:
+        return self.instruction.packer.pack(self.instruction.index, *self.arguments)
+
+    def writeInto(self, buffer: bytearray | memoryview, offset: int) -> None:
+        """Записать инструкцию в буфер без промежуточных объектов"""
+        self.instruction.packer.pack_into(buffer, offset, self.instruction.index, *self.arguments)
 
     def __repr__(self) -> str:
-        args_s = ReprTool.iter((f"({arg_t}){ReprTool.prettyBytes(arg_v)}" for arg_t, arg_v in zip(self.instruction.arguments, self.arguments)), l_paren="{ ", r_paren=" }")
+        data = self.write()
+        offset = len(data) - sum(arg.primitive_type.size for arg in self.instruction.arguments)
+        args_bytes = list[bytes]()
+
+        for arg in self.instruction.arguments:
+            args_bytes.append(data[offset:offset + arg.primitive_type.size])
+            offset += arg.primitive_type.size
+
+        args_s = ReprTool.iter((f"({arg_t}){ReprTool.prettyBytes(arg_v)}" for arg_t, arg_v in zip(self.instruction.arguments, args_bytes)), l_paren="{ ", r_paren=" }")
         return f"{self.instruction.generalInfo()} {args_s}"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from struct import Struct
+from typing import Final
+from typing import Iterable
+from typing import Optional
+
+from bytelang.bytecode.abc import ProgramData
+from bytelang.content.impl.environments import Environment
+from bytelang.content.impl.environments import EnvironmentInstruction
+from bytelang.parsers.abc import Parser
+
+type ByteCodeBuffer = bytes | bytearray | memoryview
+"""Любой буфер байт-кода (bytes, memoryview, mmap...)"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class DecodedInstruction:
+    """Декодированная инструкция байт-кода"""
+
+    address: int
+    """Адрес инструкции"""
+    instruction: Optional[EnvironmentInstruction]
+    """Инструкция окружения. None, если индекс не распознан (занимает один байт)"""
+    arguments: tuple[int | float, ...]
+    """Значения аргументов"""
+
+    def getSize(self) -> int:
+        return 1 if self.instruction is None else self.instruction.size
+
+    def __str__(self) -> str:
+        if self.instruction is None:
+            return "<unknown>"
+
+        return " ".join((self.instruction.name, *map(str, self.arguments)))
+
+
+class Disassembler:
+    """Дизассемблер байт-кода по таблице инструкций окружения. Исходный код не требуется"""
+
+    __LISTING_DATA_WIDTH: Final[int] = 24
+    """Ширина колонки байт в листинге"""
+
+    def __init__(self, environment: Environment) -> None:
+        profile = environment.profile
+        self.__environment = environment
+        self.__index_packer = Struct(profile.byte_order.value + profile.instruction_index.packer.format)
+        self.__start_packer = Struct(profile.byte_order.value + profile.pointer_heap.packer.format)
+
+        table_size = max((ins.index for ins in environment.instructions.values()), default=-1) + 1
+        self.__instructions: tuple[Optional[EnvironmentInstruction], ...] = tuple(
+            next((ins for ins in environment.instructions.values() if ins.index == i), None)
+            for i in range(table_size)
+        )
+        """Инструкции по индексу"""
+
+    def getEnvironment(self) -> Environment:
+        return self.__environment
+
+    def getTableSize(self) -> int:
+        """Количество индексов таблицы инструкций (наибольший индекс + 1)"""
+        return len(self.__instructions)
+
+    def getHeaderSize(self) -> int:
+        """Размер заголовка программы (адреса начала инструкций). За ним следует блок переменных"""
+        return self.__start_packer.size
+
+    def getStartAddress(self, buffer: ByteCodeBuffer) -> int:
+        """Адрес начала инструкций (из заголовка программы)"""
+        return self.__start_packer.unpack_from(buffer, 0)[0]
+
+    def getInstruction(self, index: int) -> Optional[EnvironmentInstruction]:
+        """Инструкция окружения по индексу. None, если индекс не распознан"""
+        return self.__instructions[index] if index < len(self.__instructions) else None
+
+    def decode(self, buffer: ByteCodeBuffer, start: Optional[int] = None, end: Optional[int] = None) -> Iterable[DecodedInstruction]:
+        """
+        Декодировать инструкции программы
+        :param buffer: Байт-код
+        :param start: Адрес, с которого выводить инструкции (инструкции до него только пропускаются)
+        :param end: Адрес, до которого выводить инструкции
+        :return: Инструкции в порядке расположения
+        """
+        buffer = memoryview(buffer)
+        buffer_size = len(buffer)
+        end = buffer_size if end is None else min(end, buffer_size)
+        start = 0 if start is None else start
+
+        address = self.getStartAddress(buffer)
+        index_size = self.__index_packer.size
+
+        while address < end and address + index_size <= buffer_size:
+            instruction = self.getInstruction(self.__index_packer.unpack_from(buffer, address)[0])
+
+            if instruction is None or address + instruction.size > buffer_size:
+                if address >= start:
+                    yield DecodedInstruction(address=address, instruction=None, arguments=tuple())
+
+                address += 1
+                continue
+
+            if address >= start:
+                yield DecodedInstruction(address=address, instruction=instruction, arguments=instruction.packer.unpack_from(buffer, address)[1:])
+
+            address += instruction.size
+
+    def listing(self, buffer: ByteCodeBuffer, start: Optional[int] = None, end: Optional[int] = None, program_data: Optional[ProgramData] = None) -> Iterable[str]:
+        """
+        Построчный листинг программы
+        :param buffer: Байт-код
+        :param start: Начальный адрес
+        :param end: Конечный адрес
+        :param program_data: Данные программы (метки и переменные), если известны
+        :return: Строки листинга
+        """
+        buffer = memoryview(buffer)
+        start = 0 if start is None else start
+        end = len(buffer) if end is None else min(end, len(buffer))
+
+        start_address = self.getStartAddress(buffer)
+        marks = dict() if program_data is None else program_data.marks
+
+        if start <= 0 < end:
+            yield self.__comment("program start address define")
+            yield self.__line(0, buffer[:self.__start_packer.size], str(start_address))
+
+        if program_data is not None:
+            for variable in program_data.variables:
+                if start <= variable.address < end:
+                    yield self.__comment(variable)
+                    yield self.__line(variable.address, buffer[variable.address:variable.address + variable.primitive.size], "")
+
+        elif max(start, self.__start_packer.size) < min(end, start_address):
+            yield self.__comment("variables")
+            yield self.__line(self.__start_packer.size, buffer[self.__start_packer.size:start_address], "")
+
+        for decoded in self.decode(buffer, start, end):
+            if (mark := marks.get(decoded.address)) is not None:
+                yield self.__comment(f"{mark}:")
+
+            yield self.__line(decoded.address, buffer[decoded.address:decoded.address + decoded.getSize()], str(decoded))
+
+    @staticmethod
+    def __comment(message: object) -> str:
+        return f"{Parser.COMMENT}  {message}"
+
+    def __line(self, address: int, data: memoryview, text: str) -> str:
+        return f"{address:04X}: {data.hex(' ').upper():{self.__LISTING_DATA_WIDTH}} {text}".rstrip()
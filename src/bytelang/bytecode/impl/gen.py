@@ -9,6 +9,7 @@ from bytelang.bytecode.abc import CodeInstruction
 from bytelang.bytecode.abc import Directive
 from bytelang.bytecode.abc import DirectiveArgument
 from bytelang.bytecode.abc import ProgramData
+from bytelang.bytecode.abc import Relocation
 from bytelang.bytecode.abc import Statement
 from bytelang.bytecode.abc import StatementType
 from bytelang.bytecode.abc import UniversalArgument
@@ -26,7 +27,14 @@ from tools.filters import Filter
 class CodeGenerator:
     """Генератор промежуточного кода."""
 
-    def __init__(self, error_handler: BasicErrorHandler, environments: EnvironmentsRegistry, primitives: PrimitivesRegistry) -> None:
+    def __init__(self, error_handler: BasicErrorHandler, environments: EnvironmentsRegistry, primitives: PrimitivesRegistry, *, streaming: bool = False, relocatable: bool = False, environment: Optional[Environment] = None) -> None:
+        """
+        :param streaming: Потоковый режим. Блок переменных закрывается первой инструкцией или меткой,
+        чтобы заголовок программы можно было записать до генерации остального кода
+        :param relocatable: Генерация перемещаемого сегмента. Адреса меток и переменных отсчитываются от начала сегмента,
+        неизвестные идентификаторы в аргументах инструкций считаются внешними символами. Ссылки на символы сохраняются для компоновщика
+        :param environment: Окружение, выбранное заранее (директива .env не требуется)
+        """
         self.__err = error_handler.getChild(self.__class__.__name__)
         self.__environments = environments
         self.__primitives = primitives
@@ -39,6 +47,18 @@ class CodeGenerator:
         self.__mark_offset_isolated: int = 0
         self.__variable_offset: Optional[int] = None
 
+        self.__streaming = streaming
+        self.__variables_sealed: bool = False
+        """Блок переменных закрыт (потоковый режим)"""
+
+        self.__relocatable = relocatable
+        self.__symbols = set[str]()
+        """Метки и переменные"""
+        self.__relocations = list[Relocation]()
+
+        if environment is not None:
+            self.__selectEnvironment(environment)
+
         __DIRECTIVE_ARG_ANY = DirectiveArgument("constant value or identifier", ArgumentValueType.ANY)
 
         self.__DIRECTIVES: dict[str, Directive] = {
@@ -90,25 +110,44 @@ class CodeGenerator:
 
         self.__constants[name] = value
 
-    def __writeArgumentFromPrimitive(self, statement: Statement, argument: UniversalArgument, primitive: PrimitiveType) -> Optional[bytes]:
+    def __isExternal(self, identifier: Optional[str]) -> bool:
+        """Идентификатор - внешний символ перемещаемого сегмента"""
+        return self.__relocatable and identifier is not None and identifier not in self.__constants
+
+    def __findSymbol(self, argument: UniversalArgument) -> Optional[str]:
+        """Метка, переменная или внешний символ, к которому сводится аргумент"""
+        name = argument.identifier
+
+        while name is not None:
+            if name in self.__symbols or (value := self.__constants.get(name)) is None:
+                return name
+
+            name = value.identifier
+
+        return None
+
+    def __resolveArgumentFromPrimitive(self, statement: Statement, argument: UniversalArgument, primitive: PrimitiveType) -> Optional[int | float]:
+        if self.__isExternal(argument.identifier):
+            return primitive.check(0)
+
         if argument.identifier:
             self.__checkNameExist(statement, argument.identifier)
 
             if self.__err.isFailed():
                 return
 
-            return self.__writeArgumentFromPrimitive(statement, self.__constants[argument.identifier], primitive)
+            return self.__resolveArgumentFromPrimitive(statement, self.__constants[argument.identifier], primitive)
 
         v = argument.exponent if primitive.write_type == PrimitiveWriteType.EXPONENT else argument.integer
 
         try:
-            return primitive.write(v)
+            return primitive.check(v)
 
         except Exception as e:
             self.__err.writeStatement(statement, f"Не удалось выполнить преобразование: {e}")
 
-    def __writeArgumentFromInstructionArg(self, statement: Statement, i: int, u_arg: UniversalArgument, i_arg: EnvironmentInstructionArgument) -> Optional[bytes]:
-        if i_arg.pointing_type:
+    def __resolveArgumentFromInstructionArg(self, statement: Statement, i: int, u_arg: UniversalArgument, i_arg: EnvironmentInstructionArgument) -> Optional[int | float]:
+        if i_arg.pointing_type and not self.__isExternal(u_arg.identifier):
             if (var := self.__variables.get(u_arg.identifier)) is None:
                 self.__err.writeStatement(statement, f"Аргумент ({i}) Обращение по указателю ({i_arg}) с помощью сырого значения недопустимо")
                 return
@@ -117,7 +156,7 @@ class CodeGenerator:
                 self.__err.writeStatement(statement, f"Аргумент ({i}): Размер переменной {var} меньше размера указателя примитивного типа аргумента {i_arg}. Передача значения будет с ошибками")
                 return
 
-        return self.__writeArgumentFromPrimitive(statement, u_arg, i_arg.primitive_type)
+        return self.__resolveArgumentFromPrimitive(statement, u_arg, i_arg.primitive_type)
 
     def __directiveSetEnvironment(self, statement: Statement) -> None:
         if self.__env is not None:
@@ -127,13 +166,17 @@ class CodeGenerator:
         env_name = statement.arguments[0].identifier
 
         try:
-            self.__env = self.__environments.get(env_name)
+            environment = self.__environments.get(env_name)
 
         except Exception as e:
             self.__err.writeStatement(statement, f"Не удалось загрузить окружение {env_name}\n{e}")
             return
 
-        self.__variable_offset = int(self.__env.profile.pointer_heap.size)
+        self.__selectEnvironment(environment)
+
+    def __selectEnvironment(self, environment: Environment) -> None:
+        self.__env = environment
+        self.__variable_offset = 0 if self.__relocatable else int(self.__env.profile.pointer_heap.size)
 
     def __directiveDeclareConstant(self, statement: Statement) -> None:
         name, value = statement.arguments
@@ -156,14 +199,18 @@ class CodeGenerator:
         if self.__variable_offset is None:
             self.__err.writeStatement(statement, "variable offset index undefined. Must select env")
 
-        arg_value = self.__writeArgumentFromPrimitive(statement, init_value, primitive)
+        if self.__variables_sealed:
+            self.__err.writeStatement(statement, f"Переменная {name} объявлена после первой инструкции или метки (потоковый режим)")
+
+        arg_value = self.__resolveArgumentFromPrimitive(statement, init_value, primitive)
 
         if self.__err.isFailed():
             return
 
         self.__addConstant(statement, name, UniversalArgument.fromInteger(self.__variable_offset))
 
-        self.__variables[name] = Variable(address=self.__variable_offset, identifier=name, primitive=primitive, value=arg_value)
+        self.__symbols.add(name)
+        self.__variables[name] = Variable(address=self.__variable_offset, identifier=name, primitive=primitive, value=self.__env.profile.write(primitive, arg_value))
 
         self.__variable_offset += primitive.size
 
@@ -191,6 +238,9 @@ class CodeGenerator:
             directive.handler(statement)
 
     def __getMarkOffset(self) -> int:
+        if self.__relocatable:
+            return self.__mark_offset_isolated
+
         return self.__variable_offset + self.__mark_offset_isolated
 
     def __processMark(self, statement: Statement) -> None:
@@ -198,8 +248,10 @@ class CodeGenerator:
             self.__err.writeStatement(statement, "Невозможно создать метку пока не выбрано окружение")
             return
 
+        self.__variables_sealed = self.__streaming
         mark_offset = self.__getMarkOffset()
         self.__marks_address[mark_offset] = statement.head
+        self.__symbols.add(statement.head)
         self.__addConstant(statement, statement.head, UniversalArgument.fromInteger(mark_offset))
 
     def __processInstruction(self, statement: Statement) -> Optional[CodeInstruction]:
@@ -221,17 +273,50 @@ class CodeGenerator:
 
         self.__err.begin()
 
-        code_ins_args = tuple(self.__writeArgumentFromInstructionArg(statement, i + 1, s_arg, i_arg) for i, (i_arg, s_arg) in enumerate(zip(instruction.arguments, statement.arguments)))
+        code_ins_args = tuple(self.__resolveArgumentFromInstructionArg(statement, i + 1, s_arg, i_arg) for i, (i_arg, s_arg) in enumerate(zip(instruction.arguments, statement.arguments)))
 
         if self.__err.isFailed():
             return
 
+        self.__variables_sealed = self.__streaming
         ret = CodeInstruction(instruction=instruction, arguments=code_ins_args, address=self.__getMarkOffset())
+
+        if self.__relocatable:
+            self.__addRelocations(ret, statement)
+
         self.__mark_offset_isolated += instruction.size
         return ret
 
+    def __addRelocations(self, code_instruction: CodeInstruction, statement: Statement) -> None:
+        address = code_instruction.address + self.__env.profile.instruction_index.size
+
+        for i_arg, s_arg in zip(code_instruction.instruction.arguments, statement.arguments):
+            if (symbol := self.__findSymbol(s_arg)) is not None:
+                self.__relocations.append(Relocation(address=address, primitive=i_arg.primitive_type, symbol=symbol))
+
+            address += i_arg.primitive_type.size
+
+    def getRelocations(self) -> tuple[Relocation, ...]:
+        """Ссылки на символы (перемещаемый сегмент)"""
+        return tuple(self.__relocations)
+
     def run(self, statements: Iterable[Statement]) -> tuple[tuple[CodeInstruction, ...], Optional[ProgramData]]:
-        return tuple(Filter.notNone(self.__METHOD_BY_TYPE[s.type](s) for s in statements)), self.getProgramData()
+        return tuple(self.iterate(statements)), self.getProgramData()
+
+    def iterate(self, statements: Iterable[Statement]) -> Iterable[CodeInstruction]:
+        """
+        Генерировать инструкции по мере поступления выражений.
+        Данные программы окончательны после исчерпания, в потоковом режиме адрес начала и переменные - с первой инструкции
+        """
+        return Filter.notNone(self.__METHOD_BY_TYPE[s.type](s) for s in statements)
+
+    def getEnvironment(self) -> Optional[Environment]:
+        """Выбранное окружение"""
+        return self.__env
+
+    def hasMarks(self) -> bool:
+        """Объявлена ли хотя бы одна метка"""
+        return len(self.__marks_address) > 0
 
     # noinspection PyTypeChecker
     def getProgramData(self) -> Optional[ProgramData]:
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from struct import Struct
+from struct import error
+from typing import BinaryIO
+from typing import Callable
+from typing import Optional
+from typing import Sequence
+
+from bytelang.bytecode.abc import ProgramData
+from bytelang.bytecode.abc import Segment
+from bytelang.bytecode.abc import Variable
+from bytelang.core.handlers.errors import BasicErrorHandler
+from bytelang.utils import CountingStream
+
+type SymbolResolver = Callable[[int, str], Optional[int]]
+"""Значение внешнего символа по индексу сегмента и имени. None, если символ неизвестен"""
+
+
+class Linker:
+    """Компоновщик перемещаемых сегментов в программу"""
+
+    def __init__(self, error_handler: BasicErrorHandler) -> None:
+        self.__err = error_handler.getChild(self.__class__.__name__)
+
+    def run(self, segments: Sequence[Segment], bytecode_output_stream: BinaryIO, resolve: Optional[SymbolResolver] = None) -> tuple[int, Optional[ProgramData]]:
+        """
+        Скомпоновать сегменты: переменные всех сегментов образуют общий блок, код сегментов следует в порядке перечисления.
+        Ссылка разрешается меткой или переменной своего сегмента, затем символом другого сегмента, затем resolve.
+        Одноимённые символы разных сегментов допустимы, ошибка - только ссылка, разрешаемая через несколько других сегментов
+        :param segments: Сегменты программы
+        :param bytecode_output_stream: Выход байт-кода
+        :param resolve: Разрешение внешних символов, не объявленных в сегментах
+        :return: Размер программы и данные программы (None при ошибке)
+        """
+        if len(segments) == 0:
+            self.__err.write("Нет сегментов для компоновки")
+            return 0, None
+
+        environment = segments[0].environment
+
+        if any(segment.environment.name != environment.name for segment in segments):
+            self.__err.write(f"Сегменты скомпилированы для разных окружений: {sorted(set(segment.environment.name for segment in segments))}")
+            return 0, None
+
+        profile = environment.profile
+
+        variable_bases = list[int]()
+        variable_offset = profile.pointer_heap.size
+
+        for segment in segments:
+            variable_bases.append(variable_offset)
+            variable_offset += sum(variable.primitive.size for variable in segment.variables)
+
+        start_address = variable_offset
+
+        code_bases = list[int]()
+        code_offset = start_address
+
+        for segment in segments:
+            code_bases.append(code_offset)
+            code_offset += len(segment.code)
+
+        local_symbols = tuple(self.__getSymbols(segment, variable_base, code_base) for segment, variable_base, code_base in zip(segments, variable_bases, code_bases))
+        global_symbols = self.__mergeSymbols(local_symbols)
+        """Сегменты, объявляющие символ, и его значения"""
+
+        code = bytearray(code_offset - start_address)
+
+        for index, (segment, code_base) in enumerate(zip(segments, code_bases)):
+            code_start = code_base - start_address
+            code[code_start:code_start + len(segment.code)] = segment.code
+
+            for relocation in segment.relocations:
+                if (value := local_symbols[index].get(relocation.symbol)) is None:
+                    declared = global_symbols.get(relocation.symbol, dict())
+
+                    if len(declared) > 1:
+                        self.__err.write(f"Символ '{relocation.symbol}' в сегменте {index} неоднозначен: объявлен в сегментах {sorted(declared)}")
+                        continue
+
+                    value = next(iter(declared.values()), None)
+
+                if value is None and resolve is not None:
+                    value = resolve(index, relocation.symbol)
+
+                if value is None:
+                    self.__err.write(f"Неразрешённый символ '{relocation.symbol}' в сегменте {index}")
+                    continue
+
+                try:
+                    Struct(profile.byte_order.value + relocation.primitive.packer.format).pack_into(code, code_start + relocation.address, relocation.primitive.check(value))
+
+                except error as e:
+                    self.__err.write(f"Значение символа '{relocation.symbol}' ({value}) в сегменте {index} не может быть записано: {e}")
+
+        variables = tuple(
+            Variable(address=variable_base + variable.address, identifier=variable.identifier, primitive=variable.primitive, value=variable.value)
+            for segment, variable_base in zip(segments, variable_bases)
+            for variable in segment.variables
+        )
+
+        marks = {
+            code_base + offset: name
+            for segment, code_base in zip(segments, code_bases)
+            for name, offset in segment.marks.items()
+        }
+
+        try:
+            start_block = profile.write(profile.pointer_heap, start_address)
+
+        except error as e:
+            self.__err.write(f"Область Heap вне допустимого размера: {e}")
+
+        if not self.__err.isSuccess():
+            return 0, None
+
+        out = CountingStream(bytecode_output_stream)
+        out.write(start_block)
+        out.write(b"".join(variable.value for variable in variables))
+        out.write(code)
+
+        if profile.max_program_length is not None and out.getBytesWritten() >= profile.max_program_length:
+            self.__err.write(f"program size ({out.getBytesWritten()}) out of {profile.max_program_length}")
+
+        return out.getBytesWritten(), ProgramData(environment=environment, start_address=start_address, variables=variables, constants=dict(), marks=marks)
+
+    @staticmethod
+    def __getSymbols(segment: Segment, variable_base: int, code_base: int) -> dict[str, int]:
+        symbols = {variable.identifier: variable_base + variable.address for variable in segment.variables}
+        symbols.update((name, code_base + offset) for name, offset in segment.marks.items())
+        return symbols
+
+    @staticmethod
+    def __mergeSymbols(local_symbols: Sequence[dict[str, int]]) -> dict[str, dict[int, int]]:
+        ret = dict[str, dict[int, int]]()
+
+        for index, symbols in enumerate(local_symbols):
+            for name, value in symbols.items():
+                ret.setdefault(name, dict())[index] = value
+
+        return ret
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from operator import add
+from operator import sub
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+
+from bytelang.bytecode.abc import CodeInstruction
+from bytelang.content.impl.environments import Environment
+from bytelang.content.impl.environments import EnvironmentInstruction
+from bytelang.content.impl.environments import InstructionEffect
+from bytelang.content.impl.primitives import PrimitiveWriteType
+from bytelang.core.handlers.errors import BasicErrorHandler
+
+
+class PeepholeOptimizer:
+    """
+    Оптимизатор потока инструкций кода по метаданным побочных эффектов пакета.
+    Удаляет повторную установку того же состояния и значения состояния, сразу перезаписанные следующей инструкцией.
+    Заменяет абсолютную установку состояния относительной формой (DELTA), если разность помещается в её аргументы.
+    Адреса инструкций после изменённых сдвигаются, поэтому программа с метками не оптимизируется
+    """
+
+    def __init__(self, error_handler: BasicErrorHandler, has_marks: Callable[[], bool], get_environment: Callable[[], Optional[Environment]]) -> None:
+        """
+        :param has_marks: Объявлены ли метки в программе (в потоковом режиме метки становятся известны по мере генерации)
+        :param get_environment: Окружение программы (запрашивается при получении первой инструкции)
+        """
+        self.__err = error_handler.getChild(self.__class__.__name__)
+        self.__has_marks = has_marks
+        self.__get_environment = get_environment
+
+        self.__bytes_saved: int = 0
+        self.__removed_count: int = 0
+        self.__replaced_count: int = 0
+
+    def getBytesSaved(self) -> int:
+        return self.__bytes_saved
+
+    def getRemovedCount(self) -> int:
+        return self.__removed_count
+
+    def getReplacedCount(self) -> int:
+        """Количество инструкций, заменённых относительной формой"""
+        return self.__replaced_count
+
+    def run(self, instructions: Iterable[CodeInstruction]) -> Iterable[CodeInstruction]:
+        """
+        Оптимизировать инструкции по мере поступления
+        :param instructions: Инструкции кода (может быть генератором)
+        :return: Инструкции без избыточных, адреса пересчитаны
+        """
+        instructions = iter(instructions)
+
+        state = dict[str, tuple[int | float, ...]]()
+        """Известные значения ячеек состояния"""
+        pending: Optional[CodeInstruction] = None
+        """Последняя инструкция STATE: удаляется, если следующая перезапишет ту же ячейку"""
+        address: Optional[int] = None
+        """Адрес следующей выходной инструкции"""
+        delta_forms = dict[str, tuple[EnvironmentInstruction, ...]]()
+        """Относительные формы ячеек состояния по возрастанию размера"""
+
+        for ins in instructions:
+            if self.__has_marks():
+                self.__checkMarks()
+
+                if pending is not None:
+                    yield self.__relocate(pending, address)
+
+                yield ins
+                yield from instructions
+                return
+
+            if address is None:
+                address = ins.address
+                delta_forms = self.__getDeltaForms()
+
+            effect = ins.instruction.effect
+            slot = ins.instruction.state_slot
+            arguments = ins.arguments
+
+            if effect is InstructionEffect.STATE or effect is InstructionEffect.IDEMPOTENT:
+                if self.__isPointing(ins):
+                    state.pop(slot, None)
+
+                elif (current := state.get(slot)) == arguments:
+                    self.__remove(ins)
+                    continue
+
+                else:
+                    if effect is InstructionEffect.IDEMPOTENT and current is not None:
+                        ins = self.__toDelta(ins, current, delta_forms.get(slot, ()))
+
+                    state[slot] = arguments
+
+            elif effect is InstructionEffect.DELTA:
+                if self.__isPointing(ins) or len(current := state.get(slot, ())) != len(arguments):
+                    state.pop(slot, None)
+
+                elif not any(arguments):
+                    self.__remove(ins)
+                    continue
+
+                else:
+                    state[slot] = tuple(map(add, current, arguments))
+
+            elif effect is InstructionEffect.UNKNOWN:
+                state.clear()
+
+            if pending is not None:
+                if effect is InstructionEffect.STATE and slot == pending.instruction.state_slot:
+                    self.__remove(pending)
+
+                else:
+                    yield self.__relocate(pending, address)
+                    address += pending.instruction.size
+
+                pending = None
+
+            if effect is InstructionEffect.STATE:
+                pending = ins
+                continue
+
+            yield self.__relocate(ins, address)
+            address += ins.instruction.size
+
+        if pending is not None:
+            yield self.__relocate(pending, address)
+
+        if self.__has_marks():
+            self.__checkMarks()
+
+    def __getDeltaForms(self) -> dict[str, tuple[EnvironmentInstruction, ...]]:
+        if (environment := self.__get_environment()) is None:
+            return dict()
+
+        ret = dict[str, list[EnvironmentInstruction]]()
+
+        for ins in environment.instructions.values():
+            if ins.effect is not InstructionEffect.DELTA:
+                continue
+
+            if any(arg.pointing_type is not None or arg.primitive_type.write_type == PrimitiveWriteType.EXPONENT for arg in ins.arguments):
+                continue
+
+            ret.setdefault(ins.state_slot, list()).append(ins)
+
+        return {slot: tuple(sorted(forms, key=lambda i: i.size)) for slot, forms in ret.items()}
+
+    def __toDelta(self, ins: CodeInstruction, current: tuple[int | float, ...], forms: tuple[EnvironmentInstruction, ...]) -> CodeInstruction:
+        """Заменить абсолютную установку наименьшей подходящей относительной формой"""
+        if len(current) != len(ins.arguments):
+            return ins
+
+        deltas = tuple(map(sub, ins.arguments, current))
+
+        for form in forms:
+            if form.size >= ins.instruction.size:
+                break
+
+            if len(form.arguments) != len(deltas):
+                continue
+
+            if all(arg.primitive_type.value_range[0] <= d <= arg.primitive_type.value_range[1] for arg, d in zip(form.arguments, deltas)):
+                self.__bytes_saved += ins.instruction.size - form.size
+                self.__replaced_count += 1
+                return CodeInstruction(instruction=form, arguments=deltas, address=ins.address)
+
+        return ins
+
+    @staticmethod
+    def __isPointing(ins: CodeInstruction) -> bool:
+        """Значения аргументов - адреса переменных, а не сами значения"""
+        return any(arg.pointing_type is not None for arg in ins.instruction.arguments)
+
+    @staticmethod
+    def __relocate(ins: CodeInstruction, address: int) -> CodeInstruction:
+        if ins.address == address:
+            return ins
+
+        return CodeInstruction(instruction=ins.instruction, arguments=ins.arguments, address=address)
+
+    def __remove(self, ins: CodeInstruction) -> None:
+        self.__bytes_saved += ins.instruction.size
+        self.__removed_count += 1
+
+    def __checkMarks(self) -> None:
+        if self.__bytes_saved == 0:
+            return
+
+        self.__err.write(f"Метка объявлена после сокращения программы на {self.__bytes_saved} Bytes: адреса меток сдвинуты. Отключите оптимизацию")
+        self.__bytes_saved = self.__removed_count = self.__replaced_count = 0
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from struct import Struct
+from typing import Callable
+from typing import Mapping
+from typing import Optional
+
+from bytelang.bytecode.impl.disasm import ByteCodeBuffer
+from bytelang.bytecode.impl.disasm import Disassembler
+from bytelang.content.impl.environments import Environment
+from bytelang.content.impl.primitives import PrimitiveType
+
+type InstructionHandler = Callable[..., Optional[bool]]
+"""Обработчик инструкции: получает значения аргументов (указатели - адресами). True - остановить выполнение"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class ExecutionResult:
+    """Результат выполнения программы"""
+
+    instructions_count: int
+    """Количество выполненных инструкций"""
+    end_address: int
+    """Адрес, на котором выполнение завершилось"""
+    halted: bool
+    """Выполнение остановлено обработчиком (иначе достигнут конец программы)"""
+    histogram: dict[str, int]
+    """Количество выполненных инструкций каждого вида"""
+    seconds: float
+    """Длительность выполнения"""
+
+    def __str__(self) -> str:
+        rate = self.instructions_count / self.seconds if self.seconds > 0 else 0
+        return f"{self.instructions_count} instructions, {'halted' if self.halted else 'end of program'} at {self.end_address:04X} : {self.seconds:.3f} s ({rate:.0f} ins/s)"
+
+
+class VirtualMachine:
+    """
+    Эталонный интерпретатор байт-кода по таблице инструкций окружения (индексы и упаковщики - как у дизассемблера).
+    Действие инструкции задаёт обработчик по её имени, инструкции без обработчика только пропускаются.
+    Таблица диспетчеризации по индексу инструкции строится один раз
+    """
+
+    def __init__(self, environment: Environment, handlers: Mapping[str, InstructionHandler]) -> None:
+        """
+        :param environment: Окружение, для которого скомпилирована программа
+        :param handlers: Обработчики инструкций по именам
+        :raises ValueError: Обработчик инструкции, отсутствующей в окружении
+        """
+        if len(unknown := handlers.keys() - environment.instructions.keys()) > 0:
+            raise ValueError(f"Окружение {environment.name} не содержит инструкций {tuple(sorted(unknown))}")
+
+        profile = environment.profile
+        self.__disassembler = Disassembler(environment)
+        self.__byte_order: str = profile.byte_order.value
+        self.__index_packer = Struct(self.__byte_order + profile.instruction_index.packer.format)
+
+        table = list[Optional[tuple[int, Callable, InstructionHandler]]]()
+        """Размер, распаковщик аргументов и обработчик инструкции по индексу"""
+
+        for index in range(self.__disassembler.getTableSize() if self.__index_packer.size > 1 else 256):
+            if (instruction := self.__disassembler.getInstruction(index)) is None:
+                table.append(None)
+                continue
+
+            arguments = Struct(self.__byte_order + "".join(arg.primitive_type.packer.format for arg in instruction.arguments))
+            table.append((instruction.size, arguments.unpack_from, handlers.get(instruction.name, self.__skip)))
+
+        self.__table = tuple(table)
+        self.__heap = bytearray()
+
+    @staticmethod
+    def __skip(*_) -> None:
+        pass
+
+    def getEnvironment(self) -> Environment:
+        return self.__disassembler.getEnvironment()
+
+    def readVariable(self, primitive: PrimitiveType, address: int) -> int | float:
+        """Прочитать значение переменной по адресу (указателю из аргумента инструкции)"""
+        return Struct(self.__byte_order + primitive.packer.format).unpack_from(self.__heap, address)[0]
+
+    def writeVariable(self, primitive: PrimitiveType, address: int, value: int | float) -> None:
+        """Записать значение переменной по адресу"""
+        Struct(self.__byte_order + primitive.packer.format).pack_into(self.__heap, address, value)
+
+    def run(self, buffer: ByteCodeBuffer) -> ExecutionResult:
+        """
+        Выполнить программу: заголовок, блок переменных (копируется в кучу), инструкции до остановки или конца программы
+        :param buffer: Байт-код (bytes, memoryview, mmap)
+        :raises ValueError: Неверный заголовок, неизвестная или обрезанная инструкция
+        """
+        start_time = time.perf_counter()
+
+        buffer = memoryview(buffer)
+        end = len(buffer)
+        header_size = self.__disassembler.getHeaderSize()
+
+        if end < header_size:
+            raise ValueError(f"Программа меньше заголовка ({end} < {header_size} B)")
+
+        address = self.__disassembler.getStartAddress(buffer)
+
+        if not header_size <= address <= end:
+            raise ValueError(f"Адрес начала инструкций {address} вне программы [{header_size}, {end}]")
+
+        self.__heap = bytearray(buffer[:address])
+        """Адреса переменных отсчитываются от начала программы"""
+
+        table = self.__table
+        table_size = len(table)
+        index_size = self.__index_packer.size
+        read_index = buffer.__getitem__ if index_size == 1 else lambda a: self.__index_packer.unpack_from(buffer, a)[0]
+
+        counts = [0] * table_size
+        halted = False
+
+        while address < end:
+            index = read_index(address) if address + index_size <= end else -1
+            entry = table[index] if 0 <= index < table_size else None
+
+            if entry is None:
+                raise ValueError(f"Неизвестная инструкция {index} по адресу {address:04X}")
+
+            size, unpack, handler = entry
+
+            if address + size > end:
+                raise ValueError(f"Инструкция {index} по адресу {address:04X} обрезана ({end - address} из {size} B)")
+
+            counts[index] += 1
+
+            if handler(*unpack(buffer, address + index_size)):
+                address += size
+                halted = True
+                break
+
+            address += size
+
+        instructions = {ins.index: ins.name for ins in self.getEnvironment().instructions.values()}
+
+        return ExecutionResult(
+            instructions_count=sum(counts),
+            end_address=address,
+            halted=halted,
+            histogram={instructions[index]: count for index, count in enumerate(counts) if count > 0},
+            seconds=time.perf_counter() - start_time
+        )
@@ -1,52 +1,135 @@
 from __future__ import annotations
 
+from itertools import chain
+from struct import Struct
 from struct import error
 from typing import BinaryIO
+from typing import Callable
+from typing import Final
 from typing import Iterable
+from typing import Optional
+from typing import Sequence
 
 from bytelang.bytecode.abc import CodeInstruction
 from bytelang.bytecode.abc import ProgramData
+from bytelang.content.impl.environments import Environment
 from bytelang.content.impl.profiles import Profile
 from bytelang.core.handlers.errors import BasicErrorHandler
 from bytelang.utils import CountingStream
 
 
 class ByteCodeWriter:
+    DEFAULT_CHUNK_SIZE: Final[int] = 64 * 1024
+    """Размер порции байт-кода, передаваемой в поток за одну запись"""
 
-    def __init__(self, error_handler: BasicErrorHandler) -> None:
+    def __init__(self, error_handler: BasicErrorHandler, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
         self.__error_handler = error_handler.getChild(self.__class__.__name__)
+        self.__chunk_size = chunk_size
 
     def run(self, instructions: Iterable[CodeInstruction], program_data: ProgramData, bytecode_output_stream: BinaryIO) -> int:
-        profile = program_data.environment.profile
+        return self.runStream(instructions, lambda: program_data, bytecode_output_stream)
+
+    def runStream(self, instructions: Iterable[CodeInstruction], get_program_data: Callable[[], Optional[ProgramData]], bytecode_output_stream: BinaryIO) -> int:
+        """
+        Записать программу, получая инструкции по мере генерации
+        :param instructions: Инструкции кода (может быть генератором)
+        :param get_program_data: Получение данных программы. Вызывается после получения первой инструкции
+        :param bytecode_output_stream: Выход байт-кода
+        :return: Размер записанной программы
+        """
         out = CountingStream(bytecode_output_stream)
+        instructions = iter(instructions)
+        first_instruction = next(instructions, None)
+
+        if (program_data := get_program_data()) is None:
+            return out.getBytesWritten()
+
+        profile = program_data.environment.profile
 
         self.__writeStartBlock(out, program_data)
         self.__writeVariablesBlock(out, program_data)
-        self.__writeInstructionsBlock(out, instructions, profile)
+
+        if first_instruction is not None:
+            self.__writeInstructionsBlock(out, chain((first_instruction,), instructions), program_data.environment)
 
         self.__checkProgram(out, profile)
         return out.getBytesWritten()
 
+    @staticmethod
+    def getProgramSize(instructions: Sequence[CodeInstruction], program_data: ProgramData) -> int:
+        """Точный размер программы по размерам заголовка, переменных и инструкций (без кодирования)"""
+        header_size = program_data.environment.profile.pointer_heap.size
+        return header_size + sum(len(variable.value) for variable in program_data.variables) + sum(ins.instruction.size for ins in instructions)
+
+    def runBuffer(self, instructions: Sequence[CodeInstruction], program_data: ProgramData) -> Optional[bytearray]:
+        """
+        Записать программу в буфер точного размера. Размер проверяется до кодирования,
+        значения упаковываются прямо в буфер без промежуточных объектов bytes
+        :return: Байт-код. None, если программа вне допустимого размера
+        """
+        program_size = self.getProgramSize(instructions, program_data)
+
+        if not self.__checkSize(program_size, program_data.environment.profile):
+            return None
+
+        ret = bytearray(program_size)
+        self.__fill(ret, instructions, program_data)
+        return ret
+
+    def __fill(self, buffer: bytearray, instructions: Sequence[CodeInstruction], program_data: ProgramData) -> None:
+        """Заполнить буфер точного размера: заголовок, переменные, инструкции"""
+        profile = program_data.environment.profile
+
+        try:
+            Struct(profile.byte_order.value + profile.pointer_heap.packer.format).pack_into(buffer, 0, program_data.start_address)
+
+        except error as e:
+            self.__error_handler.write(f"Область Heap вне допустимого размера: {e}")
+
+        offset = profile.pointer_heap.size
+
+        for variable in program_data.variables:
+            buffer[offset:offset + len(variable.value)] = variable.value
+            offset += len(variable.value)
+
+        for ins in instructions:
+            ins.writeInto(buffer, offset)
+            offset += ins.instruction.size
+
     def __writeStartBlock(self, out: CountingStream, program_data: ProgramData) -> None:
         try:
-            program_start_data = program_data.environment.profile.pointer_heap.write(program_data.start_address)
+            profile = program_data.environment.profile
+            program_start_data = profile.write(profile.pointer_heap, program_data.start_address)
             out.write(program_start_data)
 
         except error as e:
             self.__error_handler.write(f"Область Heap вне допустимого размера: {e}")
 
     def __checkProgram(self, out: CountingStream, profile: Profile) -> None:
-        if profile.max_program_length is None:
-            return
+        self.__checkSize(out.getBytesWritten(), profile)
 
-        if out.getBytesWritten() < profile.max_program_length:
-            return
+    def __checkSize(self, program_size: int, profile: Profile) -> bool:
+        """Проверить размер программы. Ошибка записывается в обработчик"""
+        if profile.max_program_length is None or program_size < profile.max_program_length:
+            return True
 
-        self.__error_handler.write(f"program size ({out.getBytesWritten()}) out of {profile.max_program_length}")
+        self.__error_handler.write(f"program size ({program_size}) out of {profile.max_program_length}")
+        return False
 
-    @staticmethod
-    def __writeInstructionsBlock(out: CountingStream, instructions: Iterable[CodeInstruction], profile: Profile):
-        out.write(b"".join(map(lambda ins: ins.write(profile.instruction_index), instructions)))
+    def __writeInstructionsBlock(self, out: CountingStream, instructions: Iterable[CodeInstruction], environment: Environment):
+        chunk = bytearray(self.__chunk_size + max((ins.size for ins in environment.instructions.values()), default=0))
+        chunk_view = memoryview(chunk)
+        offset = 0
+
+        for ins in instructions:
+            ins.writeInto(chunk, offset)
+            offset += ins.instruction.size
+
+            if offset >= self.__chunk_size:
+                out.write(chunk_view[:offset])
+                offset = 0
+
+        out.write(chunk_view[:offset])
 
     @staticmethod
     def __writeVariablesBlock(out: CountingStream, program_data: ProgramData) -> None:
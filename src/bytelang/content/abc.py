@@ -86,6 +86,14 @@ class CatalogRegistry[T](Registry[str, T]):
 
         self.__FILE_EXT: Final[str] = file_ext
 
+    def getFiles(self) -> tuple[Path, ...]:
+        """Файлы контента в каталоге"""
+        return tuple(sorted(self.__TARGET_FOLDER.glob(f"*.{self.__FILE_EXT}")))
+
+    def loadAll(self) -> tuple[T, ...]:
+        """Загрузить весь контент каталога"""
+        return tuple(self.get(path.stem) for path in self.getFiles())
+
     def get(self, name: str) -> T:
         if (ret := self._data.get(name)) is None:
             ret = self._data[name] = self._load(self.__TARGET_FOLDER / f"{name}.{self.__FILE_EXT}", name)
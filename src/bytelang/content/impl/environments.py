@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from enum import Enum
 from pathlib import Path
+from struct import Struct
 from typing import ClassVar
 from typing import Final
 from typing import Iterable
@@ -52,6 +54,21 @@ class EnvironmentInstructionArgument:
         return self.pointing_type.name + self.SHAKE_CASE_POINTER_SUFFIX
 
 
+class InstructionEffect(Enum):
+    """Побочный эффект инструкции (метаданные пакета для оптимизатора). Значение - имя атрибута в пакете"""
+
+    UNKNOWN = "unknown"
+    """Эффект неизвестен: инструкция сохраняется, всё известное состояние сбрасывается"""
+    STATELESS = "stateless"
+    """Не изменяет отслеживаемое состояние (например, задержка)"""
+    IDEMPOTENT = "idempotent"
+    """Выполняет действие и устанавливает состояние по значениям аргументов. Повтор с теми же значениями избыточен"""
+    STATE = "state"
+    """Только устанавливает состояние. Избыточны повтор с теми же значениями и значение, сразу перезаписанное следующей инструкцией"""
+    DELTA = "delta"
+    """Относительная форма IDEMPOTENT: прибавляет значения аргументов к ячейке состояния"""
+
+
 @dataclass(frozen=True, kw_only=True)
 class EnvironmentInstruction(Content):
     """Инструкция окружения"""
@@ -64,6 +81,19 @@ class EnvironmentInstruction(Content):
     """Аргументы окружения. Если тип был указателем, примитивный тип стал соответствовать типу указателя профиля окружения"""
     size: int
     """Размер инструкции в байтах"""
+    packer: Struct
+    """Упаковщик инструкции целиком: индекс и все аргументы в порядке байт профиля"""
+    effect: InstructionEffect
+    """Побочный эффект"""
+    state_slot: Optional[str]
+    """Ячейка состояния, которую устанавливает инструкция (для STATE, IDEMPOTENT и DELTA)"""
+
+    def __getstate__(self) -> dict:
+        # Struct не поддерживает pickle, упаковщик восстанавливается по формату
+        return {**self.__dict__, "packer": self.packer.format}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state, packer=Struct(state["packer"]))
 
     def generalInfo(self) -> str:
         return f"[{self.size}B] {self.package}::{self.name}@{self.index}"
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
+from itertools import takewhile
 from pathlib import Path
+from struct import Struct
 from typing import ClassVar
 from typing import Final
 from typing import Optional
@@ -12,6 +15,7 @@ from bytelang.content.impl.primitives import PrimitiveType
 from bytelang.content.impl.primitives import PrimitivesRegistry
 from bytelang.content.impl.environments import EnvironmentInstruction
 from bytelang.content.impl.environments import EnvironmentInstructionArgument
+from bytelang.content.impl.environments import InstructionEffect
 from bytelang.parsers.abc import Parser
 from bytelang.content.impl.profiles import Profile
 from tools.reprtool import ReprTool
@@ -51,8 +55,14 @@ class PackageInstructionArgument:
 class PackageInstruction(Content):
     """Базовые сведения об инструкции"""
 
+    ATTRIBUTE_CHAR: Final[ClassVar[str]] = "@"
+
     arguments: tuple[PackageInstructionArgument, ...]
     """Аргументы базовой инструкции"""
+    effect: InstructionEffect
+    """Побочный эффект (атрибут @<effect> или @<effect>(<ячейка состояния>) после аргументов)"""
+    state_slot: Optional[str]
+    """Ячейка состояния. По умолчанию - имя инструкции"""
 
     def __repr__(self) -> str:
         return f"{self.parent}::{self.name}{ReprTool.iter(self.arguments)}"
@@ -60,20 +70,25 @@ class PackageInstruction(Content):
     def transform(self, index: int, profile: Profile) -> EnvironmentInstruction:
         """Создать инструкцию окружения на основе базовой и профиля"""
         args = tuple(arg.transform(profile) for arg in self.arguments)
-        size = profile.instruction_index.size + sum(arg.primitive_type.size for arg in args)
+        packer = Struct(profile.byte_order.value + profile.instruction_index.packer.format + "".join(arg.primitive_type.packer.format for arg in args))
         return EnvironmentInstruction(
             parent=profile.name,
             name=self.name,
             index=index,
             package=self.parent,
             arguments=args,
-            size=size
+            size=packer.size,
+            packer=packer,
+            effect=self.effect,
+            state_slot=self.state_slot
         )
 
 
 class PackageParser(Parser[PackageInstruction]):
     """Парсер пакета инструкций"""
 
+    __ATTRIBUTE_PATTERN: Final[ClassVar[re.Pattern]] = re.compile(rf"{PackageInstruction.ATTRIBUTE_CHAR}(\w+)(?:\((\w+)\))?")
+
     def __init__(self, primitives: PrimitivesRegistry):
         self.__used_names = set[str]()
         self.__package_name: Optional[str] = None
@@ -83,7 +98,9 @@ class PackageParser(Parser[PackageInstruction]):
         self.__package_name = package_name
 
     def _parseLine(self, index: int, line: str) -> Optional[PackageInstruction]:
-        name, *arg_types = line.split()
+        name, *lexemes = line.split()
+        arg_types = tuple(takewhile(lambda lexeme: not lexeme.startswith(PackageInstruction.ATTRIBUTE_CHAR), lexemes))
+        effect, state_slot = self.__parseAttributes(name, index, lexemes[len(arg_types):])
 
         # TODO add override?
 
@@ -98,9 +115,43 @@ class PackageParser(Parser[PackageInstruction]):
             arguments=tuple(
                 self.__parseArgument(self.__package_name, name, i, arg)
                 for i, arg in enumerate(arg_types)
-            )
+            ),
+            effect=effect,
+            state_slot=state_slot
         )
 
+    def __parseAttributes(self, name: str, index: int, attributes: list[str]) -> tuple[InstructionEffect, Optional[str]]:
+        if len(attributes) == 0:
+            return InstructionEffect.UNKNOWN, None
+
+        if len(attributes) > 1:
+            raise ValueError(f"Only one attribute allowed in {self.__package_name}::{name} at line {index}: {ReprTool.iter(attributes)}")
+
+        if (match := self.__ATTRIBUTE_PATTERN.fullmatch(attributes[0])) is None:
+            raise ValueError(f"Invalid attribute '{attributes[0]}' in {self.__package_name}::{name} at line {index}")
+
+        effect_name, state_slot = match.groups()
+
+        try:
+            effect = InstructionEffect(effect_name)
+
+        except ValueError:
+            raise ValueError(f"Unknown effect '{effect_name}' in {self.__package_name}::{name} at line {index}")
+
+        if effect in (InstructionEffect.STATE, InstructionEffect.IDEMPOTENT):
+            return effect, name if state_slot is None else state_slot
+
+        if effect is InstructionEffect.DELTA:
+            if state_slot is None:
+                raise ValueError(f"Effect '{effect_name}' requires state slot in {self.__package_name}::{name} at line {index}")
+
+            return effect, state_slot
+
+        if state_slot is not None:
+            raise ValueError(f"Effect '{effect_name}' has no state slot in {self.__package_name}::{name} at line {index}")
+
+        return effect, None
+
     def __parseArgument(self, package_name: str, name: str, index: int, arg_lexeme: str) -> PackageInstructionArgument:
         is_pointer = arg_lexeme[-1] == PackageInstructionArgument.POINTER_CHAR
         arg_lexeme = arg_lexeme.rstrip(PackageInstructionArgument.POINTER_CHAR)
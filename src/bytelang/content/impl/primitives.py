@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
 from enum import auto
+from functools import cached_property
 from pathlib import Path
 from struct import Struct
 from typing import ClassVar
@@ -50,6 +51,41 @@ class PrimitiveType(Content):
     def write(self, v: int | float) -> bytes:
         return self.packer.pack(v)
 
+    @cached_property
+    def value_range(self) -> tuple[int | float, int | float]:
+        """Диапазон значений, заведомо представимых этим типом"""
+        if self.write_type == PrimitiveWriteType.EXPONENT:
+            return -float("inf"), float("inf")
+
+        bits = self.size * 8
+
+        if self.write_type == PrimitiveWriteType.SIGNED:
+            return -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+
+        return 0, (1 << bits) - 1
+
+    def check(self, v: int | float) -> int | float:
+        """
+        Проверить, что значение может быть записано этим типом, не упаковывая его
+        :raises struct.error: Значение вне диапазона (сообщение упаковщика)
+        :return: Проверенное значение
+        """
+        min_value, max_value = self.value_range
+
+        if self.write_type == PrimitiveWriteType.EXPONENT or not min_value <= v <= max_value:
+            self.packer.pack(v)
+
+        return v
+
+    @classmethod
+    def fromFormat(cls, parent: str, name: str, size: int, write_type: PrimitiveWriteType, packer_format: str) -> PrimitiveType:
+        """Восстановить примитивный тип по формату упаковщика"""
+        return cls(parent=parent, name=name, size=size, write_type=write_type, packer=Struct(packer_format))
+
+    def __reduce__(self) -> tuple:
+        # Struct не поддерживает pickle, упаковщик восстанавливается по формату
+        return self.fromFormat, (self.parent, self.name, self.size, self.write_type, self.packer.format)
+
     def __repr__(self) -> str:
         return f"[{self.write_type} {self.size * 8}-bit] {self.__str__()}"
 
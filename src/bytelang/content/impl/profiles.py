@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from enum import Enum
 from pathlib import Path
+from struct import pack
 from typing import Optional
 
 from bytelang.content.abc import CatalogRegistry
@@ -11,6 +13,13 @@ from bytelang.content.impl.primitives import PrimitivesRegistry
 from tools.filetool import FileTool
 
 
+class ByteOrder(Enum):
+    """Порядок байт виртуальной машины (значение - префикс формата struct)"""
+
+    LITTLE = "<"
+    BIG = ">"
+
+
 @dataclass(frozen=True, kw_only=True)
 class Profile(Content):
     """Профиль виртуальной машины"""
@@ -23,6 +32,12 @@ class Profile(Content):
     """Тип указателя кучи (Определяет максимально возможный адрес переменной"""
     instruction_index: PrimitiveType
     """Тип индекса инструкции (Определяет максимальное кол-во инструкций в профиле"""
+    byte_order: ByteOrder
+    """Порядок байт"""
+
+    def write(self, primitive: PrimitiveType, v: int | float) -> bytes:
+        """Записать значение примитивного типа в порядке байт профиля"""
+        return pack(self.byte_order.value + primitive.packer.format, v)
 
 
 class ProfileRegistry(CatalogRegistry[Profile]):
@@ -44,4 +59,5 @@ class ProfileRegistry(CatalogRegistry[Profile]):
             pointer_program=getType("ptr_prog"),
             pointer_heap=getType("ptr_heap"),
             instruction_index=getType("ptr_inst"),
+            byte_order=ByteOrder[data.get("byte_order", ByteOrder.LITTLE.name).upper()],
         )
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import Final
+from typing import Iterable
+from typing import Optional
+
+from bytelang.content.impl.environments import EnvironmentsRegistry
+from bytelang.content.impl.primitives import PrimitivesRegistry
+
+
+class RegistriesSnapshot:
+    """
+    Снимок загруженных реестров на диске.
+    Действителен, пока не изменились исходные файлы реестров и их каталог (ключ - хеш содержимого и абсолютного пути каталога:
+    реестры хранят абсолютные пути своих каталогов)
+    """
+
+    VERSION: Final[int] = 4
+    """Версия формата снимка. Увеличить при изменении структуры контента"""
+
+    def __init__(self, snapshot_path: Path, root: Path, source_files: Iterable[Path]) -> None:
+        """
+        :param snapshot_path: Файл снимка
+        :param root: Каталог исходных файлов
+        :param source_files: Исходные файлы реестров
+        """
+        self.__path = snapshot_path
+        self.__fingerprint = self.__calcFingerprint(root, source_files)
+
+    def __calcFingerprint(self, root: Path, source_files: Iterable[Path]) -> str:
+        h = hashlib.sha256(f"{self.VERSION}:{sys.version_info.major}.{sys.version_info.minor}:{root.resolve().as_posix()}".encode())
+
+        for path in sorted(source_files):
+            h.update(path.relative_to(root).as_posix().encode())
+            h.update(path.read_bytes())
+
+        return h.hexdigest()
+
+    def load(self) -> Optional[tuple[PrimitivesRegistry, EnvironmentsRegistry]]:
+        """
+        Загрузить реестры из снимка
+        :return: None, если снимка нет, он устарел или повреждён
+        """
+        if not self.__path.is_file():
+            return None
+
+        try:
+            with open(self.__path, "rb") as f:
+                if pickle.load(f) != self.__fingerprint:
+                    return None
+
+                return pickle.load(f)
+
+        except Exception:
+            return None
+
+    def save(self, primitives: PrimitivesRegistry, environments: EnvironmentsRegistry) -> bool:
+        """
+        Сохранить снимок. Все окружения каталога загружаются заранее.
+        Ошибка записи снимка (в том числе неверное окружение, не нужное текущей компиляции) не прерывает настройку
+        :return: True, если снимок записан
+        """
+        temp_path = self.__path.with_name(f"{self.__path.name}.{os.getpid()}.tmp")
+
+        try:
+            environments.loadAll()
+            self.__path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(temp_path, "wb") as f:
+                pickle.dump(self.__fingerprint, f)
+                pickle.dump((primitives, environments), f, pickle.HIGHEST_PROTOCOL)
+
+            os.replace(temp_path, self.__path)
+            return True
+
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            return False
@@ -2,11 +2,43 @@ from __future__ import annotations
 
 from abc import ABC
 from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Optional
 
 from bytelang.bytecode.abc import Statement
 from tools.reprtool import ReprTool
 
 
+@dataclass(frozen=True, kw_only=True)
+class Diagnostic:
+    """Запись об ошибке. Текст сообщения собирается только при выводе"""
+
+    message: str
+    """Сообщение"""
+    sources: tuple[str, ...] = ()
+    """Цепочка обработчиков-источников (от внешнего к внутреннему)"""
+    line: Optional[str] = None
+    """Строка исходного кода"""
+    index: Optional[int] = None
+    """Номер строки исходного кода"""
+
+    def __str__(self) -> str:
+        prefix = "".join(f"[{source}]: " for source in self.sources)
+
+        if self.line is None:
+            return f"{prefix}{self.message}"
+
+        return f"{prefix}{self.message} at {self.index} '{self.line.strip()}'"
+
+
+class ErrorLimitReached(Exception):
+    """Достигнут предел количества ошибок. Прерывает этапы компиляции"""
+
+    def __init__(self, count: int) -> None:
+        super().__init__(f"stopped after {count} errors")
+        self.count = count
+
+
 class BasicErrorHandler(ABC):
     """Базовый обработчик сообщений ошибок"""
 
@@ -30,45 +62,78 @@ class BasicErrorHandler(ABC):
         return ChildErrorHandler(name, self)
 
     def writeLineAt(self, line: str, index: int, message: str) -> None:
-        self.write(f"{message} at {index} '{line.strip()}'")
+        self.writeDiagnostic(Diagnostic(message=message, sources=self._getSources(), line=line, index=index))
 
     def writeStatement(self, statement: Statement, message: str) -> None:
         self.writeLineAt(statement.line, statement.index, message)
 
     def write(self, message: str) -> None:
         """Добавить ошибку"""
+        self.writeDiagnostic(Diagnostic(message=message, sources=self._getSources()))
+
+    def writeDiagnostic(self, diagnostic: Diagnostic) -> None:
+        """
+        Добавить запись об ошибке
+        :raises ErrorLimitReached: Достигнут предел количества ошибок основного обработчика
+        """
         self.__failed = True
-        self._appendMessage(message)
+        self._appendDiagnostic(diagnostic)
+
+    def _getSources(self) -> tuple[str, ...]:
+        """Цепочка имён источников записей этого обработчика"""
+        return ()
 
     @abstractmethod
     def isSuccess(self) -> bool:
         """True если нет ошибок"""
 
     @abstractmethod
-    def _appendMessage(self, message: str) -> None:
-        """Добавить сообщение. Для каждой реализации свой вариант"""
+    def _appendDiagnostic(self, diagnostic: Diagnostic) -> None:
+        """Добавить запись. Для каждой реализации свой вариант"""
 
 
 class ErrorHandler(BasicErrorHandler):
     """Основной обработчик ошибок"""
 
-    def __init__(self) -> None:
+    def __init__(self, max_errors: Optional[int] = None) -> None:
+        """
+        :param max_errors: Предел количества ошибок: при его достижении запись прерывает компиляцию исключением ErrorLimitReached.
+        None - без ограничения, 1 - остановка на первой ошибке
+        """
         super().__init__()
-        self.__messages = list[str]()
-        """Набор сообщений ошибок"""
+        self.__diagnostics = list[Diagnostic]()
+        """Записи ошибок"""
+        self.__max_errors = max_errors
+        self.__limit_reached: bool = False
 
     def isSuccess(self) -> bool:
         """Нет ли ошибки"""
         return self.getCount() == 0
 
-    def _appendMessage(self, message: str) -> None:
-        self.__messages.append(message)
+    def _appendDiagnostic(self, diagnostic: Diagnostic) -> None:
+        self.__diagnostics.append(diagnostic)
+
+        if self.__max_errors is not None and len(self.__diagnostics) >= self.__max_errors:
+            self.__limit_reached = True
+            raise ErrorLimitReached(len(self.__diagnostics))
 
     def getCount(self) -> int:
-        return len(self.__messages)
+        return len(self.__diagnostics)
+
+    def isLimitReached(self) -> bool:
+        """Была ли компиляция прервана по пределу количества ошибок"""
+        return self.__limit_reached
+
+    def getDiagnostics(self) -> tuple[Diagnostic, ...]:
+        return tuple(self.__diagnostics)
 
     def getLog(self) -> str:
-        return ReprTool.headed("errors", self.__messages)
+        log = ReprTool.headed("errors", self.__diagnostics)
+
+        if self.__limit_reached:
+            return f"{log}{ReprTool.title(f'stopped after {self.getCount()} errors')}\n"
+
+        return log
 
 
 class ChildErrorHandler(BasicErrorHandler):
@@ -81,6 +146,10 @@ class ChildErrorHandler(BasicErrorHandler):
         super().__init__()
         self.__name = name
         self.__parent = parent
+        self.__sources = (*parent._getSources(), name)
+
+    def _getSources(self) -> tuple[str, ...]:
+        return self.__sources
 
-    def _appendMessage(self, message: str) -> None:
-        self.__parent.write(f"[{self.__name}]: {message}")
+    def _appendDiagnostic(self, diagnostic: Diagnostic) -> None:
+        self.__parent.writeDiagnostic(diagnostic)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+
+from bytelang.bytecode.abc import CodeInstruction
+from bytelang.content.impl.environments import EnvironmentInstruction
+from bytelang.utils import LogFlag
+
+
+class CompilePhase(Enum):
+    """Этапы компиляции"""
+
+    PARSE = "parse"
+    """Разбор исходного кода"""
+    CODEGEN = "codegen"
+    """Генерация инструкций кода"""
+    OPTIMIZE = "optimize"
+    """Оптимизация инструкций"""
+    WRITE = "write"
+    """Запись байт-кода"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class InstructionUsage:
+    """Использование инструкции окружения в программе"""
+
+    instruction: EnvironmentInstruction
+    """Инструкция окружения"""
+    count: int
+    """Количество вызовов"""
+
+    def getBytes(self) -> int:
+        return self.count * self.instruction.size
+
+    def __str__(self) -> str:
+        return f"{self.instruction.generalInfo():32} x {self.count:<10} = {self.getBytes()} Bytes"
+
+
+@dataclass(frozen=True, kw_only=True)
+class CompileStatistics:
+    """Статистика компиляции. Поля заполнены, если при компиляции был указан соответствующий флаг"""
+
+    phase_seconds: Optional[dict[CompilePhase, float]]
+    """Собственное время этапов (без времени этапов, от которых они получают данные)"""
+    memory_peak_bytes: Optional[int]
+    """Пик выделенной памяти (tracemalloc)"""
+    instruction_usage: Optional[tuple[InstructionUsage, ...]]
+    """Гистограмма инструкций по убыванию занимаемого размера"""
+
+
+class CompileProfiler:
+    """
+    Сбор статистики компиляции по флагам вывода.
+    Время этапов считается исключительно: при потоковой цепочке генераторов время вложенного этапа не входит во внешний.
+    Используется как контекстный менеджер на время компиляции
+    """
+
+    def __init__(self, flags: LogFlag) -> None:
+        self.__timing = LogFlag.PHASE_TIME in flags
+        self.__tracing = LogFlag.MEMORY_PEAK in flags
+        self.__counting = LogFlag.INSTRUCTION_HISTOGRAM in flags
+
+        self.__phase_seconds = dict[Optional[CompilePhase], float]()
+        self.__current: Optional[CompilePhase] = None
+        self.__mark: float = 0
+
+        self.__counts = dict[str, int]()
+        self.__instructions = dict[str, EnvironmentInstruction]()
+
+        self.__tracing_started: bool = False
+
+    def __enter__(self) -> CompileProfiler:
+        """Начать сбор статистики"""
+        if self.__tracing:
+            self.__tracing_started = not tracemalloc.is_tracing()
+
+            if self.__tracing_started:
+                tracemalloc.start()
+
+            tracemalloc.reset_peak()
+
+        self.__mark = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.__stopTracing()
+
+    def __stopTracing(self) -> None:
+        if self.__tracing_started:
+            tracemalloc.stop()
+            self.__tracing_started = False
+
+    def getStatistics(self) -> CompileStatistics:
+        """Собранная статистика. Трассировка памяти завершается"""
+        memory_peak_bytes = None
+
+        if self.__tracing:
+            _, memory_peak_bytes = tracemalloc.get_traced_memory()
+            self.__stopTracing()
+
+        return CompileStatistics(
+            phase_seconds={phase: self.__phase_seconds.get(phase, 0.0) for phase in CompilePhase} if self.__timing else None,
+            memory_peak_bytes=memory_peak_bytes,
+            instruction_usage=self.__getUsage() if self.__counting else None
+        )
+
+    def __switch(self, phase: Optional[CompilePhase]) -> Optional[CompilePhase]:
+        now = time.perf_counter()
+        self.__phase_seconds[self.__current] = self.__phase_seconds.get(self.__current, 0.0) + now - self.__mark
+        self.__mark = now
+
+        previous = self.__current
+        self.__current = phase
+        return previous
+
+    @contextmanager
+    def phase(self, phase: CompilePhase) -> Iterator[None]:
+        """Отнести время выполнения блока к этапу"""
+        if not self.__timing:
+            yield
+            return
+
+        previous = self.__switch(phase)
+
+        try:
+            yield
+
+        finally:
+            self.__switch(previous)
+
+    def measure[T](self, phase: CompilePhase, items: Iterable[T]) -> Iterable[T]:
+        """Отнести ко времени этапа получение каждого элемента потока"""
+        if not self.__timing:
+            return items
+
+        return self.__measure(phase, iter(items))
+
+    def __measure[T](self, phase: CompilePhase, items: Iterator[T]) -> Iterable[T]:
+        while True:
+            previous = self.__switch(phase)
+
+            try:
+                item = next(items)
+
+            except StopIteration:
+                return
+
+            finally:
+                self.__switch(previous)
+
+            yield item
+
+    def count(self, instructions: Iterable[CodeInstruction]) -> Iterable[CodeInstruction]:
+        """Сквозной подсчёт инструкций для гистограммы"""
+        if not self.__counting:
+            return instructions
+
+        return self.__count(instructions)
+
+    def __count(self, instructions: Iterable[CodeInstruction]) -> Iterable[CodeInstruction]:
+        counts = self.__counts
+
+        for ins in instructions:
+            name = ins.instruction.name
+
+            if name in counts:
+                counts[name] += 1
+
+            else:
+                counts[name] = 1
+                self.__instructions[name] = ins.instruction
+
+            yield ins
+
+    def __getUsage(self) -> tuple[InstructionUsage, ...]:
+        usage = (InstructionUsage(instruction=self.__instructions[name], count=count) for name, count in self.__counts.items())
+        return tuple(sorted(usage, key=InstructionUsage.getBytes, reverse=True))
@@ -4,21 +4,38 @@ import time
 from pathlib import Path
 from typing import BinaryIO
 from typing import Final
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
 from typing import TextIO
 
+from bytelang.bytecode.abc import CodeInstruction
+from bytelang.bytecode.abc import Segment
+from bytelang.bytecode.abc import Statement
+from bytelang.bytecode.impl.disasm import ByteCodeBuffer
+from bytelang.bytecode.impl.disasm import Disassembler
 from bytelang.bytecode.impl.gen import CodeGenerator
+from bytelang.bytecode.impl.linker import Linker
+from bytelang.bytecode.impl.linker import SymbolResolver
+from bytelang.bytecode.impl.optimizer import PeepholeOptimizer
 from bytelang.bytecode.impl.writter import ByteCodeWriter
 from bytelang.content.impl.environments import EnvironmentsRegistry
 from bytelang.content.impl.packages import PackageRegistry
 from bytelang.content.impl.primitives import PrimitivesRegistry
 from bytelang.content.impl.profiles import ProfileRegistry
+from bytelang.content.impl.snapshot import RegistriesSnapshot
 from bytelang.core.handlers.errors import ErrorHandler
+from bytelang.core.handlers.errors import ErrorLimitReached
+from bytelang.core.profiler import CompilePhase
+from bytelang.core.profiler import CompileProfiler
 from bytelang.parsers.impl.statement import StatementParser
 from bytelang.results.abc import CompileResult
 from bytelang.results.impl import CompileResultError
 from bytelang.results.impl import CompileResultOK
+from bytelang.utils import Collector
 from bytelang.utils import LogFlag
 from tools.filetool import AnyPath
+from tools.string import FixedStringIO
 
 
 class ByteLang:
@@ -27,6 +44,10 @@ class ByteLang:
     PACKAGE_EXTENSION: Final[str] = "blp"
     SOURCE_EXTENSION: Final[str] = "bls"
     BYTECODE_EXTENSION: Final[str] = "blc"
+    SNAPSHOT_PATH: Final[str] = ".cache/registries.pickle"
+    """Путь снимка реестров относительно каталога bytelang"""
+    MAX_ERRORS: Final[int] = 100
+    """Рекомендуемый предел количества ошибок компиляции (пакетная компиляция и командная строка). Методы компиляции по умолчанию не ограничивают ошибки"""
 
     @classmethod
     def simpleSetup(cls, bytelang_path: AnyPath) -> ByteLang:
@@ -44,40 +65,228 @@ class ByteLang:
 
         return ByteLang(primitives_registry, environments_registry)
 
+    @classmethod
+    def cachedSetup(cls, bytelang_path: AnyPath, snapshot_path: Optional[AnyPath] = None) -> ByteLang:
+        """
+        Получить простую конфигурацию bytelang, используя снимок реестров на диске.
+        Снимок пересоздаётся автоматически при изменении файлов конфигурации
+        :param bytelang_path:
+        :param snapshot_path: Файл снимка (по умолчанию SNAPSHOT_PATH в каталоге bytelang)
+        :return: Рабочую конфигурацию ByteLang
+        """
+        bytelang_path = Path(bytelang_path)
+        snapshot_path = bytelang_path / cls.SNAPSHOT_PATH if snapshot_path is None else Path(snapshot_path)
+
+        source_files = (
+            bytelang_path / "std.json",
+            *(bytelang_path / "profiles").glob("*.json"),
+            *(bytelang_path / "packages").glob(f"*.{cls.PACKAGE_EXTENSION}"),
+            *(bytelang_path / "env").glob("*.json"),
+        )
+
+        snapshot = RegistriesSnapshot(snapshot_path, bytelang_path, source_files)
+
+        if (registries := snapshot.load()) is not None:
+            return ByteLang(*registries)
+
+        ret = cls.simpleSetup(bytelang_path)
+        snapshot.save(ret.__primitives_registry, ret.__environment_registry)
+        return ret
+
     def __init__(self, primitives_registry: PrimitivesRegistry, environment_registry: EnvironmentsRegistry) -> None:
         self.__primitives_registry = primitives_registry
         self.__environment_registry = environment_registry
 
-    def compile(self, source_input_stream: TextIO, bytecode_output_stream: BinaryIO, log_flags: LogFlag = LogFlag.ALL) -> CompileResult:
+    def getPrimitivesRegistry(self) -> PrimitivesRegistry:
+        """Реестр примитивных типов этой конфигурации"""
+        return self.__primitives_registry
+
+    def getEnvironmentsRegistry(self) -> EnvironmentsRegistry:
+        """Реестр окружений этой конфигурации"""
+        return self.__environment_registry
+
+    def disassemble(self, bytecode: ByteCodeBuffer, environment_name: str, start: Optional[int] = None, end: Optional[int] = None) -> Iterable[str]:
+        """
+        Построить листинг байт-кода без исходного кода
+        :param bytecode: Байт-код (bytes, memoryview, mmap)
+        :param environment_name: Окружение, для которого скомпилирована программа
+        :param start: Начальный адрес листинга
+        :param end: Конечный адрес листинга
+        :return: Строки листинга
+        """
+        return Disassembler(self.__environment_registry.get(environment_name)).listing(bytecode, start, end)
+
+    def compile(self, source_input_stream: TextIO, bytecode_output_stream: BinaryIO, log_flags: LogFlag = LogFlag.ALL, *, streaming: bool = False, keep_listing: bool = True, optimize: bool = False, max_errors: Optional[int] = None) -> CompileResult:
         """
         Скомпилировать исходный код из источника в байт-код на выходе
         :param log_flags: Уровень отображения сообщения компиляции
         :param source_input_stream: Источник исходного кода
         :param bytecode_output_stream: Выход байт-кода
+        :param streaming: Потоковый режим: разбор, генерация и запись выполняются цепочкой генераторов.
+        Переменные должны быть объявлены до первой инструкции, при ошибке в выходе может остаться часть программы
+        :param keep_listing: Сохранить выражения и инструкции в результате (иначе только сводные данные)
+        :param optimize: Удалить избыточные инструкции и выбрать относительные формы (по побочным эффектам из пакетов). Программа с метками не оптимизируется
+        :param max_errors: Предел количества ошибок, после которого компиляция прерывается (1 - остановка на первой ошибке, None - без ограничения)
         :return: Результат компиляции
         """
+        errors_handler = ErrorHandler(max_errors)
+
+        with CompileProfiler(log_flags) as profiler:
+            try:
+                if streaming:
+                    return self.__compileStreaming(source_input_stream, bytecode_output_stream, log_flags, keep_listing, optimize, profiler, errors_handler)
+
+                return self.__compile(source_input_stream, bytecode_output_stream, log_flags, keep_listing, optimize, profiler, errors_handler)
+
+            except ErrorLimitReached:
+                return CompileResultError(source_input_stream, bytecode_output_stream, errors_handler)
+
+    def compileSegment(self, source_input_stream: TextIO, environment: Optional[str] = None, *, max_errors: Optional[int] = None) -> Segment:
+        """
+        Скомпилировать фрагмент исходного кода в перемещаемый сегмент.
+        Идентификаторы, не объявленные во фрагменте, становятся внешними символами и разрешаются при компоновке
+        :param source_input_stream: Источник исходного кода фрагмента
+        :param environment: Окружение фрагмента (иначе выбирается директивой .env фрагмента)
+        :param max_errors: Предел количества ошибок
+        :raises ValueError: Фрагмент содержит ошибки (сообщение - журнал ошибок)
+        :return: Сегмент
+        """
+        errors_handler = ErrorHandler(max_errors)
+        env = None if environment is None else self.__environment_registry.get(environment)
+        code_generator = CodeGenerator(errors_handler, self.__environment_registry, self.__primitives_registry, relocatable=True, environment=env)
+        instructions = tuple[CodeInstruction, ...]()
+        program_data = None
+
+        try:
+            statements = tuple(StatementParser(errors_handler).run(source_input_stream))
 
-        start_time = time.time()
+            if errors_handler.isSuccess():
+                instructions, program_data = code_generator.run(statements)
+
+        except ErrorLimitReached:
+            pass
+
+        if program_data is None or not errors_handler.isSuccess():
+            raise ValueError(errors_handler.getLog())
+
+        return Segment(
+            environment=program_data.environment,
+            code=b"".join(ins.write() for ins in instructions),
+            instructions_count=len(instructions),
+            marks={name: offset for offset, name in program_data.marks.items()},
+            variables=program_data.variables,
+            relocations=code_generator.getRelocations()
+        )
+
+    def link(self, segments: Sequence[Segment], bytecode_output_stream: BinaryIO, log_flags: LogFlag = LogFlag.PROGRAM_SIZE, *, resolve: Optional[SymbolResolver] = None, max_errors: Optional[int] = None) -> CompileResult:
+        """
+        Скомпоновать сегменты в программу. Время компоновки пропорционально размеру программы, сегменты не перекомпилируются
+        :param segments: Сегменты в порядке размещения
+        :param bytecode_output_stream: Выход байт-кода
+        :param log_flags: Уровень отображения сообщения компоновки
+        :param resolve: Значения внешних символов, не объявленных в сегментах (индекс сегмента, имя)
+        :param max_errors: Предел количества ошибок
+        :return: Результат компоновки (без выражений и инструкций)
+        """
+        start_time = time.perf_counter()
+
+        errors_handler = ErrorHandler(max_errors)
+        source_stream = FixedStringIO()
+        error_result = CompileResultError(source_stream, bytecode_output_stream, errors_handler)
+
+        try:
+            program_size, program_data = Linker(errors_handler).run(segments, bytecode_output_stream, resolve)
+
+        except ErrorLimitReached:
+            return error_result
+
+        if not errors_handler.isSuccess():
+            return error_result
+
+        return CompileResultOK(
+            source_stream, bytecode_output_stream, log_flags, tuple(), tuple(), program_data, program_size, time.perf_counter() - start_time,
+            0, sum(segment.instructions_count for segment in segments)
+        )
+
+    def __compile(self, source_input_stream: TextIO, bytecode_output_stream: BinaryIO, log_flags: LogFlag, keep_listing: bool, optimize: bool, profiler: CompileProfiler, errors_handler: ErrorHandler) -> CompileResult:
+        start_time = time.perf_counter()
 
-        errors_handler = ErrorHandler()
         error_result = CompileResultError(source_input_stream, bytecode_output_stream, errors_handler)
 
-        statements = tuple(StatementParser(errors_handler).run(source_input_stream))
+        with profiler.phase(CompilePhase.PARSE):
+            statements = tuple(StatementParser(errors_handler).run(source_input_stream))
 
         if not errors_handler.isSuccess():
             return error_result
 
-        instructions, program_data = CodeGenerator(errors_handler, self.__environment_registry, self.__primitives_registry).run(statements)
+        with profiler.phase(CompilePhase.CODEGEN):
+            instructions, program_data = CodeGenerator(errors_handler, self.__environment_registry, self.__primitives_registry).run(statements)
 
         if program_data is None:
             errors_handler.write("Program data is None")
             return error_result
 
-        program_size = ByteCodeWriter(errors_handler).run(instructions, program_data, bytecode_output_stream)
+        optimizer = PeepholeOptimizer(errors_handler, lambda: len(program_data.marks) > 0, lambda: program_data.environment)
+
+        if optimize:
+            with profiler.phase(CompilePhase.OPTIMIZE):
+                instructions = tuple(optimizer.run(instructions))
+
+        with profiler.phase(CompilePhase.WRITE):
+            bytecode = ByteCodeWriter(errors_handler).runBuffer(tuple(profiler.count(instructions)), program_data)
+
+            if bytecode is not None and errors_handler.isSuccess():
+                bytecode_output_stream.write(bytecode)
+
+        if bytecode is None or not errors_handler.isSuccess():
+            return error_result
+
+        program_size = len(bytecode)
+
+        compilation_time_seconds = time.perf_counter() - start_time
+
+        statements_count = len(statements)
+        instructions_count = len(instructions)
+
+        if not keep_listing:
+            statements = instructions = tuple()
+
+        return CompileResultOK(
+            source_input_stream, bytecode_output_stream, log_flags, statements, instructions, program_data, program_size, compilation_time_seconds, statements_count, instructions_count, optimizer.getBytesSaved(),
+            profiler.getStatistics()
+        )
+
+    def __compileStreaming(self, source_input_stream: TextIO, bytecode_output_stream: BinaryIO, log_flags: LogFlag, keep_listing: bool, optimize: bool, profiler: CompileProfiler, errors_handler: ErrorHandler) -> CompileResult:
+        start_time = time.perf_counter()
+
+        error_result = CompileResultError(source_input_stream, bytecode_output_stream, errors_handler)
+
+        statements = Collector[Statement](keep_listing)
+        instructions = Collector[CodeInstruction](keep_listing)
+
+        code_generator = CodeGenerator(errors_handler, self.__environment_registry, self.__primitives_registry, streaming=True)
+
+        optimizer = PeepholeOptimizer(errors_handler, code_generator.hasMarks, code_generator.getEnvironment)
+
+        parsed = statements.collect(profiler.measure(CompilePhase.PARSE, StatementParser(errors_handler).run(source_input_stream)))
+        generated = profiler.measure(CompilePhase.CODEGEN, code_generator.iterate(filter(lambda _: errors_handler.isSuccess(), parsed)))
+
+        if optimize:
+            generated = profiler.measure(CompilePhase.OPTIMIZE, optimizer.run(generated))
+
+        generated = profiler.count(instructions.collect(generated))
+
+        with profiler.phase(CompilePhase.WRITE):
+            program_size = ByteCodeWriter(errors_handler).runStream(generated, code_generator.getProgramData, bytecode_output_stream)
 
         if not errors_handler.isSuccess():
             return error_result
 
-        compilation_time_seconds = time.time() - start_time
+        program_data = code_generator.getProgramData()
+        compilation_time_seconds = time.perf_counter() - start_time
 
-        return CompileResultOK(source_input_stream, bytecode_output_stream, log_flags, statements, instructions, program_data, program_size, compilation_time_seconds)
+        return CompileResultOK(
+            source_input_stream, bytecode_output_stream, log_flags,
+            statements.getItems(), instructions.getItems(), program_data, program_size, compilation_time_seconds,
+            statements.getCount(), instructions.getCount(), optimizer.getBytesSaved(), profiler.getStatistics()
+        )
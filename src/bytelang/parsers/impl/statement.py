@@ -1,91 +1,89 @@
 from __future__ import annotations
-from __future__ import annotations
 
 import re
-from dataclasses import dataclass
 from typing import Callable
 from typing import ClassVar
+from typing import Final
 from typing import Optional
-from typing import Optional
-from typing import Optional
+from typing import Pattern
 
 from bytelang.bytecode.abc import Regex
-from bytelang.bytecode.abc import Regex
-from bytelang.bytecode.abc import Regex
-from bytelang.bytecode.abc import Regex
-from bytelang.bytecode.abc import Regex
-from bytelang.bytecode.abc import Regex
-from bytelang.bytecode.abc import Regex
-from bytelang.bytecode.abc import Regex
-from bytelang.bytecode.abc import Statement
 from bytelang.bytecode.abc import Statement
-from bytelang.bytecode.abc import Statement
-from bytelang.bytecode.abc import StatementType
 from bytelang.bytecode.abc import StatementType
-
-from bytelang.bytecode.abc import UniversalArgument
-from bytelang.bytecode.abc import UniversalArgument
-from bytelang.bytecode.abc import UniversalArgument
-from bytelang.bytecode.abc import UniversalArgument
-from bytelang.bytecode.abc import UniversalArgument
-from bytelang.bytecode.abc import UniversalArgument
-from bytelang.bytecode.abc import UniversalArgument
-from bytelang.bytecode.abc import UniversalArgument
-from bytelang.bytecode.abc import UniversalArgument
 from bytelang.bytecode.abc import UniversalArgument
 from bytelang.core.handlers.errors import BasicErrorHandler
 from bytelang.parsers.abc import Parser
 
 
-@dataclass(frozen=True)
-class Matcher:
-    __pattern: str
-    __handler: Callable[[str], UniversalArgument]
-
-    def process(self, lexeme: str) -> Optional[UniversalArgument]:
-        if re.match(self.__pattern, lexeme):
-            return self.__handler(lexeme)
-
-
 class StatementParser(Parser[Statement]):
-    __MATCHERS: ClassVar[tuple[Matcher, ...]] = (
-        Matcher(Regex.INTEGER, lambda s: UniversalArgument.fromInteger(int(s, 10))),
-        Matcher(Regex.BIN_VALUE, lambda s: UniversalArgument.fromInteger(int(s, 2))),
-        Matcher(Regex.OCT_VALUE, lambda s: UniversalArgument.fromInteger(int(s, 8))),
-        Matcher(Regex.HEX_VALUE, lambda s: UniversalArgument.fromInteger(int(s, 16))),
-        Matcher(Regex.EXPONENT, lambda s: UniversalArgument.fromExponent(float(s))),
-        Matcher(Regex.CHAR, lambda s: UniversalArgument.fromExponent(ord(s[1]))),
-        Matcher(Regex.IDENTIFIER, lambda s: UniversalArgument.fromName(s)),
+    """
+    Парсер выражений.
+    Строка разбирается за один проход: тип выражения и аргументы определяются
+    заранее скомпилированными сканерами, альтернативы которых проверяются в порядке приоритета
+    """
+
+    __ARGUMENT_HANDLERS: ClassVar[dict[str, Callable[[str], UniversalArgument]]] = {
+        "INTEGER": lambda s: UniversalArgument.fromInteger(int(s, 10)),
+        "BIN_VALUE": lambda s: UniversalArgument.fromInteger(int(s, 2)),
+        "OCT_VALUE": lambda s: UniversalArgument.fromInteger(int(s, 8)),
+        "HEX_VALUE": lambda s: UniversalArgument.fromInteger(int(s, 16)),
+        "EXPONENT": lambda s: UniversalArgument.fromExponent(float(s)),
+        "CHAR": lambda s: UniversalArgument.fromExponent(ord(s[1])),
+        "IDENTIFIER": lambda s: UniversalArgument.fromName(s),
+    }
+    """Обработчики аргументов в порядке приоритета. Ключ - имя выражения в Regex"""
+
+    __UNKNOWN: Final[ClassVar[str]] = "UNKNOWN"
+    """Группа нераспознанной лексемы"""
+
+    __LEXEME_END: Final[ClassVar[str]] = r"(?=\s|\Z)"
+
+    __HEAD_SCANNER: Final[ClassVar[Pattern[str]]] = re.compile(
+        "(?:" + "|".join(f"(?P<{t.name}>{t.value})" for t in StatementType) + rf"|(?P<{__UNKNOWN}>\S+)){__LEXEME_END}"
+    )
+    """Сканер первой лексемы (типа выражения)"""
+
+    __ARGUMENT_SCANNER: Final[ClassVar[Pattern[str]]] = re.compile(
+        r"\s+(?:" + "|".join(f"(?P<{name}>{getattr(Regex, name)})" for name in __ARGUMENT_HANDLERS) + rf"|(?P<{__UNKNOWN}>\S+)){__LEXEME_END}"
     )
+    """Сканер аргументов"""
+
+    __NAME: Final[ClassVar[Pattern[str]]] = re.compile(Regex.NAME)
 
     def __init__(self, error_handler: BasicErrorHandler):
         self.__err = error_handler.getChild(self.__class__.__name__)
+        self.__arguments_cache = dict[str, UniversalArgument]()
+        """Распознанные аргументы по лексеме (значения неизменяемы, повторы координат не разбираются заново)"""
 
     def _parseLine(self, index: int, line: str) -> Optional[Statement]:
-        first, *lexemes = line.split()
-
         self.__err.begin()
 
-        args = tuple(self.__matchStatementArg(lexeme, i, index, line) for i, lexeme in enumerate(lexemes))
-        _type, head = self.__matchStatementType(first, index, line)
+        head_match = self.__HEAD_SCANNER.match(line)
+        args = tuple(self.__matchStatementArg(m, i, index, line) for i, m in enumerate(self.__ARGUMENT_SCANNER.finditer(line, head_match.end())))
+        _type, head = self.__matchStatementType(head_match, index, line)
 
         if self.__err.isFailed():
             return
 
         return Statement(type=_type, line=line, index=index, head=head, arguments=args)
 
-    def __matchStatementType(self, lexeme: str, index: int, line_source: str) -> tuple[StatementType, str] | tuple[None, None]:
-        for statement_type in StatementType:
-            if m := re.fullmatch(statement_type.value, lexeme):
-                w = re.search(Regex.NAME, m.string)
-                return statement_type, w.string[w.start():w.end()]
+    def __matchStatementType(self, match: re.Match[str], index: int, line_source: str) -> tuple[StatementType, str] | tuple[None, None]:
+        lexeme = match.group()
+
+        if match.lastgroup != self.__UNKNOWN:
+            return StatementType[match.lastgroup], self.__NAME.search(lexeme).group()
 
         self.__err.writeLineAt(line_source, index, f"Не удалось определить тип выражения: '{lexeme}'")
         return None, None
 
-    def __matchStatementArg(self, lexeme: str, i: int, line_index: int, line_source: str) -> Optional[UniversalArgument]:
-        for matcher in self.__MATCHERS:
-            if ret := matcher.process(lexeme):
-                return ret
+    def __matchStatementArg(self, match: re.Match[str], i: int, line_index: int, line_source: str) -> Optional[UniversalArgument]:
+        lexeme = match.group(match.lastgroup)
+
+        if (ret := self.__arguments_cache.get(lexeme)) is not None:
+            return ret
+
+        if match.lastgroup != self.__UNKNOWN:
+            ret = self.__arguments_cache[lexeme] = self.__ARGUMENT_HANDLERS[match.lastgroup](lexeme)
+            return ret
 
         self.__err.writeLineAt(line_source, line_index, f"Запись Аргумента ({i}) '{lexeme}' не распознана")
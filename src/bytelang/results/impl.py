@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from io import BytesIO
+from os import PathLike
+from typing import Optional
 
 from bytelang.bytecode.abc import CodeInstruction
+from bytelang.bytecode.impl.disasm import Disassembler
 from bytelang.core.handlers.errors import ErrorHandler
-from bytelang.parsers.abc import Parser
+from bytelang.core.profiler import CompileStatistics
 from bytelang.bytecode.abc import ProgramData
 from bytelang.bytecode.abc import Statement
 from bytelang.results.abc import CompileResult
 from bytelang.utils import LogFlag
+from tools.filetool import FileTool
 from tools.reprtool import ReprTool
 from tools.string import StringBuilder
 
@@ -22,6 +27,14 @@ class CompileResultOK(CompileResult):
     program_data: ProgramData
     program_size: int
     compilation_time_seconds: float
+    statements_count: int
+    """Количество выражений (сами выражения могут не сохраняться)"""
+    instructions_count: int
+    """Количество инструкций (сами инструкции могут не сохраняться)"""
+    bytes_saved: int = 0
+    """Размер инструкций, удалённых оптимизатором"""
+    statistics: Optional[CompileStatistics] = None
+    """Статистика компиляции (этапы, память, гистограмма инструкций)"""
 
     def isOK(self) -> bool:
         return True
@@ -37,7 +50,7 @@ class CompileResultOK(CompileResult):
             sb.append(ReprTool.title(f"profile : {env.profile.name}")).append(ReprTool.strDict(env.profile.__dict__, _repr=True))
 
         if LogFlag.STATEMENTS in self.flags:
-            sb.append(ReprTool.headed(f"statements : {self.source_stream.name}", self.statements))
+            self.__writeListing(sb, f"statements : {self.source_stream.name}", self.statements, self.statements_count)
 
         if LogFlag.CONSTANTS in self.flags:
             sb.append(ReprTool.title("constants")).append(ReprTool.strDict(self.program_data.constants))
@@ -46,46 +59,62 @@ class CompileResultOK(CompileResult):
             sb.append(ReprTool.headed("variables", self.program_data.variables))
 
         if LogFlag.CODE_INSTRUCTIONS in self.flags:
-            sb.append(ReprTool.headed(f"code instructions : {self.source_stream.name}", self.instructions))
+            self.__writeListing(sb, f"code instructions : {self.source_stream.name}", self.instructions, self.instructions_count)
 
         if LogFlag.BYTECODE in self.flags:
             self.__writeByteCode(sb)
 
         if LogFlag.PROGRAM_SIZE in self.flags:
-            sb.append(ReprTool.title(f"Program Size : {self.program_size} Bytes"))
+            saved = f" (optimizer saved {self.bytes_saved} Bytes)" if self.bytes_saved else ""
+            sb.append(ReprTool.title(f"Program Size : {self.program_size} Bytes{saved}"))
 
         if LogFlag.COMPILATION_TIME in self.flags:
             sb.append(ReprTool.title(f"Compilation Time : {self.compilation_time_seconds:.02} seconds"))
 
+        if self.statistics is not None:
+            self.__writeStatistics(sb, self.statistics)
+
         return sb.toString()
 
+    def __writeStatistics(self, sb: StringBuilder, statistics: CompileStatistics) -> None:
+        if LogFlag.PHASE_TIME in self.flags and statistics.phase_seconds is not None:
+            sb.append(ReprTool.title("phase time")).append(ReprTool.strDict({phase.value: f"{seconds:.6f} s" for phase, seconds in statistics.phase_seconds.items()}))
+
+        if LogFlag.MEMORY_PEAK in self.flags and statistics.memory_peak_bytes is not None:
+            sb.append(ReprTool.title(f"Memory Peak : {statistics.memory_peak_bytes} Bytes"))
+
+        if LogFlag.INSTRUCTION_HISTOGRAM in self.flags and statistics.instruction_usage is not None:
+            sb.append(ReprTool.headed("instruction histogram", statistics.instruction_usage))
+
     @staticmethod
-    def __writeComment(sb: StringBuilder, message: object) -> None:
-        sb.append(f"\n{Parser.COMMENT}  {message}")
+    def __writeListing(sb: StringBuilder, name: str, items: tuple, count: int) -> None:
+        if len(items) == count:
+            sb.append(ReprTool.headed(name, items))
+            return
 
-    def __writeByteCode(self, sb: StringBuilder) -> None:
-        ins_by_addr = {ins.address: ins for ins in self.instructions}
-        var_by_addr = {var.address: var for var in self.program_data.variables}
+        sb.append(ReprTool.title(f"{name} : {count} (not kept)"))
+
+    def __readByteCode(self) -> Optional[bytes | memoryview]:
+        if isinstance(self.bytecode_stream, BytesIO):
+            return self.bytecode_stream.getbuffer()
 
-        sb.append(ReprTool.title(f"bytecode view : {self.bytecode_stream.name}"))
-        self.bytecode_stream.close()
+        if not isinstance(getattr(self.bytecode_stream, "name", None), (str, bytes, PathLike)):
+            return None
 
-        with open(self.bytecode_stream.name, "rb") as bytecode_view:
-            bytecode_view_read = bytecode_view.read()
-            for address, byte in enumerate(bytecode_view_read):
-                if address == 0:
-                    self.__writeComment(sb, "program start address define")
+        if not self.bytecode_stream.closed:
+            self.bytecode_stream.flush()
 
-                if (var := var_by_addr.get(address)) is not None:
-                    self.__writeComment(sb, var)
+        return FileTool.readBytes(self.bytecode_stream.name)
 
-                if (mark := self.program_data.marks.get(address)) is not None:
-                    self.__writeComment(sb, f"{mark}:")
+    def __writeByteCode(self, sb: StringBuilder) -> None:
+        sb.append(ReprTool.title(f"bytecode view : {getattr(self.bytecode_stream, 'name', '')}"))
 
-                if (ins := ins_by_addr.get(address)) is not None:
-                    self.__writeComment(sb, ins)
+        if (bytecode := self.__readByteCode()) is None:
+            sb.append("bytecode stream is not readable")
+            return
 
-                sb.append(f"{address:04X}: {byte:02X}")
+        for line in Disassembler(self.program_data.environment).listing(bytecode, program_data=self.program_data):
+            sb.append(line)
 
 
 @dataclass(frozen=True, repr=False)
@@ -4,6 +4,8 @@ from enum import Flag
 from enum import auto
 from typing import AnyStr
 from typing import IO
+from typing import Iterable
+from typing import Optional
 
 
 class LogFlag(Flag):
@@ -28,6 +30,14 @@ class LogFlag(Flag):
 
     COMPILATION_TIME = auto()
     """Длительность компиляции"""
+    PHASE_TIME = auto()
+    """Длительность этапов компиляции"""
+    MEMORY_PEAK = auto()
+    """Пик выделенной памяти (замедляет компиляцию)"""
+    INSTRUCTION_HISTOGRAM = auto()
+    """Количество и размер инструкций каждого вида"""
+    STATISTICS = COMPILATION_TIME | PHASE_TIME | MEMORY_PEAK | INSTRUCTION_HISTOGRAM
+    """Вся статистика компиляции"""
 
     PROGRAM_SIZE = auto()
     """Размер программы в байтах"""
@@ -57,3 +67,27 @@ class CountingStream:
 
     def getBytesWritten(self) -> int:
         return self.__bytes_written
+
+
+class Collector[T]:
+    """Сквозной счётчик элементов потока. Опционально сохраняет прошедшие элементы"""
+
+    def __init__(self, keep: bool) -> None:
+        self.__items: Optional[list[T]] = list[T]() if keep else None
+        self.__count = 0
+
+    def collect(self, items: Iterable[T]) -> Iterable[T]:
+        for item in items:
+            self.__count += 1
+
+            if self.__items is not None:
+                self.__items.append(item)
+
+            yield item
+
+    def getCount(self) -> int:
+        return self.__count
+
+    def getItems(self) -> tuple[T, ...]:
+        """Сохранённые элементы. Пусто, если элементы не сохранялись"""
+        return tuple() if self.__items is None else tuple(self.__items)
@@ -1,16 +1,28 @@
 from __future__ import annotations
 
 import math
+from array import array
 from dataclasses import dataclass
+from dataclasses import field
+from itertools import chain
 from os import PathLike
 from pathlib import Path
+from string import Formatter
+from typing import ClassVar
+from typing import Final
+from typing import Iterable
+from typing import Mapping
+from typing import Optional
 from typing import Sequence
 from typing import TextIO
 
+import numpy as np
+
 from bytelang.main import ByteLang
 from gen.settings import Settings
 from gen.trajectory import Trajectory
 from tools.filetool import FileTool
+from tools.string import ChunkedTextWriter
 
 
 class State:
@@ -35,6 +47,254 @@ class State:
         self.last_y: int = 0
         """Последняя позиция Y"""
 
+    def nextStep(self, config: Settings, trajectory: Trajectory, step_index: int, x: int, y: int) -> bool:
+        """
+        Перейти к следующему шагу траектории
+        :return: True, если расстояние от предыдущей вершины требует разрыва (смены инструмента)
+        """
+        self.global_current_step_index += 1
+
+        if step_index > 0:
+            self.last_x = trajectory.x_positions[step_index - 1]
+            self.last_y = trajectory.y_positions[step_index - 1]
+
+        return math.hypot(x - self.last_x, y - self.last_y) > config.disconnect_distance_mm
+
+    def nextProgress(self) -> Optional[int]:
+        """
+        Обновить уровень прогресса после шага
+        :return: Новый уровень прогресса или None, если он не изменился
+        """
+        current_progress = self.global_current_step_index * 100 // self.global_total_step_count
+
+        if current_progress == self.global_last_progress:
+            return None
+
+        self.global_last_progress = current_progress
+        return current_progress
+
+    def nextSteps(self, config: Settings, contours: Sequence[Trajectory], x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Пройти все шаги нескольких траекторий сразу. Эквивалентно вызову nextStep и nextProgress на каждом шаге
+        :param contours: Траектории
+        :param x: Позиции X всех шагов траекторий подряд (целые, по модулю меньше CodeGenerator.COORDINATE_LIMIT)
+        :param y: Позиции Y всех шагов траекторий подряд
+        :return: Маска шагов, требующих разрыва, и уровни прогресса после каждого шага (-1, если уровень не изменился)
+        """
+        last_x = np.empty_like(x)
+        last_y = np.empty_like(y)
+        last_x[1:] = x[:-1]
+        last_y[1:] = y[:-1]
+
+        start = 0
+
+        for contour in contours:
+            if (length := len(contour.x_positions)) == 0:
+                continue
+
+            last_x[start] = self.last_x
+            last_y[start] = self.last_y
+
+            if length > 1:
+                self.last_x = int(x[start + length - 2])
+                self.last_y = int(y[start + length - 2])
+
+            start += length
+
+        dx = x - last_x
+        dy = y - last_y
+
+        if config.disconnect_distance_mm < 0:
+            disconnect = np.ones(len(x), dtype=np.bool_)
+
+        else:
+            # Для целых координат совпадает с hypot(dx, dy) > disconnect_distance_mm без погрешности округления
+            disconnect = dx * dx + dy * dy > config.disconnect_distance_mm * config.disconnect_distance_mm
+
+        progress = np.arange(self.global_current_step_index + 1, self.global_current_step_index + len(x) + 1, dtype=np.int64) * 100 // self.global_total_step_count
+        previous = np.empty_like(progress)
+        previous[0] = self.global_last_progress
+        previous[1:] = progress[:-1]
+
+        self.global_current_step_index += len(x)
+        self.global_last_progress = int(progress[-1])
+
+        return disconnect, np.where(progress != previous, progress, -1)
+
+
+class StepTemplate:
+    """
+    Шаблон кода, заполняемый сразу для массива шагов.
+    Поддерживает только ASCII-текст и простые подстановки ({x}) целых значений - результат совпадает с str.format
+    """
+
+    __POWERS: Final[np.ndarray] = 10 ** np.arange(19, dtype=np.int64)
+    """Степени 10, представимые int64"""
+    __PADDING: Final[bytes] = b"\0"
+    """Заполнитель полей чисел, удаляемый из результата"""
+
+    @classmethod
+    def parse(cls, template: str, keys: Sequence[str]) -> Optional[StepTemplate]:
+        """
+        :param template: Шаблон кода
+        :param keys: Доступные подстановки
+        :return: Шаблон или None, если он использует форматирование, недоступное заполнению массивом
+        """
+        if not template.isascii() or cls.__PADDING.decode() in template:
+            return None
+
+        parts = list[bytes | str]()
+
+        for literal, name, spec, conversion in Formatter().parse(template):
+            if literal:
+                parts.append(literal.encode())
+
+            if name is None:
+                continue
+
+            if spec or conversion or name not in keys:
+                return None
+
+            parts.append(name)
+
+        return cls(tuple(parts))
+
+    def __init__(self, parts: tuple[bytes | str, ...]) -> None:
+        self.__parts = parts
+        """Текст (bytes) и имена подстановок (str)"""
+
+    def render(self, values: Mapping[str, np.ndarray]) -> tuple[str, list[int]]:
+        """
+        Заполнить шаблон для всех шагов
+        :param values: Значения подстановок по шагам (целочисленные массивы одной длины)
+        :return: Текст записей подряд и их границы: запись шага i - text[offsets[i]:offsets[i + 1]]
+        """
+        count = len(next(iter(values.values())))
+        columns = list[np.ndarray]()
+        lengths = np.zeros(count, dtype=np.int64)
+
+        for part in self.__parts:
+            if isinstance(part, bytes):
+                columns.append(np.frombuffer(part, dtype=np.uint8))
+                lengths += len(part)
+                continue
+
+            value = values[part]
+            low = int(value.min())
+            high = int(value.max())
+
+            if high - low < count:
+                # Каждое значение диапазона записывается один раз
+                table_rows, table_lengths = self.__renderNumbers(np.arange(low, high + 1, dtype=np.int64))
+                columns.append(table_rows[value - low])
+                lengths += table_lengths[value - low]
+
+            else:
+                field_rows, field_lengths = self.__renderNumbers(value.astype(np.int64))
+                columns.append(field_rows)
+                lengths += field_lengths
+
+        rows = np.empty((count, sum(column.shape[-1] for column in columns)), dtype=np.uint8)
+        start = 0
+
+        for column in columns:
+            rows[:, start:start + column.shape[-1]] = column
+            start += column.shape[-1]
+
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return rows.tobytes().replace(self.__PADDING, b"").decode("ascii"), offsets.tolist()
+
+    @classmethod
+    def __renderNumbers(cls, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Десятичная запись чисел, выровненная по правому краю полем PADDING: байты и длины записей"""
+        negative = values < 0
+        absolute = np.abs(values)
+        digits = np.searchsorted(cls.__POWERS[1:], absolute, side="right") + 1
+        lengths = digits + negative
+        width = int(lengths.max())
+
+        place = width - 1 - np.arange(width)
+        """Разряд числа в столбце"""
+        rows = (ord("0") + absolute[:, None] // cls.__POWERS[place] % 10).astype(np.uint8)
+        rows[place >= lengths[:, None]] = cls.__PADDING[0]
+        rows[negative[:, None] & (place == digits[:, None])] = ord("-")
+
+        return rows, lengths
+
+
+class CodeTemplate:
+    """
+    Шаблон кода события, разобранный заранее.
+    Подстановки проверяются при создании, при заполнении передаются позиционно только используемые значения
+    """
+
+    def __init__(self, name: str, source: str, keys: Sequence[str]) -> None:
+        """
+        :param name: Событие (для сообщений об ошибках)
+        :param source: Текст шаблона. Без доступных подстановок используется как есть
+        :param keys: Подстановки, доступные событию
+        :raises ValueError: Шаблон использует недоступные подстановки или содержит ошибку формата
+        """
+        self.__source = source
+        self.__keys = tuple[str, ...]()
+        """Используемые подстановки в порядке позиционных полей"""
+        self.__format: Optional[str] = None
+        """Шаблон с позиционными полями. None - текст без подстановок"""
+        self.__step: Optional[StepTemplate] = None
+
+        if not keys:
+            return
+
+        used = list[str]()
+        positional = list[str]()
+
+        try:
+            parsed = tuple(Formatter().parse(source))
+
+        except ValueError as e:
+            raise ValueError(f"Template {name}: {e}") from e
+
+        for literal, field_name, spec, conversion in parsed:
+            positional.append(literal.replace("{", "{{").replace("}", "}}"))
+
+            if field_name is None:
+                continue
+
+            key = field_name.split(".", 1)[0].split("[", 1)[0]
+
+            if key not in used:
+                used.append(key)
+
+            accessor = field_name[len(key):]
+            positional.append(f"{{{used.index(key)}{accessor}{'!' + conversion if conversion else ''}{':' + spec if spec else ''}}}")
+
+        if unknown_keys := set(used) - set(keys):
+            raise ValueError(f"Template {name} uses unknown keys: {sorted(unknown_keys)}. Available: {keys}")
+
+        self.__keys = tuple(used)
+        self.__format = "".join(positional)
+        self.__step = StepTemplate.parse(source, keys)
+
+    def getSource(self) -> str:
+        return self.__source
+
+    def getKeys(self) -> tuple[str, ...]:
+        """Используемые подстановки"""
+        return self.__keys
+
+    def getStepTemplate(self) -> Optional[StepTemplate]:
+        """Шаблон для заполнения массивом шагов. None, если шаблон требует str.format"""
+        return self.__step
+
+    def render(self, **values: object) -> str:
+        """Заполнить шаблон. Лишние значения игнорируются"""
+        if self.__format is None:
+            return self.__source
+
+        return self.__format.format(*[values[key] for key in self.__keys])
+
 
 @dataclass(frozen=True)
 class CodeGenerator:
@@ -58,39 +318,62 @@ class CodeGenerator:
     """В конце контура"""
     end: str
     """Завершающий код"""
+    on_page_end: str = "set_active_tool {tool_none}\nquit\n"
+    """В конце страницы, кроме последней (программа разбита на страницы). Каталоги шаблонов без on_page_end получают встроенный"""
+
+    templates: dict[str, CodeTemplate] = field(init=False, repr=False, compare=False)
+    """Разобранные шаблоны событий"""
+
+    EVENT_KEYS: ClassVar[dict[str, tuple[str, ...]]] = {
+        "start": ("speed", "tool_none"),
+        "on_contour_begin": ("speed", "tool_paint"),
+        "on_new_position": ("x", "y"),
+        "on_disconnect": ("tool_paint", "tool_none", "tool_change_duration_ms", "x", "y"),
+        "on_update_progress": ("progress",),
+        "on_contour_end": (),
+        "end": ("end_speed", "tool_none"),
+        "on_page_end": ("tool_none",),
+    }
+    """Значения, доступные шаблону каждого события"""
+    BUFFER_SIZE: ClassVar[int] = 1 << 20
+    """Размер блока текста, накапливаемого перед записью в поток (символы)"""
+    CHUNK_STEPS: ClassVar[int] = 1 << 16
+    """Количество шагов, обрабатываемых массивом за раз (траектории не разделяются)"""
+    COORDINATE_LIMIT: ClassVar[int] = 1 << 30
+    """Предел модуля координат, обрабатываемых массивом (квадрат расстояния помещается в int64)"""
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "templates", {name: CodeTemplate(name, getattr(self, name), keys) for name, keys in self.EVENT_KEYS.items()})
 
     @classmethod
     def load(cls, codes: PathLike | str) -> CodeGenerator:
+        """
+        Загрузить и разобрать шаблоны
+        :raises ValueError: Шаблон использует недоступные подстановки
+        """
         return CodeGenerator(**{
             handler_path.stem: FileTool.read(handler_path)
             for handler_path in Path(codes).glob(f"*.{ByteLang.SOURCE_EXTENSION}")
         })
 
-    def __processTrajectory(self, stream: TextIO, config: Settings, trajectory: Trajectory, state: State) -> None:
+    def __processTrajectory(self, out: ChunkedTextWriter, config: Settings, trajectory: Trajectory, state: State) -> None:
         paint_move_speed = config.speed if trajectory.movement_speed is None else trajectory.movement_speed
 
-        stream.write(self.on_contour_begin.format(
+        out.write(self.templates["on_contour_begin"].render(
             speed=paint_move_speed,
             tool_paint=trajectory.tool_id
         ))
 
         for step_index, position in enumerate(zip(trajectory.x_positions, trajectory.y_positions)):
-            self.__processStep(config, trajectory, state, step_index, stream, position)
+            self.__processStep(config, trajectory, state, step_index, out, position)
 
-        stream.write(self.on_contour_end)
+        out.write(self.templates["on_contour_end"].render())
 
-    def __processStep(self, config: Settings, trajectory: Trajectory, state: State, step_index: int, stream: TextIO, position: tuple[int, int]):
+    def __processStep(self, config: Settings, trajectory: Trajectory, state: State, step_index: int, out: ChunkedTextWriter, position: tuple[int, int]):
         x, y = position
-        state.global_current_step_index += 1
-
-        if step_index > 0:
-            state.last_x = trajectory.x_positions[step_index - 1]
-            state.last_y = trajectory.y_positions[step_index - 1]
-
-        delta_mm = math.hypot(x - state.last_x, y - state.last_y)
 
-        if delta_mm > config.disconnect_distance_mm:
-            stream.write(self.on_disconnect.format(
+        if state.nextStep(config, trajectory, step_index, x, y):
+            out.write(self.templates["on_disconnect"].render(
                 tool_paint=trajectory.tool_id,
                 tool_none=config.tool_none,
                 tool_change_duration_ms=config.tool_change_duration_ms,
@@ -98,28 +381,122 @@ class CodeGenerator:
                 y=y
             ))
         else:
-            stream.write(self.on_new_position.format(x=x, y=y))
+            out.write(self.templates["on_new_position"].render(x=x, y=y))
+
+        if (current_progress := state.nextProgress()) is not None:
+            out.write(self.templates["on_update_progress"].render(progress=current_progress))
+
+    def __isVectorizable(self, positions: np.ndarray) -> bool:
+        return len(positions) > 0 and positions.dtype.kind in "iu" and int(np.abs(positions).max()) < self.COORDINATE_LIMIT
+
+    @staticmethod
+    def __concatenate(columns: Sequence[Sequence[int]]) -> np.ndarray:
+        """Объединить столбцы координат. Компактные столбцы (array, memoryview) копируются без создания объектов int"""
+        if len(columns) > 0 and all(isinstance(column, (array, memoryview)) for column in columns):
+            return np.concatenate(tuple(np.asarray(column) for column in columns), dtype=np.int64)
 
-        current_progress = state.global_current_step_index * 100 // state.global_total_step_count
+        return np.array(list(chain.from_iterable(columns)))
 
-        if current_progress != state.global_last_progress:
-            stream.write(self.on_update_progress.format(progress=current_progress))
-            state.global_last_progress = current_progress
+    def __splitChunks(self, contours: Sequence[Trajectory]) -> Iterable[Sequence[Trajectory]]:
+        begin = 0
+        steps = 0
+
+        for end, contour in enumerate(contours, 1):
+            steps += len(contour.x_positions)
+
+            if steps >= self.CHUNK_STEPS:
+                yield contours[begin:end]
+                begin = end
+                steps = 0
+
+        if begin < len(contours):
+            yield contours[begin:]
+
+    def __processChunk(self, out: ChunkedTextWriter, config: Settings, contours: Sequence[Trajectory], state: State, on_new_position: StepTemplate) -> None:
+        """
+        Сгенерировать код нескольких траекторий. Результат совпадает с __processTrajectory для каждой траектории.
+        Код смены позиции заполняется массивом, разрывы и обновления прогресса (редкие) вставляются отдельно
+        """
+        x = self.__concatenate(tuple(contour.x_positions for contour in contours))
+        y = self.__concatenate(tuple(contour.y_positions for contour in contours))
+
+        if not (self.__isVectorizable(x) and self.__isVectorizable(y)):
+            for contour in contours:
+                self.__processTrajectory(out, config, contour, state)
+
+            return
+
+        disconnect, progress = state.nextSteps(config, contours, x, y)
+        text, offsets = on_new_position.render({"x": x, "y": y})
+
+        events = np.flatnonzero(disconnect | (progress >= 0))
+        event_disconnect = disconnect[events].tolist()
+        event_progress = progress[events].tolist()
+        events = events.tolist()
+
+        on_contour_begin = self.templates["on_contour_begin"]
+        on_disconnect = self.templates["on_disconnect"]
+        on_update_progress = self.templates["on_update_progress"]
+        on_contour_end = self.templates["on_contour_end"].render()
+
+        pieces = list[str]()
+        event_index = 0
+        step_start = 0
+
+        for contour in contours:
+            pieces.append(on_contour_begin.render(
+                speed=config.speed if contour.movement_speed is None else contour.movement_speed,
+                tool_paint=contour.tool_id
+            ))
+
+            step_end = step_start + len(contour.x_positions)
+            cursor = offsets[step_start]
+
+            while event_index < len(events) and (step := events[event_index]) < step_end:
+                if event_disconnect[event_index]:
+                    pieces.append(text[cursor:offsets[step]])
+                    pieces.append(on_disconnect.render(
+                        tool_paint=contour.tool_id,
+                        tool_none=config.tool_none,
+                        tool_change_duration_ms=config.tool_change_duration_ms,
+                        x=int(x[step]),
+                        y=int(y[step])
+                    ))
+                    cursor = offsets[step + 1]
+
+                if (current_progress := event_progress[event_index]) >= 0:
+                    pieces.append(text[cursor:offsets[step + 1]])
+                    pieces.append(on_update_progress.render(progress=current_progress))
+                    cursor = offsets[step + 1]
+
+                event_index += 1
+
+            pieces.append(text[cursor:offsets[step_end]])
+            pieces.append(on_contour_end)
+            step_start = step_end
+
+        out.write("".join(pieces))
 
     def run(self, stream: TextIO, config: Settings, contours: Sequence[Trajectory]) -> None:
         status = State(contours, config)
 
-        stream.write(self.setup)
+        with ChunkedTextWriter(stream, self.BUFFER_SIZE) as out:
+            out.write(self.setup)
 
-        stream.write(self.start.format(
-            speed=config.speed,
-            tool_none=config.tool_none
-        ))
+            out.write(self.templates["start"].render(
+                speed=config.speed,
+                tool_none=config.tool_none
+            ))
 
-        for contour in contours:
-            self.__processTrajectory(stream, config, contour, status)
+            if (on_new_position := self.templates["on_new_position"].getStepTemplate()) is None:
+                for contour in contours:
+                    self.__processTrajectory(out, config, contour, status)
 
-        stream.write(self.end.format(
-            end_speed=config.end_speed,
-            tool_none=config.tool_none
-        ))
+            else:
+                for chunk in self.__splitChunks(contours):
+                    self.__processChunk(out, config, chunk, status, on_new_position)
+
+            out.write(self.templates["end"].render(
+                end_speed=config.end_speed,
+                tool_none=config.tool_none
+            ))
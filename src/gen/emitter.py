@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from struct import error
+from typing import BinaryIO
+from typing import Iterable
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+
+from bytelang.bytecode.abc import CodeInstruction
+from bytelang.bytecode.abc import ProgramData
+from bytelang.bytecode.abc import StatementType
+from bytelang.bytecode.impl.gen import CodeGenerator as ByteCodeGenerator
+from bytelang.bytecode.impl.optimizer import PeepholeOptimizer
+from bytelang.bytecode.impl.writter import ByteCodeWriter
+from bytelang.content.impl.primitives import PrimitiveType
+from bytelang.core.handlers.errors import BasicErrorHandler
+from bytelang.core.handlers.errors import ErrorHandler
+from bytelang.core.handlers.errors import ErrorLimitReached
+from bytelang.core.profiler import CompilePhase
+from bytelang.core.profiler import CompileProfiler
+from bytelang.main import ByteLang
+from bytelang.parsers.impl.statement import StatementParser
+from bytelang.results.abc import CompileResult
+from bytelang.results.impl import CompileResultError
+from bytelang.results.impl import CompileResultOK
+from bytelang.utils import LogFlag
+from gen.code import CodeGenerator
+from gen.code import State
+from gen.settings import Settings
+from gen.trajectory import Trajectory
+from tools.string import FixedStringIO
+
+
+@dataclass(frozen=True, kw_only=True)
+class InstructionTemplate:
+    """Шаблон инструкции кода с подстановками"""
+
+    instruction: CodeInstruction
+    """Инструкция, скомпилированная с нулевыми значениями подстановок"""
+    placeholders: tuple[tuple[int, str, PrimitiveType], ...]
+    """Индекс аргумента, имя подставляемого в него значения и его тип"""
+
+    def render(self, address: int, values: Mapping[str, int]) -> CodeInstruction:
+        arguments = list(self.instruction.arguments)
+
+        for i, key, primitive in self.placeholders:
+            arguments[i] = primitive.check(values[key])
+
+        return CodeInstruction(instruction=self.instruction.instruction, arguments=tuple(arguments), address=address)
+
+
+class ByteCodeEmitter:
+    """
+    Генератор байт-кода напрямую из траекторий.
+    Шаблоны кода компилируются однократно, при генерации в них подставляются только значения
+    """
+
+    @classmethod
+    def load(cls, code_generator: CodeGenerator, bytelang: ByteLang) -> ByteCodeEmitter:
+        """
+        Скомпилировать шаблоны генератора кода в окружении, выбранном кодом настройки
+        :param code_generator: Генератор текстового кода (источник шаблонов)
+        :param bytelang: Конфигурация ByteLang
+        :return: Генератор байт-кода
+        """
+        setup_instructions, program_data = cls.__compile(bytelang, code_generator.setup)
+
+        templates = {
+            name: cls.__compileTemplate(bytelang, code_generator, name)
+            for name in CodeGenerator.EVENT_KEYS
+        }
+
+        return ByteCodeEmitter(program_data, setup_instructions, templates)
+
+    @staticmethod
+    def __compile(bytelang: ByteLang, source: str) -> tuple[tuple[CodeInstruction, ...], ProgramData]:
+        errors_handler = ErrorHandler()
+        statements = StatementParser(errors_handler).run(FixedStringIO(source))
+        instructions, program_data = ByteCodeGenerator(errors_handler, bytelang.getEnvironmentsRegistry(), bytelang.getPrimitivesRegistry()).run(statements)
+
+        if not errors_handler.isSuccess() or program_data is None:
+            raise ValueError(errors_handler.getLog())
+
+        return instructions, program_data
+
+    @classmethod
+    def __compileTemplate(cls, bytelang: ByteLang, code_generator: CodeGenerator, name: str) -> tuple[InstructionTemplate, ...]:
+        template = code_generator.templates[name]
+        used_keys = template.getKeys()
+
+        body = template.render(**{key: key for key in used_keys})
+        statements = tuple(StatementParser(ErrorHandler()).run(FixedStringIO(body)))
+
+        for statement in statements:
+            if statement.type is not StatementType.INSTRUCTION_CALL:
+                raise ValueError(f"Template {name}: {statement.type.name} is not supported in direct mode ('{statement.line}')")
+
+        defines = "".join(f"\n.def {key} 0" for key in used_keys)
+        setup_instructions, _ = cls.__compile(bytelang, f"{code_generator.setup}{defines}\n{body}")
+        instructions = setup_instructions[-len(statements):] if statements else ()
+
+        return tuple(
+            InstructionTemplate(
+                instruction=instruction,
+                placeholders=tuple(
+                    (i, argument.identifier, instruction.instruction.arguments[i].primitive_type)
+                    for i, argument in enumerate(statement.arguments)
+                    if argument.identifier in used_keys
+                )
+            )
+            for statement, instruction in zip(statements, instructions)
+        )
+
+    def __init__(self, program_data: ProgramData, setup: tuple[CodeInstruction, ...], templates: dict[str, tuple[InstructionTemplate, ...]]) -> None:
+        self.__program_data = program_data
+        self.__setup = setup
+        self.__templates = templates
+
+        self.__err: Optional[BasicErrorHandler] = None
+        self.__address: int = 0
+
+    def __emit(self, name: str, **values: int) -> Iterable[CodeInstruction]:
+        for template in self.__templates[name]:
+            try:
+                instruction = template.render(self.__address, values)
+
+            except error as e:
+                self.__err.write(f"Не удалось выполнить преобразование: {e} in {name} {values}")
+                continue
+
+            self.__address += instruction.instruction.size
+            yield instruction
+
+    def __processTrajectory(self, config: Settings, trajectory: Trajectory, state: State) -> Iterable[CodeInstruction]:
+        paint_move_speed = config.speed if trajectory.movement_speed is None else trajectory.movement_speed
+
+        yield from self.__emit("on_contour_begin", speed=paint_move_speed, tool_paint=trajectory.tool_id)
+
+        for step_index, (x, y) in enumerate(zip(trajectory.x_positions, trajectory.y_positions)):
+            if state.nextStep(config, trajectory, step_index, x, y):
+                yield from self.__emit(
+                    "on_disconnect",
+                    tool_paint=trajectory.tool_id,
+                    tool_none=config.tool_none,
+                    tool_change_duration_ms=config.tool_change_duration_ms,
+                    x=x,
+                    y=y
+                )
+            else:
+                yield from self.__emit("on_new_position", x=x, y=y)
+
+            if (current_progress := state.nextProgress()) is not None:
+                yield from self.__emit("on_update_progress", progress=current_progress)
+
+        yield from self.__emit("on_contour_end")
+
+    def generate(self, error_handler: BasicErrorHandler, config: Settings, contours: Sequence[Trajectory]) -> Iterable[CodeInstruction]:
+        """
+        Сгенерировать инструкции кода для траекторий
+        :param error_handler: Обработчик ошибок преобразования значений
+        :param config: Настройки генерации
+        :param contours: Траектории
+        :return: Инструкции кода в порядке расположения в программе
+        """
+        self.__err = error_handler.getChild(self.__class__.__name__)
+        self.__address = self.__program_data.start_address + sum(ins.instruction.size for ins in self.__setup)
+
+        state = State(contours, config)
+
+        yield from self.__setup
+        yield from self.__emit("start", speed=config.speed, tool_none=config.tool_none)
+
+        for contour in contours:
+            yield from self.__processTrajectory(config, contour, state)
+
+        yield from self.__emit("end", end_speed=config.end_speed, tool_none=config.tool_none)
+
+    def run(self, config: Settings, contours: Sequence[Trajectory], bytecode_stream: BinaryIO, log_flags: LogFlag = LogFlag.ALL, *, optimize: bool = False, max_errors: Optional[int] = None) -> CompileResult:
+        """
+        Сгенерировать и записать байт-код траекторий
+        :param config: Настройки генерации
+        :param contours: Траектории
+        :param bytecode_stream: Выход байт-кода
+        :param log_flags: Уровень отображения сообщения компиляции
+        :param optimize: Удалить избыточные инструкции
+        :param max_errors: Предел количества ошибок, после которого генерация прерывается
+        :return: Результат компиляции
+        """
+        errors_handler = ErrorHandler(max_errors)
+        source_stream = FixedStringIO()
+
+        with CompileProfiler(log_flags) as profiler:
+            try:
+                return self.__run(config, contours, bytecode_stream, log_flags, optimize, profiler, errors_handler, source_stream)
+
+            except ErrorLimitReached:
+                return CompileResultError(source_stream, bytecode_stream, errors_handler)
+
+    def __run(self, config: Settings, contours: Sequence[Trajectory], bytecode_stream: BinaryIO, log_flags: LogFlag, optimize: bool, profiler: CompileProfiler, errors_handler: ErrorHandler, source_stream: FixedStringIO) -> CompileResult:
+        start_time = time.perf_counter()
+
+        error_result = CompileResultError(source_stream, bytecode_stream, errors_handler)
+
+        optimizer = PeepholeOptimizer(errors_handler, lambda: len(self.__program_data.marks) > 0, lambda: self.__program_data.environment)
+        instructions = profiler.measure(CompilePhase.CODEGEN, self.generate(errors_handler, config, contours))
+
+        if optimize:
+            instructions = profiler.measure(CompilePhase.OPTIMIZE, optimizer.run(instructions))
+
+        instructions = tuple(instructions)
+
+        if not errors_handler.isSuccess():
+            return error_result
+
+        with profiler.phase(CompilePhase.WRITE):
+            program_size = ByteCodeWriter(errors_handler).run(profiler.count(instructions), self.__program_data, bytecode_stream)
+
+        if not errors_handler.isSuccess():
+            return error_result
+
+        compilation_time_seconds = time.perf_counter() - start_time
+
+        return CompileResultOK(
+            source_stream, bytecode_stream, log_flags, tuple(), instructions, self.__program_data, program_size, compilation_time_seconds, 0, len(instructions), optimizer.getBytesSaved(),
+            profiler.getStatistics()
+        )
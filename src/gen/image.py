@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Final
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+
+import cv2
+import numpy as np
+
+from gen.trajectory import PositionFormat
+from gen.trajectory import Trajectory
+from tools.filetool import AnyPath
+
+type Rect = tuple[int, int, int, int]
+"""Прямоугольник пикселей (left, top, right, bottom), правая и нижняя границы не включаются"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class EdgeSettings:
+    """Настройки выделения границ"""
+
+    low_threshold: int = 50
+    """Нижний порог гистерезиса cv2.Canny"""
+    high_threshold: int = 150
+    """Верхний порог гистерезиса cv2.Canny"""
+    blur_size: int = 3
+    """Размер ядра размытия перед выделением границ (нечётный, 0 - без размытия)"""
+    min_area: int = 8
+    """Наименьшее количество пикселей связной границы (меньшие - шум)"""
+    min_length: int = 4
+    """
+    Наименьшее количество пикселей ломаной после склейки. Короче - обрывки, соседствующие с серединой другой ломаной:
+    их не к чему приклеить, а каждый стал бы отдельным контуром
+    """
+
+
+@dataclass(frozen=True, kw_only=True)
+class PixelPolylines:
+    """Ломаные пикселей, хранящиеся подряд в одном массиве"""
+
+    points: np.ndarray
+    """Точки (x, y) всех ломаных, форма (n, 2)"""
+    bounds: np.ndarray
+    """Начала ломаных в points и общее количество точек в конце"""
+
+    @classmethod
+    def empty(cls) -> PixelPolylines:
+        return cls(points=np.zeros((0, 2), dtype=np.int64), bounds=np.zeros(1, dtype=np.int64))
+
+    @classmethod
+    def concatenate(cls, parts: Sequence[PixelPolylines]) -> PixelPolylines:
+        if len(parts) == 0:
+            return cls.empty()
+
+        offsets = np.cumsum([0] + [len(part.points) for part in parts[:-1]])
+        return cls(
+            points=np.concatenate(tuple(part.points for part in parts)),
+            bounds=np.concatenate((*(part.bounds[:-1] + offset for part, offset in zip(parts, offsets)), (sum(len(part.points) for part in parts),)))
+        )
+
+    def __len__(self) -> int:
+        return len(self.bounds) - 1
+
+    def getFirst(self) -> np.ndarray:
+        return self.points[self.bounds[:-1]]
+
+    def getLast(self) -> np.ndarray:
+        return self.points[self.bounds[1:] - 1]
+
+    def withMinLength(self, min_length: int) -> PixelPolylines:
+        """Ломаные не короче min_length точек"""
+        pieces = np.flatnonzero(np.diff(self.bounds) >= min_length)
+        return self.reorder(pieces, np.zeros(len(pieces), dtype=np.bool_), np.arange(len(pieces)))
+
+    def reorder(self, pieces: Sequence[int], reversed_pieces: Sequence[bool], chain_starts: Sequence[int]) -> PixelPolylines:
+        """
+        Собрать ломаные из цепочек имеющихся
+        :param pieces: Номера ломаных в порядке следования
+        :param reversed_pieces: Ломаная проходится в обратном направлении
+        :param chain_starts: Начала новых ломаных в pieces
+        """
+        pieces = np.asarray(pieces, dtype=np.int64)
+        begin = self.bounds[pieces]
+        end = self.bounds[pieces + 1]
+        lengths = end - begin
+
+        piece_offsets = np.zeros(len(pieces) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=piece_offsets[1:])
+
+        step = np.arange(piece_offsets[-1]) - np.repeat(piece_offsets[:-1], lengths)
+        index = np.where(np.repeat(np.asarray(reversed_pieces, dtype=np.bool_), lengths), np.repeat(end - 1, lengths) - step, np.repeat(begin, lengths) + step)
+
+        return PixelPolylines(points=self.points[index], bounds=np.append(piece_offsets[np.asarray(chain_starts, dtype=np.int64)], piece_offsets[-1]))
+
+
+class PolylineStitcher:
+    """
+    Склейка ломаных пикселей, концы которых соседствуют (8-связность).
+    Пары концов выбираются раундами: свободный конец предлагает пару соседнему свободному концу с наименьшим номером,
+    взаимные предложения принимаются. Наименьший свободный конец, имеющий соседей, всегда получает пару, поэтому раунды сходятся
+    """
+
+    NEIGHBORS: Final[tuple[tuple[int, int], ...]] = tuple((dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx != 0 or dy != 0)
+
+    @classmethod
+    def run(cls, polylines: PixelPolylines, seam_columns: Optional[Sequence[int]] = None, seam_rows: Optional[Sequence[int]] = None) -> PixelPolylines:
+        """
+        Склеить ломаные
+        :param seam_columns: Столбцы швов. Если заданы, склеиваются только концы на швах
+        :param seam_rows: Строки швов
+        """
+        if len(polylines) < 2:
+            return polylines
+
+        # Концы: 2 * номер ломаной - начало, 2 * номер ломаной + 1 - конец
+        ends = np.empty((2 * len(polylines), 2), dtype=np.int64)
+        ends[0::2] = polylines.getFirst()
+        ends[1::2] = polylines.getLast()
+
+        eligible = np.ones(len(ends), dtype=np.bool_)
+
+        if seam_columns is not None:
+            eligible = np.isin(ends[:, 0], seam_columns) | np.isin(ends[:, 1], seam_rows)
+
+        x = ends[:, 0] - ends[:, 0].min() + 1
+        y = ends[:, 1] - ends[:, 1].min() + 1
+        stride = int(x.max()) + 2
+
+        keys = np.where(eligible, y * stride + x, -1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        index = np.arange(len(ends))
+        none = len(ends)
+        neighbors = list[np.ndarray]()
+        """Соседний конец другой ломаной по каждому направлению (none, если его нет)"""
+
+        for dx, dy in cls.NEIGHBORS:
+            neighbor_keys = keys + dy * stride + dx
+            position = np.minimum(np.searchsorted(sorted_keys, neighbor_keys), len(ends) - 1)
+            other = order[position]
+            neighbors.append(np.where(eligible & (sorted_keys[position] == neighbor_keys) & (other >> 1 != index >> 1), other, none))
+
+        pair = np.full(len(ends) + 1, -1, dtype=np.int64)
+
+        while True:
+            free = pair[:-1] < 0
+            free_or_none = np.append(free, False)
+            proposal = np.full(len(ends), none, dtype=np.int64)
+
+            for other in neighbors:
+                proposal = np.where(free & free_or_none[other], np.minimum(proposal, other), proposal)
+
+            proposed = np.flatnonzero(proposal < none)
+            mutual = proposed[proposal[proposal[proposed]] == proposed]
+
+            if len(mutual) == 0:
+                break
+
+            pair[mutual] = proposal[mutual]
+
+        return cls.__collect(polylines, pair[:-1].tolist())
+
+    @staticmethod
+    def __collect(polylines: PixelPolylines, pair: list[int]) -> PixelPolylines:
+        """Собрать цепочки: сначала начинающиеся свободным концом, затем замкнутые"""
+        pieces = list[int]()
+        reversed_pieces = list[bool]()
+        chain_starts = list[int]()
+        visited = [False] * len(polylines)
+
+        for start in (*(end for end in range(len(pair)) if pair[end] < 0), *range(0, len(pair), 2)):
+            if visited[start >> 1]:
+                continue
+
+            chain_starts.append(len(pieces))
+            end = start
+
+            while end >= 0 and not visited[end >> 1]:
+                visited[end >> 1] = True
+                pieces.append(end >> 1)
+                reversed_pieces.append(end & 1 == 1)
+                end = pair[end ^ 1]
+
+        return polylines.reorder(pieces, reversed_pieces, chain_starts)
+
+
+def _findPolylines(edges: np.ndarray, offset: tuple[int, int]) -> PixelPolylines:
+    """
+    Ломаные пикселей границ. Контур cv2.findContours тонкой линии проходит её туда и обратно,
+    поэтому из контуров берутся только участки ещё не пройденных пикселей
+    """
+    contours, _ = cv2.findContours(edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+
+    if len(contours) == 0:
+        return PixelPolylines.empty()
+
+    lengths = np.fromiter((len(contour) for contour in contours), dtype=np.int64, count=len(contours))
+    points = np.concatenate(contours).reshape(-1, 2).astype(np.int64)
+    contour_index = np.repeat(np.arange(len(contours)), lengths)
+
+    first = np.unique(points[:, 1] * edges.shape[1] + points[:, 0], return_index=True)[1]
+    new = np.zeros(len(points), dtype=np.bool_)
+    new[first] = True
+
+    begin = new.copy()
+    begin[1:] &= ~new[:-1] | (contour_index[1:] != contour_index[:-1])
+
+    selected = np.flatnonzero(new)
+    polylines = PixelPolylines(points=points[selected] + offset, bounds=np.append(np.flatnonzero(begin[selected]), len(selected)))
+    return PolylineStitcher.run(polylines)
+
+
+def _traceTile(image: np.ndarray, origin: tuple[int, int], core: Rect, edge_settings: EdgeSettings) -> PixelPolylines:
+    """
+    Ломаные границ плитки
+    :param image: Плитка с перекрытием
+    :param origin: Положение плитки в изображении
+    :param core: Область изображения, за которую отвечает плитка (границы в перекрытии отбрасываются)
+    """
+    if edge_settings.blur_size > 1:
+        image = cv2.GaussianBlur(image, (edge_settings.blur_size, edge_settings.blur_size), 0)
+
+    edges = cv2.Canny(image, edge_settings.low_threshold, edge_settings.high_threshold)
+
+    if edge_settings.min_area > 1:
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(edges, connectivity=8)
+        edges[stats[labels, cv2.CC_STAT_AREA] < edge_settings.min_area] = 0
+
+    left, top, right, bottom = core
+    core_edges = np.ascontiguousarray(edges[top - origin[1]:bottom - origin[1], left - origin[0]:right - origin[0]])
+
+    return _findPolylines(core_edges, (left, top))
+
+
+@dataclass(frozen=True, kw_only=True)
+class TracingResult:
+    """Результат преобразования изображения в траектории"""
+
+    trajectories: tuple[Trajectory, ...]
+    """Траектории в координатах рабочей области"""
+    image_size: tuple[int, int]
+    """Ширина и высота изображения (пиксели)"""
+    scale: float
+    """Единиц станка на пиксель"""
+    tiles: int
+    """Количество плиток"""
+    workers: int
+    """Количество процессов"""
+    seconds: float
+    """Длительность преобразования"""
+
+    def getPointsCount(self) -> int:
+        return sum(len(trajectory.x_positions) for trajectory in self.trajectories)
+
+    def __str__(self) -> str:
+        width, height = self.image_size
+        return f"{width}x{height} px, {self.tiles} tiles, {self.workers} workers : {len(self.trajectories)} contours, {self.getPointsCount()} points, {self.seconds:.3f} s"
+
+
+@dataclass(frozen=True, kw_only=True)
+class ImageTracer:
+    """
+    Преобразование изображения в траектории: границы (cv2.Canny) -> ломаные пикселей -> траектории рабочей области.
+    Большое изображение делится на перекрывающиеся плитки, обрабатываемые в пуле процессов.
+    Перекрытие даёт выделению границ окрестность, ломаные плиток склеиваются на швах
+    """
+
+    work_area: tuple[int, int]
+    """Ширина и высота рабочей области (единицы станка, центр - начало координат). Изображение вписывается с сохранением пропорций"""
+    tool_id: int
+    """Инструмент траекторий"""
+    edge_settings: EdgeSettings = EdgeSettings()
+    """Настройки выделения границ"""
+    tile_size: int = 2048
+    """Сторона плитки без перекрытия (пиксели)"""
+    tile_overlap: int = 16
+    """Перекрытие плиток (пиксели)"""
+    workers: Optional[int] = None
+    """Количество процессов (по умолчанию - по числу ядер). 1 - обработка в текущем процессе"""
+    position_format: PositionFormat = PositionFormat.I16
+    """Тип столбцов и допустимые координаты траекторий"""
+
+    @staticmethod
+    def loadImage(path: AnyPath) -> np.ndarray:
+        """
+        Загрузить изображение в оттенках серого (путь может содержать не-ASCII символы)
+        :raises ValueError: Файл не является изображением
+        """
+        image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+
+        if image is None:
+            raise ValueError(f"Не удалось прочитать изображение: {path}")
+
+        return image
+
+    def run(self, path: AnyPath) -> TracingResult:
+        """Преобразовать файл изображения в траектории"""
+        return self.trace(self.loadImage(path))
+
+    def trace(self, image: np.ndarray) -> TracingResult:
+        """Преобразовать изображение (оттенки серого, uint8) в траектории"""
+        start_time = time.perf_counter()
+
+        height, width = image.shape[:2]
+        cores = tuple(self.__getCores(width, height))
+        workers = min((os.cpu_count() or 1) if self.workers is None else max(1, self.workers), len(cores))
+
+        if workers == 1:
+            parts = tuple(_traceTile(*self.__getTile(image, core), core, self.edge_settings) for core in cores)
+
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = tuple(executor.submit(_traceTile, *self.__getTile(image, core), core, self.edge_settings) for core in cores)
+                parts = tuple(future.result() for future in futures)
+
+        polylines = PixelPolylines.concatenate(parts)
+
+        if len(cores) > 1:
+            seam_columns = sorted(set(x for left, _, right, _ in cores for x in (left - 1, left, right - 1, right) if 0 < x < width - 1))
+            seam_rows = sorted(set(y for _, top, _, bottom in cores for y in (top - 1, top, bottom - 1, bottom) if 0 < y < height - 1))
+            polylines = PolylineStitcher.run(polylines, seam_columns, seam_rows)
+
+        if self.edge_settings.min_length > 1:
+            polylines = polylines.withMinLength(self.edge_settings.min_length)
+
+        scale = min(self.work_area[0] / width, self.work_area[1] / height)
+
+        return TracingResult(
+            trajectories=self.__toTrajectories(polylines, width, height, scale),
+            image_size=(width, height),
+            scale=scale,
+            tiles=len(cores),
+            workers=workers,
+            seconds=time.perf_counter() - start_time
+        )
+
+    def __getCores(self, width: int, height: int) -> Iterable[Rect]:
+        columns = math.ceil(width / self.tile_size)
+        rows = math.ceil(height / self.tile_size)
+
+        for row in range(rows):
+            for column in range(columns):
+                left = column * self.tile_size
+                top = row * self.tile_size
+                yield left, top, min(left + self.tile_size, width), min(top + self.tile_size, height)
+
+    def __getTile(self, image: np.ndarray, core: Rect) -> tuple[np.ndarray, tuple[int, int]]:
+        """Плитка с перекрытием и её положение"""
+        left, top, right, bottom = core
+        height, width = image.shape[:2]
+
+        left = max(left - self.tile_overlap, 0)
+        top = max(top - self.tile_overlap, 0)
+        right = min(right + self.tile_overlap, width)
+        bottom = min(bottom + self.tile_overlap, height)
+
+        return np.ascontiguousarray(image[top:bottom, left:right]), (left, top)
+
+    def __toTrajectories(self, polylines: PixelPolylines, width: int, height: int, scale: float) -> tuple[Trajectory, ...]:
+        """Перевести ломаные пикселей в координаты рабочей области (ось Y - вверх), совпадающие соседние точки удаляются"""
+        x = np.rint((polylines.points[:, 0] - width / 2) * scale).astype(np.int64)
+        y = np.rint((height / 2 - polylines.points[:, 1]) * scale).astype(np.int64)
+
+        keep = np.ones(len(x), dtype=np.bool_)
+        keep[1:] = (x[1:] != x[:-1]) | (y[1:] != y[:-1])
+        keep[polylines.bounds[:-1]] = True
+
+        bounds = (np.cumsum(keep) - keep)[polylines.bounds[:-1]].tolist() + [int(keep.sum())]
+
+        x_column = self.position_format.pack(x[keep], self.position_format.x_range, "X")
+        y_column = self.position_format.pack(y[keep], self.position_format.y_range, "Y")
+
+        return tuple(
+            Trajectory(x_positions=x_column[begin:end], y_positions=y_column[begin:end], tool_id=self.tool_id)
+            for begin, end in zip(bounds[:-1], bounds[1:])
+        )
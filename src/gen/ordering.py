@@ -0,0 +1,521 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import ClassVar
+from typing import Final
+from typing import Iterable
+from typing import Sequence
+
+import numpy as np
+
+from gen.trajectory import Trajectory
+
+
+class PointGrid:
+    """
+    Равномерная сетка точек: поиск ближайшей оставшейся точки с удалением найденных.
+    Когда точек остаётся мало, сетка перестраивается по оставшимся точкам, чтобы поиск не обходил пустые ячейки
+    """
+
+    POINTS_PER_CELL: Final[int] = 2
+    """Среднее количество точек в ячейке"""
+    REBUILD_RATIO: Final[int] = 4
+    """Сетка перестраивается, когда точек остаётся в REBUILD_RATIO раз меньше, чем при построении"""
+
+    def __init__(self, x: np.ndarray, y: np.ndarray) -> None:
+        self.__x = x.astype(np.float64)
+        self.__y = y.astype(np.float64)
+        self.__xs: list[float] = self.__x.tolist()
+        self.__ys: list[float] = self.__y.tolist()
+
+        self.__alive = [True] * len(x)
+        self.__alive_count: int = len(x)
+
+        self.__build(np.arange(len(x)))
+
+    def getAliveCount(self) -> int:
+        return self.__alive_count
+
+    def remove(self, point: int) -> None:
+        """Удалить точку из поиска"""
+        if not self.__alive[point]:
+            return
+
+        self.__alive[point] = False
+        self.__alive_count -= 1
+        self.__cell_count[self.__getCell(self.__xs[point], self.__ys[point])] -= 1
+
+    def nearest(self, x: float, y: float) -> int:
+        """
+        Ближайшая оставшаяся точка (из равноудалённых - первая по порядку обхода ячеек)
+        :return: Индекс точки или -1, если точек не осталось
+        """
+        if self.__alive_count == 0:
+            return -1
+
+        if self.__alive_count * self.REBUILD_RATIO < self.__built_count:
+            self.__build(np.flatnonzero(self.__alive))
+
+        cell = self.__cell
+        columns = self.__columns
+        rows = self.__rows
+
+        cx = math.floor((x - self.__left) / cell)
+        cy = math.floor((y - self.__bottom) / cell)
+
+        xs = self.__xs
+        ys = self.__ys
+        alive = self.__alive
+        ids = self.__ids
+        cell_start = self.__cell_start
+        cell_count = self.__cell_count
+
+        best = -1
+        best_distance = math.inf
+
+        # Точки ячеек кольца r удалены от (x, y) не меньше чем на (r - 1) * cell
+        for r in range(max(0, -cx, cx - columns + 1, -cy, cy - rows + 1), max(cx, columns - 1 - cx, cy, rows - 1 - cy) + 1):
+            if best >= 0 and best_distance <= ((r - 1) * cell) ** 2:
+                break
+
+            for k in self.__getRing(cx, cy, r):
+                if cell_count[k] == 0:
+                    continue
+
+                for point in ids[cell_start[k]:cell_start[k + 1]]:
+                    if alive[point] and (distance := (xs[point] - x) ** 2 + (ys[point] - y) ** 2) < best_distance:
+                        best = point
+                        best_distance = distance
+
+        return best
+
+    def __getRing(self, cx: int, cy: int, r: int) -> Iterable[int]:
+        """Ячейки сетки на расстоянии r (по Чебышёву) от ячейки (cx, cy)"""
+        columns = self.__columns
+        rows = self.__rows
+
+        if r == 0:
+            yield cy * columns + cx
+            return
+
+        left = max(cx - r, 0)
+        right = min(cx + r, columns - 1)
+
+        for j in (cy - r, cy + r):
+            if 0 <= j < rows:
+                yield from range(j * columns + left, j * columns + right + 1)
+
+        for i in (cx - r, cx + r):
+            if 0 <= i < columns:
+                yield from range(max(cy - r + 1, 0) * columns + i, min(cy + r - 1, rows - 1) * columns + i + 1, columns)
+
+    def __getCell(self, x: float, y: float) -> int:
+        return math.floor((y - self.__bottom) / self.__cell) * self.__columns + math.floor((x - self.__left) / self.__cell)
+
+    def __build(self, points: np.ndarray) -> None:
+        x = self.__x[points]
+        y = self.__y[points]
+
+        self.__left = float(x.min())
+        self.__bottom = float(y.min())
+        width = float(x.max()) - self.__left
+        height = float(y.max()) - self.__bottom
+
+        self.__cell = max(math.sqrt(max(width, 1) * max(height, 1) * self.POINTS_PER_CELL / len(points)), 1.0)
+        self.__columns = math.floor(width / self.__cell) + 1
+        self.__rows = math.floor(height / self.__cell) + 1
+
+        cells = np.floor((y - self.__bottom) / self.__cell).astype(np.int64) * self.__columns + np.floor((x - self.__left) / self.__cell).astype(np.int64)
+        order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.__columns * self.__rows)
+
+        cell_start = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=cell_start[1:])
+
+        self.__ids: list[int] = points[order].tolist()
+        self.__cell_start: list[int] = cell_start.tolist()
+        self.__cell_count: list[int] = counts.tolist()
+        self.__built_count = len(points)
+
+
+@dataclass(frozen=True, kw_only=True)
+class OrderReport:
+    """Результат упорядочивания траекторий"""
+
+    contours: int
+    """Количество траекторий"""
+    reversed: int
+    """Количество траекторий, проходимых в обратном направлении"""
+    travel_before: float
+    """Длина холостых переездов до упорядочивания (единицы станка)"""
+    travel_after: float
+    """Длина холостых переездов после упорядочивания"""
+
+    def getSaved(self) -> float:
+        return self.travel_before - self.travel_after
+
+    def getSavedRatio(self) -> float:
+        """Доля сэкономленных переездов"""
+        return self.getSaved() / self.travel_before if self.travel_before > 0 else 0
+
+    def __str__(self) -> str:
+        return f"{self.contours} contours ({self.reversed} reversed) : travel {self.travel_before:.0f} -> {self.travel_after:.0f} (-{self.getSavedRatio():.1%})"
+
+
+@dataclass(frozen=True, kw_only=True)
+class ContourOrderer:
+    """
+    Упорядочивание траекторий для сокращения холостых переездов между ними (каждый - разрыв со сменой инструмента).
+    Начальный порядок - ближайший сосед от начала координат (поиск по сетке), затем улучшение 2-opt и Or-opt
+    по спискам ближайших концов траекторий. Пустые траектории переносятся в конец
+    """
+
+    allow_reverse: bool = True
+    """Разрешено проходить траекторию в обратном направлении (без этого 2-opt не применяется)"""
+    neighbors: int = 6
+    """Количество ближайших концов траекторий, рассматриваемых для улучшения"""
+    max_checks: int = 3
+    """Наибольшее количество проверок улучшения на траекторию (повторно траектория проверяется после изменения соседних рёбер)"""
+    max_window: int = 1000
+    """Наибольшее количество траекторий, переставляемых одним улучшением"""
+
+    OR_OPT_LENGTHS: ClassVar[tuple[int, ...]] = (1, 2, 3)
+    """Длины переносимых Or-opt цепочек траекторий"""
+    MORTON_WINDOW: ClassVar[int] = 8
+    """Количество соседей в порядке кривой Мортона, из которых выбираются ближайшие концы"""
+    MORTON_BITS: ClassVar[int] = 15
+    """Разрядность координат для кода Мортона"""
+    EPSILON: ClassVar[float] = 1e-9
+    """Наименьшее учитываемое улучшение"""
+
+    @staticmethod
+    def getTravel(contours: Iterable[Trajectory]) -> float:
+        """Длина холостых переездов: от начала координат к первой траектории и между траекториями"""
+        last_x = 0
+        last_y = 0
+        ret = 0.0
+
+        for contour in contours:
+            if len(contour.x_positions) == 0:
+                continue
+
+            ret += math.hypot(contour.x_positions[0] - last_x, contour.y_positions[0] - last_y)
+            last_x = contour.x_positions[-1]
+            last_y = contour.y_positions[-1]
+
+        return ret
+
+    def run(self, contours: Sequence[Trajectory]) -> tuple[tuple[Trajectory, ...], OrderReport]:
+        """
+        Упорядочить траектории
+        :return: Траектории в новом порядке (обращённые - с обращёнными столбцами) и отчёт
+        """
+        drawn = tuple(contour for contour in contours if len(contour.x_positions) > 0)
+        empty = tuple(contour for contour in contours if len(contour.x_positions) == 0)
+
+        if len(drawn) < 2:
+            tour = list(range(0, 2 * len(drawn), 2))
+
+        else:
+            x = np.array([(contour.x_positions[0], contour.x_positions[-1]) for contour in drawn], dtype=np.float64).ravel()
+            y = np.array([(contour.y_positions[0], contour.y_positions[-1]) for contour in drawn], dtype=np.float64).ravel()
+
+            tour = self.__getNearestNeighbourTour(x, y)
+
+            if self.max_checks > 0:
+                self.__improve(tour, x, y)
+
+        ret = list[Trajectory]()
+
+        for u in tour:
+            contour = drawn[u >> 1]
+
+            if u & 1:
+                contour = Trajectory(x_positions=contour.x_positions[::-1], y_positions=contour.y_positions[::-1], tool_id=contour.tool_id, movement_speed=contour.movement_speed)
+
+            ret.append(contour)
+
+        ret.extend(empty)
+
+        return tuple(ret), OrderReport(
+            contours=len(ret),
+            reversed=sum(u & 1 for u in tour),
+            travel_before=self.getTravel(contours),
+            travel_after=self.getTravel(ret)
+        )
+
+    # Траектория i имеет концы 2i (начало) и 2i + 1 (конец).
+    # Элемент порядка u = 2i + обращена: вход в траекторию - конец u, выход - конец u ^ 1
+
+    def __getNearestNeighbourTour(self, x: np.ndarray, y: np.ndarray) -> list[int]:
+        if self.allow_reverse:
+            grid = PointGrid(x, y)
+
+        else:
+            grid = PointGrid(x[0::2], y[0::2])
+
+        xs: list[float] = x.tolist()
+        ys: list[float] = y.tolist()
+
+        tour = list[int]()
+        last_x = 0.0
+        last_y = 0.0
+
+        for _ in range(len(x) // 2):
+            point = grid.nearest(last_x, last_y)
+
+            if self.allow_reverse:
+                u = point
+                grid.remove(point)
+                grid.remove(point ^ 1)
+
+            else:
+                u = 2 * point
+                grid.remove(point)
+
+            tour.append(u)
+            last_x = xs[u ^ 1]
+            last_y = ys[u ^ 1]
+
+        return tour
+
+    def __getNeighbors(self, x: np.ndarray, y: np.ndarray) -> list[list[int]]:
+        """Ближайшие концы других траекторий для каждого конца (по возрастанию расстояния), кандидаты - соседи в порядке кривой Мортона"""
+        count = len(x)
+        scale = ((1 << self.MORTON_BITS) - 1) / max(float(x.max() - x.min()), float(y.max() - y.min()), 1.0)
+        qx = ((x - x.min()) * scale).astype(np.uint64)
+        qy = ((y - y.min()) * scale).astype(np.uint64)
+
+        candidates = list[np.ndarray]()
+
+        # Второй порядок сдвинут на половину области, чтобы сгладить скачки кривой Мортона
+        for shift in (np.uint64(0), np.uint64(1 << (self.MORTON_BITS - 1))):
+            order = np.argsort(self.__getMortonCode(qx + shift, qy + shift), kind="stable")
+            rank = np.empty(count, dtype=np.int64)
+            rank[order] = np.arange(count)
+
+            for w in range(1, self.MORTON_WINDOW + 1):
+                candidates.append(order[np.clip(rank - w, 0, count - 1)])
+                candidates.append(order[np.clip(rank + w, 0, count - 1)])
+
+        points = np.arange(count)
+        target = np.stack(candidates, axis=1)
+        distance = np.hypot(x[target] - x[:, None], y[target] - y[:, None])
+        distance[(target >> 1) == (points >> 1)[:, None]] = np.inf
+
+        # Повторы кандидата оказываются рядом (кроме совпадения расстояний с другим кандидатом - тогда повтор безвреден)
+        order = np.argsort(distance, axis=1, kind="stable")
+        target = np.take_along_axis(target, order, axis=1)
+        distance = np.take_along_axis(distance, order, axis=1)
+
+        distance[:, 1:][target[:, 1:] == target[:, :-1]] = np.inf
+
+        order = np.argsort(distance, axis=1, kind="stable")[:, :self.neighbors]
+        target = np.take_along_axis(target, order, axis=1)
+        found = np.isfinite(np.take_along_axis(distance, order, axis=1)).sum(axis=1)
+
+        return [row[:n] for row, n in zip(target.tolist(), found.tolist())]
+
+    @staticmethod
+    def __getMortonCode(qx: np.ndarray, qy: np.ndarray) -> np.ndarray:
+        ret = np.zeros_like(qx)
+
+        for bit in range(16):
+            ret |= ((qx >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit)
+            ret |= ((qy >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit + 1)
+
+        return ret
+
+    def __improve(self, tour: list[int], x: np.ndarray, y: np.ndarray) -> None:
+        """
+        Улучшить порядок на месте. Ребро k - переезд от выхода траектории k - 1 (для k = 0 - от начала координат) ко входу траектории k.
+        2-opt обращает отрезок порядка, Or-opt переносит цепочку траекторий (при allow_reverse - возможно, обращённую).
+        Рассматриваются только соседи конца, более близкие, чем его текущий сосед по порядку
+        """
+        n = len(tour)
+        neighbors = self.__getNeighbors(x, y)
+
+        origin = len(x)
+        none = origin + 1
+        """Отсутствующий конец после последней траектории: переезды к нему нулевые"""
+        xs: list[float] = x.tolist() + [0.0]
+        ys: list[float] = y.tolist() + [0.0]
+
+        position = [0] * n
+
+        for k, u in enumerate(tour):
+            position[u >> 1] = k
+
+        queue = deque(u >> 1 for u in tour)
+        """Траектории, ребро входа в которые нужно проверить"""
+        queued = [True] * n
+
+        eps = self.EPSILON
+        window = self.max_window
+        reverse = self.allow_reverse
+        hypot = math.hypot
+
+        def distance(a: int, b: int) -> float:
+            return 0.0 if b == none else hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+        def exitAt(k: int) -> int:
+            return tour[k] ^ 1 if k >= 0 else origin
+
+        def entryAt(k: int) -> int:
+            return tour[k] if k < n else none
+
+        def activate(*positions: int) -> None:
+            """Поставить в очередь траектории у изменённых рёбер"""
+            for k in positions:
+                if 0 <= k < n and not queued[c := tour[k] >> 1]:
+                    queued[c] = True
+                    queue.append(c)
+
+        def reverseSegment(first: int, last: int) -> None:
+            """Обратить траектории порядка [first, last)"""
+            tour[first:last] = [u ^ 1 for u in reversed(tour[first:last])]
+
+            for k in range(first, last):
+                position[tour[k] >> 1] = k
+
+            activate(first - 1, first, last - 1, last)
+
+        def moveChain(first: int, length: int, edge: int, reversed_chain: bool) -> None:
+            """Перенести цепочку [first, first + length) на ребро edge"""
+            chain = tour[first:first + length]
+
+            if reversed_chain:
+                chain = [u ^ 1 for u in reversed(chain)]
+
+            del tour[first:first + length]
+
+            if edge > first:
+                edge -= length
+
+            tour[edge:edge] = chain
+
+            for k in range(min(first, edge), max(first, edge) + length):
+                position[tour[k] >> 1] = k
+
+            if edge < first:
+                first += length
+
+            activate(first - 1, first, edge - 1, edge, edge + length - 1, edge + length)
+
+        def twoOpt(e1: int, e2: int) -> bool:
+            """Обратить [e1, e2), если это сокращает переезды"""
+            if e1 > e2:
+                e1, e2 = e2, e1
+
+            if e1 == e2 or e2 - e1 > window:
+                return False
+
+            p1 = exitAt(e1 - 1)
+            s1 = tour[e1]
+            p2 = tour[e2 - 1] ^ 1
+            s2 = entryAt(e2)
+
+            if hypot(xs[p1] - xs[p2], ys[p1] - ys[p2]) + distance(s1, s2) - hypot(xs[p1] - xs[s1], ys[p1] - ys[s1]) - distance(p2, s2) < -eps:
+                reverseSegment(e1, e2)
+                return True
+
+            return False
+
+        def insertion(first: int, last: int, edge: int, entry: int, exit_: int) -> float:
+            """Стоимость вставки цепочки [first, last) с концами entry, exit_ на ребро edge"""
+            if first <= edge <= last or abs(edge - first) > window:
+                return math.inf
+
+            before = exitAt(edge - 1)
+            after = entryAt(edge)
+            return hypot(xs[before] - xs[entry], ys[before] - ys[entry]) + distance(exit_, after) - distance(before, after)
+
+        def orOpt(edge: int, p: int, near_entry: list[int]) -> bool:
+            """Перенести цепочку, начинающуюся траекторией edge, если это сокращает переезды"""
+            chain_entry = tour[edge]
+            current = hypot(xs[p] - xs[chain_entry], ys[p] - ys[chain_entry])
+
+            for length in self.OR_OPT_LENGTHS:
+                last = edge + length
+
+                if last > n:
+                    return False
+
+                s = entryAt(last)
+                chain_exit = tour[last - 1] ^ 1
+                exit_current = distance(chain_exit, s)
+                removal = distance(p, s) - current - exit_current
+
+                if removal > -eps:
+                    continue
+
+                for q in near_entry:
+                    j = position[q >> 1]
+
+                    if tour[j] ^ 1 == q:
+                        if removal + insertion(edge, last, j + 1, chain_entry, chain_exit) < -eps:
+                            moveChain(edge, length, j + 1, False)
+                            return True
+
+                    elif reverse and removal + insertion(edge, last, j, chain_exit, chain_entry) < -eps:
+                        moveChain(edge, length, j, True)
+                        return True
+
+                for q in neighbors[chain_exit]:
+                    if hypot(xs[chain_exit] - xs[q], ys[chain_exit] - ys[q]) >= exit_current:
+                        break
+
+                    j = position[q >> 1]
+
+                    if tour[j] == q:
+                        if removal + insertion(edge, last, j, chain_entry, chain_exit) < -eps:
+                            moveChain(edge, length, j, False)
+                            return True
+
+                    elif reverse and removal + insertion(edge, last, j + 1, chain_exit, chain_entry) < -eps:
+                        moveChain(edge, length, j + 1, True)
+                        return True
+
+            return False
+
+        def improveEdge(edge: int) -> bool:
+            p = exitAt(edge - 1)
+            s = tour[edge]
+            current = hypot(xs[p] - xs[s], ys[p] - ys[s])
+
+            near_entry = list[int]()
+
+            for q in neighbors[s]:
+                if hypot(xs[s] - xs[q], ys[s] - ys[q]) >= current:
+                    break
+
+                near_entry.append(q)
+
+            if reverse:
+                if p != origin:
+                    for q in neighbors[p]:
+                        if hypot(xs[p] - xs[q], ys[p] - ys[q]) >= current:
+                            break
+
+                        j = position[q >> 1]
+
+                        if tour[j] ^ 1 == q and twoOpt(edge, j + 1):
+                            return True
+
+                for q in near_entry:
+                    j = position[q >> 1]
+
+                    if tour[j] == q and twoOpt(edge, j):
+                        return True
+
+            return orOpt(edge, p, near_entry)
+
+        for _ in range(self.max_checks * n):
+            if len(queue) == 0:
+                break
+
+            c = queue.popleft()
+            queued[c] = False
+            improveEdge(position[c])
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+from typing import Final
+from typing import Optional
+from typing import Sequence
+
+from bytelang.bytecode.abc import Segment
+from bytelang.bytecode.impl.linker import SymbolResolver
+from bytelang.main import ByteLang
+from bytelang.results.abc import CompileResult
+from bytelang.utils import LogFlag
+from gen.code import CodeGenerator
+from gen.code import State
+from gen.settings import Settings
+from gen.trajectory import Trajectory
+from tools.filetool import AnyPath
+from tools.filetool import FileTool
+from tools.string import FixedStringIO
+
+
+@dataclass(frozen=True, kw_only=True)
+class ContourKey:
+    """Всё, от чего зависит код сегмента контура"""
+
+    x_positions: tuple[int, ...]
+    y_positions: tuple[int, ...]
+    tool_id: int
+    movement_speed: Optional[int]
+    entry: tuple[int, int]
+    """Последняя позиция генератора перед контуром (определяет разрыв на первом шаге)"""
+    config: Settings
+
+
+@dataclass(frozen=True, kw_only=True)
+class Page:
+    """Страница программы: самостоятельная программа, загружаемая устройством после предыдущей"""
+
+    index: int
+    """Номер страницы (порядок загрузки)"""
+    path: Path
+    """Файл байт-кода"""
+    program_size: int
+    """Размер программы страницы"""
+    contours: tuple[int, int]
+    """Диапазон номеров контуров задания [начало, конец)"""
+    start_position: tuple[int, int]
+    """Позиция в начале страницы"""
+    progress: tuple[int, int]
+    """Прогресс задания в начале и в конце страницы"""
+
+    def toJSON(self) -> dict:
+        return {
+            "index": self.index,
+            "file": self.path.name,
+            "size": self.program_size,
+            "contours": list(self.contours),
+            "start_position": list(self.start_position),
+            "progress": list(self.progress),
+        }
+
+
+class IncrementalCodeWriter:
+    """
+    Инкрементальная сборка программы из перемещаемых сегментов.
+    Каждый контур компилируется в отдельный сегмент, сегменты неизменённых контуров берутся из кэша,
+    программа собирается компоновщиком. Время пересборки зависит от количества изменённых контуров.
+    Значения прогресса зависят от положения контура в задании, поэтому записываются внешними символами и вычисляются при компоновке
+    """
+
+    PROGRESS_INTERVAL: Final[int] = 256
+    """Период обновления прогресса внутри контура (шаги)"""
+    PROGRESS_SYMBOL: Final[str] = "progress_"
+    """Префикс внешнего символа прогресса, за ним - номер шага внутри контура"""
+    PAGE_PREFIX: Final[str] = "page_"
+    """Префикс файлов страниц, за ним - номер страницы"""
+    PAGES_INDEX: Final[str] = "pages.json"
+    """Оглавление страниц: порядок загрузки, размеры и диапазоны прогресса"""
+
+    def __init__(self, code_generator: CodeGenerator, bytelang: ByteLang) -> None:
+        self.__code_generator = code_generator
+        self.__bytelang = bytelang
+
+        self.__cache = dict[ContourKey | tuple, Segment]()
+        self.__compiled_count: int = 0
+
+    def getCompiledCount(self) -> int:
+        """Количество сегментов, скомпилированных последним запуском (остальные взяты из кэша)"""
+        return self.__compiled_count
+
+    def getCachedCount(self) -> int:
+        return len(self.__cache)
+
+    def run(self, config: Settings, contours: Sequence[Trajectory], bytecode_stream: BinaryIO, log_flag: LogFlag = LogFlag.PROGRAM_SIZE, *, max_errors: Optional[int] = None) -> CompileResult:
+        """
+        Собрать программу. В кэше остаются только сегменты этого запуска
+        :raises ValueError: Ошибка компиляции сегмента
+        """
+        self.__compiled_count = 0
+        cache = dict[ContourKey | tuple, Segment]()
+
+        start = self.__getStartSegment(cache, config, None)
+        environment = start.environment.name
+
+        contour_segments, steps_before = self.__getContourSegments(cache, config, contours, environment)
+        end = self.__getSegment(cache, ("end", config), self.__code_generator.templates["end"].render(end_speed=config.end_speed, tool_none=config.tool_none), environment)
+
+        self.__cache = cache
+
+        segments = (start, *contour_segments, end)
+        resolve = self.__getResolver((0, *steps_before), steps_before[-1])
+        return self.__bytelang.link(segments, bytecode_stream, log_flag, resolve=resolve, max_errors=max_errors)
+
+    def runPages(self, config: Settings, contours: Sequence[Trajectory], output_folder: AnyPath, max_page_size: Optional[int] = None, *, max_errors: Optional[int] = None) -> tuple[Page, ...]:
+        """
+        Собрать программу страницами, загружаемыми устройством одна за другой. Задание делится на границах контуров.
+        Страница - самостоятельная программа: код старта (скорость, инструмент без печати), переезд в позицию конца предыдущей страницы,
+        контуры, код on_page_end (последняя страница - end). Код контуров и значения прогресса совпадают с run (прогресс по всему заданию)
+        :param output_folder: Каталог страниц: файлы байт-кода и оглавление PAGES_INDEX
+        :param max_page_size: Размер страницы, который нельзя достичь. None - max_program_length профиля (профиль без ограничения - одна страница)
+        :raises ValueError: Ошибка компиляции сегмента или компоновки страницы, контур не помещается на страницу
+        :return: Страницы в порядке загрузки
+        """
+        self.__compiled_count = 0
+        cache = dict[ContourKey | tuple, Segment]()
+        templates = self.__code_generator.templates
+
+        start = self.__getStartSegment(cache, config, None)
+        environment = start.environment
+
+        contour_segments, steps_before = self.__getContourSegments(cache, config, contours, environment.name)
+        page_end = self.__getSegment(cache, ("on_page_end", config), templates["on_page_end"].render(tool_none=config.tool_none), environment.name)
+        end = self.__getSegment(cache, ("end", config), templates["end"].render(end_speed=config.end_speed, tool_none=config.tool_none), environment.name)
+
+        if max_page_size is None:
+            max_page_size = environment.profile.max_program_length
+
+        def getSize(segment: Segment) -> int:
+            return len(segment.code) + sum(variable.primitive.size for variable in segment.variables)
+
+        def fits(size: int) -> bool:
+            return max_page_size is None or environment.profile.pointer_heap.size + size < max_page_size
+
+        layout = list[tuple[Segment, int, int, tuple[int, int]]]()
+        """Начальный сегмент, диапазон контуров и начальная позиция каждой страницы"""
+
+        page_start = start
+        first = 0
+        size = getSize(start)
+        position = page_position = (0, 0)
+
+        for index, (contour, segment) in enumerate(zip(contours, contour_segments)):
+            if index > first and not fits(size + getSize(segment) + getSize(page_end)):
+                layout.append((page_start, first, index, page_position))
+
+                page_start = self.__getStartSegment(cache, config, position)
+                page_position = position
+                first = index
+                size = getSize(page_start)
+
+            if not fits(size + getSize(segment) + getSize(page_end)):
+                raise ValueError(f"Контур {index} ({getSize(segment)} B) не помещается на страницу {max_page_size} B")
+
+            size += getSize(segment)
+
+            if len(contour.x_positions) > 0:
+                position = contour.x_positions[-1], contour.y_positions[-1]
+
+        if first < len(contours) and not fits(size + getSize(end)):
+            layout.append((page_start, first, len(contours), page_position))
+
+            page_start = self.__getStartSegment(cache, config, position)
+            page_position = position
+            first = len(contours)
+
+        layout.append((page_start, first, len(contours), page_position))
+
+        self.__cache = cache
+
+        output_folder = Path(output_folder)
+        output_folder.mkdir(parents=True, exist_ok=True)
+
+        steps = steps_before[-1]
+        pages = list[Page]()
+
+        for index, (page_start, first, last, position) in enumerate(layout):
+            is_last = index == len(layout) - 1
+            segments = (page_start, *contour_segments[first:last], end if is_last else page_end)
+            resolve = self.__getResolver((0, *steps_before[first:last + 1]), steps)
+            path = output_folder / f"{self.PAGE_PREFIX}{index:03}.{ByteLang.BYTECODE_EXTENSION}"
+
+            with open(path, "wb") as bytecode_stream:
+                result = self.__bytelang.link(segments, bytecode_stream, LogFlag.PROGRAM_SIZE, resolve=resolve, max_errors=max_errors)
+
+            if not result.isOK():
+                raise ValueError(f"Страница {index}: {result.getMessage()}")
+
+            pages.append(Page(
+                index=index,
+                path=path,
+                program_size=result.program_size,
+                contours=(first, last),
+                start_position=position,
+                progress=(steps_before[first] * 100 // steps if steps > 0 else 0, steps_before[last] * 100 // steps if steps > 0 else 100)
+            ))
+
+        FileTool.save(output_folder / self.PAGES_INDEX, json.dumps([page.toJSON() for page in pages], indent=2))
+        return tuple(pages)
+
+    def __getStartSegment(self, cache: dict, config: Settings, position: Optional[tuple[int, int]]) -> Segment:
+        """
+        Код старта программы
+        :param position: Позиция, в которую нужно переехать без инструмента (начало страницы). None - начало задания
+        """
+        templates = self.__code_generator.templates
+        source = self.__code_generator.setup + templates["start"].render(speed=config.speed, tool_none=config.tool_none)
+
+        if position is None:
+            return self.__getSegment(cache, ("start", config), source, None)
+
+        x, y = position
+        return self.__getSegment(cache, ("page_start", config, position), source + templates["on_new_position"].render(x=x, y=y), None)
+
+    def __getContourSegments(self, cache: dict, config: Settings, contours: Sequence[Trajectory], environment: str) -> tuple[list[Segment], list[int]]:
+        """
+        Сегменты контуров
+        :return: Сегменты и количество шагов до каждого контура (последний элемент - общее количество шагов)
+        """
+        segments = list[Segment]()
+        steps_before = [0]
+
+        entry = (0, 0)
+        steps = 0
+
+        for contour in contours:
+            key = ContourKey(
+                x_positions=tuple(contour.x_positions),
+                y_positions=tuple(contour.y_positions),
+                tool_id=contour.tool_id,
+                movement_speed=contour.movement_speed,
+                entry=entry,
+                config=config
+            )
+
+            segments.append(self.__getSegment(cache, key, self.__getContourSource(config, contour, entry), environment))
+
+            steps += len(key.x_positions)
+            steps_before.append(steps)
+
+            if len(key.x_positions) > 1:
+                entry = key.x_positions[-2], key.y_positions[-2]
+
+        return segments, steps_before
+
+    def __getResolver(self, steps_before: Sequence[int], steps: int) -> SymbolResolver:
+        """
+        Значения символов прогресса
+        :param steps_before: Количество шагов задания до каждого компонуемого сегмента
+        :param steps: Общее количество шагов задания
+        """
+
+        def resolve(segment_index: int, symbol: str) -> Optional[int]:
+            if not symbol.startswith(self.PROGRESS_SYMBOL):
+                return None
+
+            step = steps_before[segment_index] + int(symbol.removeprefix(self.PROGRESS_SYMBOL)) + 1
+            return step * 100 // steps
+
+        return resolve
+
+    def __getSegment(self, cache: dict, key: ContourKey | tuple[str, Settings], source: str, environment: Optional[str]) -> Segment:
+        if (segment := self.__cache.get(key)) is None:
+            segment = self.__bytelang.compileSegment(FixedStringIO(source), environment)
+            self.__compiled_count += 1
+
+        cache[key] = segment
+        return segment
+
+    def __getContourSource(self, config: Settings, contour: Trajectory, entry: tuple[int, int]) -> str:
+        """Код контура: разрывы вычисляются как в CodeGenerator.run, прогресс - символами шагов"""
+        templates = self.__code_generator.templates
+        stream = FixedStringIO()
+
+        state = State((contour,), config)
+        state.last_x, state.last_y = entry
+
+        stream.write(templates["on_contour_begin"].render(
+            speed=config.speed if contour.movement_speed is None else contour.movement_speed,
+            tool_paint=contour.tool_id
+        ))
+
+        last_step = len(contour.x_positions) - 1
+
+        for step_index, (x, y) in enumerate(zip(contour.x_positions, contour.y_positions)):
+            if state.nextStep(config, contour, step_index, x, y):
+                stream.write(templates["on_disconnect"].render(
+                    tool_paint=contour.tool_id,
+                    tool_none=config.tool_none,
+                    tool_change_duration_ms=config.tool_change_duration_ms,
+                    x=x,
+                    y=y
+                ))
+            else:
+                stream.write(templates["on_new_position"].render(x=x, y=y))
+
+            if step_index == last_step or (step_index + 1) % self.PROGRESS_INTERVAL == 0:
+                stream.write(templates["on_update_progress"].render(progress=f"{self.PROGRESS_SYMBOL}{step_index}"))
+
+        stream.write(templates["on_contour_end"].render())
+        return stream.getvalue()
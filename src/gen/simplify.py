@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+
+from gen.trajectory import Trajectory
+
+
+class SimplifyMethod(Enum):
+    """Алгоритм упрощения ломаной"""
+
+    RDP = "rdp"
+    """Рамер-Дуглас-Пекер: вершина сохраняется, если удалена от хорды больше допуска"""
+    VISVALINGAM = "visvalingam"
+    """Висвалингам-Уайетт: удаляются вершины, образующие с соседями треугольник площадью меньше квадрата допуска"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class SimplifyReport:
+    """Результат упрощения траекторий"""
+
+    contours: int
+    """Количество траекторий"""
+    vertices_before: int
+    """Количество вершин до упрощения"""
+    vertices_after: int
+    """Количество вершин после упрощения"""
+
+    def getRemoved(self) -> int:
+        return self.vertices_before - self.vertices_after
+
+    def getReduction(self) -> float:
+        """Доля удалённых вершин"""
+        return self.getRemoved() / self.vertices_before if self.vertices_before > 0 else 0
+
+    def __str__(self) -> str:
+        return f"{self.contours} contours : {self.vertices_before} -> {self.vertices_after} vertices (-{self.getReduction():.1%})"
+
+
+@dataclass(frozen=True, kw_only=True)
+class PolylineSimplifier:
+    """
+    Упрощение траекторий перед генерацией кода: каждая вершина - инструкция set_position.
+    Первая и последняя вершины сохраняются. Разрывы не появляются и не исчезают:
+    концы отрезков длиннее max_segment сохраняются, а новые отрезки не длиннее max_segment
+    """
+
+    method: SimplifyMethod = SimplifyMethod.RDP
+    """Алгоритм упрощения"""
+    tolerance: float
+    """Допуск (единицы станка)"""
+    max_segment: Optional[float] = None
+    """Наибольшая длина отрезка, рисуемого без разрыва (Settings.disconnect_distance_mm). None - без ограничения"""
+
+    def run(self, contours: Iterable[Trajectory]) -> tuple[tuple[Trajectory, ...], SimplifyReport]:
+        """
+        Упростить траектории
+        :return: Упрощённые траектории и отчёт
+        """
+        if self.tolerance < 0:
+            raise ValueError(f"Допуск не может быть отрицательным: {self.tolerance}")
+
+        ret = list[Trajectory]()
+        vertices_before = 0
+        vertices_after = 0
+
+        for contour in contours:
+            simplified = self.simplify(contour)
+            ret.append(simplified)
+
+            vertices_before += len(contour.x_positions)
+            vertices_after += len(simplified.x_positions)
+
+        return tuple(ret), SimplifyReport(contours=len(ret), vertices_before=vertices_before, vertices_after=vertices_after)
+
+    def simplify(self, contour: Trajectory) -> Trajectory:
+        """Упростить траекторию"""
+        x = np.asarray(contour.x_positions)
+        y = np.asarray(contour.y_positions)
+
+        if len(x) != len(y):
+            raise ValueError(f"Количество координат X ({len(x)}) и Y ({len(y)}) не совпадает")
+
+        if len(x) < 3:
+            return contour
+
+        fx = x.astype(np.float64)
+        fy = y.astype(np.float64)
+        keep = self.__getFixed(fx, fy)
+
+        if self.method == SimplifyMethod.RDP:
+            keep = self.__rdp(fx, fy, keep)
+
+        else:
+            keep = self.__visvalingam(fx, fy, keep)
+
+        if keep.all():
+            return contour
+
+        return Trajectory(
+            x_positions=self.__column(contour.x_positions, x[keep]),
+            y_positions=self.__column(contour.y_positions, y[keep]),
+            tool_id=contour.tool_id,
+            movement_speed=contour.movement_speed
+        )
+
+    def __getFixed(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Вершины, которые нельзя удалить: концы траектории и концы разрывов"""
+        keep = np.zeros(len(x), dtype=np.bool_)
+        keep[0] = keep[-1] = True
+
+        if self.max_segment is not None:
+            gaps = np.flatnonzero(np.hypot(np.diff(x), np.diff(y)) > self.max_segment)
+            keep[gaps] = True
+            keep[gaps + 1] = True
+
+        return keep
+
+    def __rdp(self, x: np.ndarray, y: np.ndarray, keep: np.ndarray) -> np.ndarray:
+        """Все интервалы между сохранёнными вершинами делятся одновременно, по одному уровню рекурсии за проход"""
+        fixed = np.flatnonzero(keep)
+        starts = fixed[:-1]
+        ends = fixed[1:]
+
+        while True:
+            pending = ends - starts > 1
+            starts = starts[pending]
+            ends = ends[pending]
+
+            if len(starts) == 0:
+                return keep
+
+            lengths = ends - starts - 1
+            offsets = np.zeros(len(starts), dtype=np.int64)
+            np.cumsum(lengths[:-1], out=offsets[1:])
+
+            interval = np.repeat(np.arange(len(starts)), lengths)
+            index = np.arange(len(interval)) - offsets[interval] + starts[interval] + 1
+
+            ax = x[starts]
+            ay = y[starts]
+            chord_x = x[ends] - ax
+            chord_y = y[ends] - ay
+            chord = np.hypot(chord_x, chord_y)
+
+            px = x[index] - ax[interval]
+            py = y[index] - ay[interval]
+            norm = chord[interval]
+
+            # Расстояние до прямой хорды, для замкнутого интервала - до его начала
+            distance = np.hypot(px, py)
+            np.divide(np.abs(chord_x[interval] * py - chord_y[interval] * px), norm, out=distance, where=norm > 0)
+
+            farthest = np.maximum.reduceat(distance, offsets)
+            candidates = np.flatnonzero(distance == farthest[interval])
+            first = candidates[np.unique(interval[candidates], return_index=True)[1]]
+
+            split = farthest > self.tolerance
+            middle = np.where(split, index[first], (starts + ends) // 2)
+
+            if self.max_segment is not None:
+                split |= chord > self.max_segment
+
+            keep[middle[split]] = True
+            starts, ends = np.concatenate((starts[split], middle[split])), np.concatenate((middle[split], ends[split]))
+
+    def __visvalingam(self, x: np.ndarray, y: np.ndarray, keep: np.ndarray) -> np.ndarray:
+        """
+        За проход удаляются вершины, площадь которых не больше порога и площадей соседей.
+        Из подряд идущих таких вершин удаляется каждая вторая, чтобы удаляемые вершины не соседствовали
+        и их удаление было независимым. Площади пересчитываются после прохода
+        """
+        threshold = self.tolerance * self.tolerance
+        alive = np.arange(len(x))
+
+        while len(alive) > 2:
+            ax = x[alive[:-2]]
+            ay = y[alive[:-2]]
+            bx = x[alive[1:-1]] - ax
+            by = y[alive[1:-1]] - ay
+            cx = x[alive[2:]] - ax
+            cy = y[alive[2:]] - ay
+
+            area = np.abs(bx * cy - by * cx) / 2
+            removable = (area <= threshold) & ~keep[alive[1:-1]]
+
+            if self.max_segment is not None:
+                removable &= np.hypot(cx, cy) <= self.max_segment
+
+            if not removable.any():
+                break
+
+            area = np.where(removable, area, np.inf)
+            left = np.concatenate(((np.inf,), area[:-1]))
+            right = np.concatenate((area[1:], (np.inf,)))
+
+            minimum = removable & (area <= left) & (area <= right)
+            index = np.arange(len(minimum))
+            run_start = np.maximum.accumulate(np.where(minimum & ~np.concatenate(((False,), minimum[:-1])), index, 0))
+            removed = minimum & ((index - run_start) % 2 == 0)
+
+            mask = np.ones(len(alive), dtype=np.bool_)
+            mask[1:-1] = ~removed
+            alive = alive[mask]
+
+        ret = np.zeros(len(x), dtype=np.bool_)
+        ret[alive] = True
+        return ret
+
+    @staticmethod
+    def __column(source: Sequence[int], values: np.ndarray) -> Sequence[int]:
+        """Столбец упрощённых координат того же вида, что и исходный (компактный или список)"""
+        if isinstance(source, array):
+            return array(source.typecode, values.astype(np.dtype(source.typecode)).tobytes())
+
+        if isinstance(source, memoryview):
+            return array(source.format, values.astype(np.dtype(source.format)).tobytes())
+
+        return values.tolist()
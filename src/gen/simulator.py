@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import math
+import mmap
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+from bytelang.bytecode.impl.disasm import ByteCodeBuffer
+from bytelang.bytecode.impl.vm import ExecutionResult
+from bytelang.bytecode.impl.vm import VirtualMachine
+from bytelang.content.impl.environments import Environment
+from gen.trajectory import PositionFormat
+from gen.trajectory import Trajectory
+from tools.filetool import AnyPath
+
+
+@dataclass(frozen=True, kw_only=True)
+class SimulationReport:
+    """Результат симуляции программы плоттера"""
+
+    execution: ExecutionResult
+    """Результат выполнения байт-кода"""
+    strokes: tuple[Trajectory, ...]
+    """Путь пера: непрерывные участки рисования (пусто, если путь не записывался)"""
+    ink_distance: float
+    """Длина перемещений с инструментом (единицы станка)"""
+    travel_distance: float
+    """Длина перемещений без инструмента"""
+    move_seconds: float
+    """Длительность перемещений"""
+    delay_seconds: float
+    """Длительность задержек"""
+    tool_changes: int
+    """Количество смен активного инструмента"""
+    final_position: tuple[int, int]
+    """Позиция по окончании программы"""
+    final_progress: Optional[int]
+    """Последнее значение прогресса. None, если прогресс не устанавливался"""
+
+    def getDurationSeconds(self) -> float:
+        """Оценка длительности печати"""
+        return self.move_seconds + self.delay_seconds
+
+    def __str__(self) -> str:
+        return (
+            f"{self.execution}\n"
+            f"ink {self.ink_distance:.1f}, travel {self.travel_distance:.1f}, tool changes {self.tool_changes}, "
+            f"duration {self.getDurationSeconds():.1f} s (moves {self.move_seconds:.1f} s, delays {self.delay_seconds:.1f} s)"
+        )
+
+
+class PlotSimulator:
+    """
+    Симуляция плоттера на эталонном интерпретаторе: позиция, скорость, активный инструмент, задержки и прогресс.
+    Перемещение идёт по прямой с постоянной скоростью (ускорения не учитываются), рисует любой инструмент, кроме tool_none
+    """
+
+    def __init__(self, environment: Environment, tool_none: int, speed_scale: float = 1.0, *, record_path: bool = True) -> None:
+        """
+        :param environment: Окружение программы
+        :param tool_none: Код инструмента без печати (Settings.tool_none)
+        :param speed_scale: Скорость перемещения (единицы станка в секунду) на единицу значения set_speed
+        :param record_path: Записывать путь пера
+        """
+        self.__tool_none = tool_none
+        self.__speed_scale = speed_scale
+        self.__record_path = record_path
+        self.__position_format = PositionFormat.fromEnvironment(environment)
+
+        handlers = {
+            "quit": self.__quit,
+            "delay_ms": self.__delayMs,
+            "set_speed": self.__setSpeed,
+            "set_progress": self.__setProgress,
+            "set_position": self.__setPosition,
+            "set_active_tool": self.__setActiveTool,
+            "move_by": self.__moveBy,
+        }
+
+        self.__machine = VirtualMachine(environment, {name: handler for name, handler in handlers.items() if name in environment.instructions})
+        self.__reset()
+
+    def __reset(self) -> None:
+        self.__x: int = 0
+        self.__y: int = 0
+        self.__speed: Optional[int] = None
+        self.__tool: int = self.__tool_none
+        self.__progress: Optional[int] = None
+
+        self.__ink_distance: float = 0
+        self.__travel_distance: float = 0
+        self.__move_seconds: float = 0
+        self.__delay_ms: int = 0
+        self.__tool_changes: int = 0
+
+        self.__strokes = list[Trajectory]()
+        self.__stroke_x = array(self.__position_format.typecode)
+        self.__stroke_y = array(self.__position_format.typecode)
+        self.__stroke_speed: Optional[int] = None
+
+    def run(self, buffer: ByteCodeBuffer) -> SimulationReport:
+        """
+        Выполнить программу
+        :raises ValueError: Неверный байт-код или перемещение без заданной скорости
+        """
+        self.__reset()
+        execution = self.__machine.run(buffer)
+        self.__endStroke()
+
+        return SimulationReport(
+            execution=execution,
+            strokes=tuple(self.__strokes),
+            ink_distance=self.__ink_distance,
+            travel_distance=self.__travel_distance,
+            move_seconds=self.__move_seconds,
+            delay_seconds=self.__delay_ms / 1000,
+            tool_changes=self.__tool_changes,
+            final_position=(self.__x, self.__y),
+            final_progress=self.__progress
+        )
+
+    def runFile(self, path: AnyPath) -> SimulationReport:
+        """Выполнить программу из файла байт-кода (файл отображается в память)"""
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return self.run(data)
+
+    def __quit(self) -> bool:
+        return True
+
+    def __delayMs(self, duration: int) -> None:
+        self.__delay_ms += duration
+
+    def __setSpeed(self, speed: int) -> None:
+        self.__speed = speed
+
+    def __setProgress(self, progress: int) -> None:
+        self.__progress = progress
+
+    def __setActiveTool(self, tool: int) -> None:
+        if tool == self.__tool:
+            return
+
+        self.__endStroke()
+        self.__tool = tool
+        self.__tool_changes += 1
+
+    def __moveBy(self, dx: int, dy: int) -> None:
+        self.__setPosition(self.__x + dx, self.__y + dy)
+
+    def __setPosition(self, x: int, y: int) -> None:
+        distance = math.hypot(x - self.__x, y - self.__y)
+
+        if distance == 0:
+            return
+
+        if self.__speed is None or self.__speed <= 0:
+            raise ValueError(f"Перемещение ({self.__x}, {self.__y}) -> ({x}, {y}) со скоростью {self.__speed}")
+
+        self.__move_seconds += distance / (self.__speed * self.__speed_scale)
+
+        if self.__tool == self.__tool_none:
+            self.__travel_distance += distance
+
+        else:
+            self.__ink_distance += distance
+
+            if self.__record_path:
+                if len(self.__stroke_x) == 0:
+                    self.__stroke_speed = self.__speed
+                    self.__stroke_x.append(self.__x)
+                    self.__stroke_y.append(self.__y)
+
+                self.__stroke_x.append(x)
+                self.__stroke_y.append(y)
+
+        self.__x = x
+        self.__y = y
+
+    def __endStroke(self) -> None:
+        """Завершить участок рисования текущим инструментом"""
+        if len(self.__stroke_x) == 0:
+            return
+
+        self.__strokes.append(Trajectory(x_positions=self.__stroke_x, y_positions=self.__stroke_y, tool_id=self.__tool, movement_speed=self.__stroke_speed))
+        self.__stroke_x = array(self.__position_format.typecode)
+        self.__stroke_y = array(self.__position_format.typecode)
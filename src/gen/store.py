@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import mmap
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from struct import Struct
+from typing import BinaryIO
+from typing import ClassVar
+from typing import Final
+from typing import Iterable
+from typing import overload
+
+from gen.trajectory import PositionFormat
+from gen.trajectory import Trajectory
+from tools.filetool import AnyPath
+
+
+class TrajectoryStoreWriter:
+    """
+    Запись траекторий в хранилище по одной. Координаты пишутся сразу (порядок байт машины), оглавление - при закрытии.
+    Формат файла: заголовок, столбцы X и Y каждой траектории, оглавление, концевик
+    """
+
+    MAGIC: Final[bytes] = b"BLTS"
+    VERSION: Final[int] = 1
+
+    HEADER: ClassVar[Struct] = Struct("<4sHc9x")
+    """Сигнатура, версия, тип элементов столбцов. Размер кратен размеру любого типа столбцов"""
+    ENTRY: ClassVar[Struct] = Struct("<QQqq?7x")
+    """Смещение столбца X, количество точек, инструмент, скорость, задана ли скорость"""
+    FOOTER: ClassVar[Struct] = Struct("<QQ4s")
+    """Смещение оглавления, количество траекторий, сигнатура"""
+
+    def __init__(self, path: AnyPath, position_format: PositionFormat = PositionFormat.I16) -> None:
+        """
+        :param path: Файл хранилища (перезаписывается)
+        :param position_format: Тип столбцов и допустимые координаты
+        """
+        self.__format = position_format
+        self.__stream: BinaryIO = open(path, "wb")
+        self.__entries = list[bytes]()
+        self.__offset: int = self.HEADER.size
+        self.__points_count: int = 0
+
+        self.__stream.write(self.HEADER.pack(self.MAGIC, self.VERSION, position_format.typecode.encode()))
+
+    def __enter__(self) -> TrajectoryStoreWriter:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def getCount(self) -> int:
+        return len(self.__entries)
+
+    def getPointsCount(self) -> int:
+        return self.__points_count
+
+    def append(self, trajectory: Trajectory) -> None:
+        """
+        Записать траекторию
+        :raises ValueError: Координата вне допустимого диапазона формата
+        """
+        x = self.__format.pack(trajectory.x_positions, self.__format.x_range, "X")
+        y = self.__format.pack(trajectory.y_positions, self.__format.y_range, "Y")
+
+        if len(x) != len(y):
+            raise ValueError(f"Количество координат X ({len(x)}) и Y ({len(y)}) не совпадает")
+
+        speed = trajectory.movement_speed
+        self.__entries.append(self.ENTRY.pack(self.__offset, len(x), trajectory.tool_id, 0 if speed is None else speed, speed is not None))
+
+        x.tofile(self.__stream)
+        y.tofile(self.__stream)
+
+        self.__offset += 2 * len(x) * x.itemsize
+        self.__points_count += len(x)
+
+    def extend(self, trajectories: Iterable[Trajectory]) -> None:
+        for trajectory in trajectories:
+            self.append(trajectory)
+
+    def close(self) -> None:
+        """Записать оглавление и закрыть файл"""
+        if self.__stream.closed:
+            return
+
+        self.__stream.write(b"".join(self.__entries))
+        self.__stream.write(self.FOOTER.pack(self.__offset, len(self.__entries), self.MAGIC))
+        self.__stream.close()
+
+
+class TrajectoryStore(Sequence[Trajectory]):
+    """
+    Траектории в файле на диске. Файл отображается в память: координаты читаются операционной системой по мере обращения,
+    поэтому задание может превышать объём оперативной памяти. Столбцы траекторий - memoryview файла (элементы int).
+    Траектории, полученные из хранилища, нельзя использовать после его закрытия
+    """
+
+    @classmethod
+    def create(cls, path: AnyPath, trajectories: Iterable[Trajectory], position_format: PositionFormat = PositionFormat.I16) -> TrajectoryStore:
+        """Записать траектории и открыть хранилище"""
+        with TrajectoryStoreWriter(path, position_format) as writer:
+            writer.extend(trajectories)
+
+        return cls(path)
+
+    def __init__(self, path: AnyPath) -> None:
+        """
+        :raises ValueError: Файл не является хранилищем траекторий
+        """
+        self.__path = Path(path)
+
+        with open(self.__path, "rb") as f:
+            self.__mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.__data = memoryview(self.__mmap)
+
+        header = TrajectoryStoreWriter.HEADER
+        footer = TrajectoryStoreWriter.FOOTER
+        entry = TrajectoryStoreWriter.ENTRY
+
+        if len(self.__data) < header.size + footer.size:
+            self.close()
+            raise ValueError(f"{self.__path} не является хранилищем траекторий")
+
+        magic, version, typecode = header.unpack_from(self.__data)
+        index_offset, count, footer_magic = footer.unpack_from(self.__data, len(self.__data) - footer.size)
+
+        if magic != TrajectoryStoreWriter.MAGIC or footer_magic != TrajectoryStoreWriter.MAGIC or version != TrajectoryStoreWriter.VERSION:
+            self.close()
+            raise ValueError(f"{self.__path} не является хранилищем траекторий версии {TrajectoryStoreWriter.VERSION}")
+
+        self.__typecode: str = typecode.decode()
+        self.__itemsize: int = array(self.__typecode).itemsize
+        self.__entries = tuple(entry.iter_unpack(self.__data[index_offset:index_offset + count * entry.size]))
+
+    def __enter__(self) -> TrajectoryStore:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Закрыть файл
+        :raises BufferError: Остались используемые траектории хранилища
+        """
+        self.__data.release()
+        self.__mmap.close()
+
+    def getPath(self) -> Path:
+        return self.__path
+
+    def getPointsCount(self) -> int:
+        return sum(e[1] for e in self.__entries)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @overload
+    def __getitem__(self, index: int) -> Trajectory: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Trajectory]: ...
+
+    def __getitem__(self, index: int | slice) -> Trajectory | Sequence[Trajectory]:
+        if isinstance(index, slice):
+            return tuple(map(self.__read, self.__entries[index]))
+
+        return self.__read(self.__entries[index])
+
+    def __read(self, entry: tuple[int, int, int, int, bool]) -> Trajectory:
+        offset, count, tool_id, speed, has_speed = entry
+        size = count * self.__itemsize
+
+        return Trajectory(
+            x_positions=self.__data[offset:offset + size].cast(self.__typecode),
+            y_positions=self.__data[offset + size:offset + 2 * size].cast(self.__typecode),
+            tool_id=tool_id,
+            movement_speed=speed if has_speed else None
+        )
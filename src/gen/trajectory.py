@@ -1,7 +1,99 @@
+from __future__ import annotations
+
+from array import array
 from dataclasses import dataclass
+from typing import ClassVar
+from typing import Iterable
 from typing import Optional
 from typing import Sequence
 
+import numpy as np
+
+from bytelang.content.impl.environments import Environment
+from bytelang.content.impl.primitives import PrimitiveWriteType
+
+
+@dataclass(frozen=True, kw_only=True)
+class PositionFormat:
+    """Хранение координат: тип элементов столбцов и допустимые значения (по типам аргументов инструкции позиционирования)"""
+
+    POSITION_INSTRUCTION: ClassVar[str] = "set_position"
+    """Инструкция, аргументы которой задают допустимые координаты"""
+    TYPECODES: ClassVar[tuple[str, ...]] = ("b", "B", "h", "H", "i", "I", "q", "Q")
+    """Целочисленные типы array по возрастанию размера"""
+    I16: ClassVar[PositionFormat]
+    """Координаты i16 (set_position пакета plotter)"""
+
+    typecode: str
+    """Тип элементов столбцов (array)"""
+    x_range: tuple[int, int]
+    """Допустимые значения X (включительно)"""
+    y_range: tuple[int, int]
+    """Допустимые значения Y (включительно)"""
+
+    @classmethod
+    def fromRanges(cls, x_range: tuple[int, int], y_range: tuple[int, int]) -> PositionFormat:
+        """Формат с наименьшим типом элементов, вмещающим оба диапазона"""
+        low = min(x_range[0], y_range[0])
+        high = max(x_range[1], y_range[1])
+
+        for typecode in cls.TYPECODES:
+            bits = array(typecode).itemsize * 8
+            signed = typecode.islower()
+
+            if (-(1 << (bits - 1)) if signed else 0) <= low and high <= ((1 << (bits - 1)) - 1 if signed else (1 << bits) - 1):
+                return cls(typecode=typecode, x_range=x_range, y_range=y_range)
+
+        raise ValueError(f"Нет типа столбцов для диапазонов координат {x_range}, {y_range}")
+
+    @classmethod
+    def fromEnvironment(cls, environment: Environment, instruction_name: str = POSITION_INSTRUCTION) -> PositionFormat:
+        """
+        Формат по типам аргументов инструкции позиционирования окружения
+        :raises ValueError: Инструкция отсутствует или её аргументы не две целые координаты
+        """
+        if (instruction := environment.instructions.get(instruction_name)) is None:
+            raise ValueError(f"Окружение {environment.name} не содержит инструкции {instruction_name}")
+
+        arguments = tuple(arg.primitive_type for arg in instruction.arguments)
+
+        if len(arguments) != 2 or any(primitive.write_type == PrimitiveWriteType.EXPONENT for primitive in arguments):
+            raise ValueError(f"Аргументы {instruction_name} не являются двумя целыми координатами: {arguments}")
+
+        x_primitive, y_primitive = arguments
+        return cls.fromRanges(x_primitive.value_range, y_primitive.value_range)
+
+    def pack(self, values: Iterable[int], value_range: tuple[int, int], axis: str) -> array:
+        """
+        Упаковать координаты оси в столбец
+        :raises ValueError: Значение вне допустимого диапазона
+        """
+        if isinstance(values, np.ndarray):
+            if values.dtype.kind not in "iu":
+                raise ValueError(f"Координаты {axis} не целые: {values.dtype}")
+
+            if len(values) > 0 and (int(values.min()) < value_range[0] or int(values.max()) > value_range[1]):
+                raise ValueError(f"Координата {axis} вне диапазона {value_range}: [{values.min()}, {values.max()}]")
+
+            return array(self.typecode, values.astype(np.dtype(self.typecode)).tobytes())
+
+        try:
+            ret = array(self.typecode, values)
+
+        except OverflowError as e:
+            raise ValueError(f"Координата {axis} вне диапазона {value_range}: {e}") from e
+
+        except TypeError as e:
+            raise ValueError(f"Координаты {axis} не целые: {e}") from e
+
+        if len(ret) > 0 and (min(ret) < value_range[0] or max(ret) > value_range[1]):
+            raise ValueError(f"Координата {axis} вне диапазона {value_range}: [{min(ret)}, {max(ret)}]")
+
+        return ret
+
+
+PositionFormat.I16 = PositionFormat.fromRanges((-(1 << 15), (1 << 15) - 1), (-(1 << 15), (1 << 15) - 1))
+
 
 @dataclass(frozen=True, kw_only=True)
 class Trajectory:
@@ -15,3 +107,18 @@ class Trajectory:
     """Инструмент печати"""
     movement_speed: Optional[int] = None
     """Скорость перемещения (Переопределяет базовую)"""
+
+    @classmethod
+    def compact(cls, x_positions: Iterable[int], y_positions: Iterable[int], tool_id: int, movement_speed: Optional[int] = None, *, position_format: PositionFormat = PositionFormat.I16) -> Trajectory:
+        """
+        Траектория с координатами в компактных столбцах (array), 2 байта на координату для i16 вместо объектов int
+        :param position_format: Тип столбцов и допустимые координаты
+        :raises ValueError: Координата вне допустимого диапазона или разное количество координат X и Y
+        """
+        x = position_format.pack(x_positions, position_format.x_range, "X")
+        y = position_format.pack(y_positions, position_format.y_range, "Y")
+
+        if len(x) != len(y):
+            raise ValueError(f"Количество координат X ({len(x)}) и Y ({len(y)}) не совпадает")
+
+        return cls(x_positions=x, y_positions=y, tool_id=tool_id, movement_speed=movement_speed)
@@ -3,12 +3,14 @@ from __future__ import annotations
 from os import PathLike
 from pathlib import Path
 from typing import BinaryIO
+from typing import Optional
 from typing import Sequence
 
 from bytelang.main import ByteLang
 from bytelang.utils import LogFlag
 from bytelang.results.abc import CompileResult
 from gen.code import CodeGenerator
+from gen.emitter import ByteCodeEmitter
 from gen.settings import Settings
 from gen.trajectory import Trajectory
 from tools.string import FixedStringIO
@@ -27,14 +29,22 @@ class CodeWriter:
     def __init__(self, code_generator: CodeGenerator, bytelang: ByteLang) -> None:
         self.__code_generator = code_generator
         self.__bytelang = bytelang
+        self.__emitter: Optional[ByteCodeEmitter] = None
 
-    def run(self, config: Settings, contours: Sequence[Trajectory], bytecode_stream: BinaryIO, log_flag: LogFlag = LogFlag.ALL) -> CompileResult:
+    def run(self, config: Settings, contours: Sequence[Trajectory], bytecode_stream: BinaryIO, log_flag: LogFlag = LogFlag.ALL, *, optimize: bool = False, max_errors: Optional[int] = None) -> CompileResult:
         stream = FixedStringIO()
         self.__code_generator.run(stream, config, contours)
 
         stream.seek(0)
 
-        return self.__bytelang.compile(stream, bytecode_stream, log_flag)
+        return self.__bytelang.compile(stream, bytecode_stream, log_flag, optimize=optimize, max_errors=max_errors)
+
+    def runDirect(self, config: Settings, contours: Sequence[Trajectory], bytecode_stream: BinaryIO, log_flag: LogFlag = LogFlag.ALL, *, optimize: bool = False, max_errors: Optional[int] = None) -> CompileResult:
+        """Сгенерировать байт-код напрямую, минуя текстовое представление. Результат идентичен run"""
+        if self.__emitter is None:
+            self.__emitter = ByteCodeEmitter.load(self.__code_generator, self.__bytelang)
+
+        return self.__emitter.run(config, contours, bytecode_stream, log_flag, optimize=optimize, max_errors=max_errors)
 
 
 def test(output_path=r"C:\Users\User\Desktop\Вертикальный тросовый плоттер\Код\CablePlotterApp\res\out\test.blc"):
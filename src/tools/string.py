@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from io import StringIO
+from typing import TextIO
 
 
 class FixedStringIO(StringIO):
@@ -24,3 +25,44 @@ class StringBuilder(FixedStringIO):
 
     def toString(self) -> str:
         return self.__str__()
+
+
+class ChunkedTextWriter:
+    """Запись текста в поток крупными блоками: мелкие части накапливаются и записываются одним вызовом"""
+
+    def __init__(self, stream: TextIO, chunk_size: int) -> None:
+        """
+        :param stream: Поток вывода
+        :param chunk_size: Размер накопленного текста, после которого он записывается в поток (символы)
+        """
+        self.__stream = stream
+        self.__chunk_size = chunk_size
+        self.__pieces = list[str]()
+        self.__size: int = 0
+
+    def __enter__(self) -> ChunkedTextWriter:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.flush()
+
+    def write(self, text: str) -> None:
+        if len(text) >= self.__chunk_size:
+            self.flush()
+            self.__stream.write(text)
+            return
+
+        self.__pieces.append(text)
+        self.__size += len(text)
+
+        if self.__size >= self.__chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Записать накопленный текст"""
+        if not self.__pieces:
+            return
+
+        self.__stream.write("".join(self.__pieces))
+        self.__pieces.clear()
+        self.__size = 0
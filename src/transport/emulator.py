@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import zlib
+from typing import Optional
+
+from transport.frames import Frame
+from transport.frames import FrameError
+from transport.frames import FrameType
+
+
+class DeviceEmulator:
+    """
+    Эмулятор устройства на сокете: принимает кадры загрузки, собирает программу и подтверждает кадры
+    с задержкой передачи по последовательной линии заданной скорости. Может терять и повреждать кадры
+    """
+
+    def __init__(self, link_rate: int = 115200, bits_per_byte: int = 10, *, drop_probability: float = 0, corrupt_probability: float = 0, seed: int = 1) -> None:
+        """
+        :param link_rate: Скорость линии (бит/с)
+        :param bits_per_byte: Бит линии на байт (8N1 - 10)
+        :param drop_probability: Вероятность потери кадра (кадр не подтверждается)
+        :param corrupt_probability: Вероятность повреждения кадра (ответ NAK)
+        :param seed: Зерно генератора потерь
+        """
+        self.__byte_time = bits_per_byte / link_rate
+        """Время передачи байта по линии (с)"""
+        self.__drop_probability = drop_probability
+        self.__corrupt_probability = corrupt_probability
+        self.__random = random.Random(seed)
+
+        self.__program = bytearray()
+        self.__complete: Optional[bytes] = None
+        self.__frames_received: int = 0
+        self.__frames_rejected: int = 0
+
+    def getProgram(self) -> Optional[bytes]:
+        """Принятая программа. None, если загрузка не завершена кадром END с верным CRC"""
+        return self.__complete
+
+    def getFramesReceived(self) -> int:
+        return self.__frames_received
+
+    def getFramesRejected(self) -> int:
+        """Количество кадров, на которые отправлен NAK"""
+        return self.__frames_rejected
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """
+        Запустить сервер эмулятора
+        :param port: Порт (0 - любой свободный, см. server.sockets[0].getsockname())
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обслуживать соединение до его закрытия"""
+        loop = asyncio.get_running_loop()
+        link_free_at = loop.time()
+        """Момент освобождения линии к устройству"""
+
+        try:
+            while True:
+                try:
+                    frame = await Frame.read(reader)
+                    error = None
+
+                except FrameError as e:
+                    frame = None
+                    error = e
+
+                size = Frame.getOverhead() + (0 if frame is None else len(frame.payload))
+                link_free_at = max(loop.time(), link_free_at) + size * self.__byte_time
+                await asyncio.sleep(link_free_at - loop.time())
+
+                self.__frames_received += 1
+
+                if self.__random.random() < self.__drop_probability:
+                    continue
+
+                if error is not None or self.__random.random() < self.__corrupt_probability:
+                    self.__frames_rejected += 1
+                    self.__reply(loop, writer, FrameType.NAK, error.sequence if frame is None else frame.sequence)
+                    continue
+
+                self.__reply(loop, writer, self.__accept(frame), frame.sequence)
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            writer.close()
+
+    def __accept(self, frame: Frame) -> FrameType:
+        """Принять целый кадр. Возвращает вид ответа"""
+        if frame.type == FrameType.DATA:
+            end = frame.offset + len(frame.payload)
+
+            if len(self.__program) < end:
+                self.__program.extend(bytes(end - len(self.__program)))
+
+            self.__program[frame.offset:end] = frame.payload
+            return FrameType.ACK
+
+        if frame.type == FrameType.END:
+            del self.__program[frame.offset:]
+
+            if len(self.__program) != frame.offset or Frame.CRC.pack(zlib.crc32(self.__program)) != frame.payload:
+                return FrameType.REJECT
+
+            self.__complete = bytes(self.__program)
+            return FrameType.ACK
+
+        return FrameType.NAK
+
+    def __reply(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter, frame_type: FrameType, sequence: int) -> None:
+        """Отправить ответ после его передачи по линии к хосту (линии в обе стороны независимы)"""
+        loop.call_later(Frame.getOverhead() * self.__byte_time, self.__send, writer, frame_type, sequence)
+
+    @staticmethod
+    def __send(writer: asyncio.StreamWriter, frame_type: FrameType, sequence: int) -> None:
+        if not writer.is_closing():
+            writer.writelines(Frame.encode(frame_type, sequence, 0))
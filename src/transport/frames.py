@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+from struct import Struct
+from typing import ClassVar
+
+
+class FrameType(Enum):
+    """Вид кадра"""
+
+    DATA = 1
+    """Порция байт-кода (хост -> устройство)"""
+    END = 2
+    """Завершение передачи: offset - размер программы, в данных CRC32 всей программы (хост -> устройство)"""
+    ACK = 3
+    """Кадр с номером sequence принят (устройство -> хост)"""
+    NAK = 4
+    """Кадр с номером sequence повреждён, нужен повтор (устройство -> хост)"""
+    REJECT = 5
+    """Программа отвергнута: CRC принятой программы не совпадает с CRC кадра END (устройство -> хост)"""
+
+
+class FrameError(Exception):
+    """Повреждённый кадр"""
+
+    def __init__(self, message: str, sequence: int) -> None:
+        super().__init__(message)
+        self.sequence = sequence
+        """Номер повреждённого кадра (по заголовку, может быть неверным)"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class Frame:
+    """
+    Кадр канала загрузки: заголовок, данные, CRC32 заголовка и данных.
+    Заголовок: сигнатура, вид, номер кадра, смещение данных в программе, размер данных
+    """
+
+    MAGIC: ClassVar[int] = 0xB1
+    HEADER: ClassVar[Struct] = Struct("<BBIIH")
+    CRC: ClassVar[Struct] = Struct("<I")
+    MAX_PAYLOAD: ClassVar[int] = 0xFFFF
+
+    type: FrameType
+    """Вид кадра"""
+    sequence: int
+    """Номер кадра"""
+    offset: int
+    """Смещение данных в программе"""
+    payload: bytes | memoryview
+    """Данные"""
+
+    @classmethod
+    def encode(cls, frame_type: FrameType, sequence: int, offset: int, payload: bytes | memoryview = b"") -> tuple[bytes, bytes | memoryview, bytes]:
+        """
+        Кадр по частям для записи без склейки: данные передаются как есть (срез буфера программы не копируется)
+        :return: Заголовок, данные, CRC
+        """
+        header = cls.HEADER.pack(cls.MAGIC, frame_type.value, sequence, offset, len(payload))
+        return header, payload, cls.CRC.pack(zlib.crc32(payload, zlib.crc32(header)))
+
+    @classmethod
+    async def read(cls, reader: asyncio.StreamReader) -> Frame:
+        """
+        Прочитать кадр. Байты до сигнатуры пропускаются
+        :raises FrameError: Неверный вид кадра или CRC
+        :raises asyncio.IncompleteReadError: Поток закрыт
+        """
+        while (await reader.readexactly(1))[0] != cls.MAGIC:
+            pass
+
+        header = bytes((cls.MAGIC,)) + await reader.readexactly(cls.HEADER.size - 1)
+        _, type_value, sequence, offset, size = cls.HEADER.unpack(header)
+        payload = await reader.readexactly(size)
+        crc, = cls.CRC.unpack(await reader.readexactly(cls.CRC.size))
+
+        if crc != zlib.crc32(payload, zlib.crc32(header)):
+            raise FrameError(f"Неверный CRC кадра {sequence}", sequence)
+
+        try:
+            frame_type = FrameType(type_value)
+
+        except ValueError as e:
+            raise FrameError(f"Неизвестный вид кадра {type_value}", sequence) from e
+
+        return cls(type=frame_type, sequence=sequence, offset=offset, payload=payload)
+
+    @classmethod
+    def getOverhead(cls) -> int:
+        """Размер служебной части кадра"""
+        return cls.HEADER.size + cls.CRC.size
+
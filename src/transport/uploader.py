@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable
+from typing import Final
+from typing import Optional
+
+from bytelang.bytecode.impl.disasm import ByteCodeBuffer
+from transport.frames import Frame
+from transport.frames import FrameError
+from transport.frames import FrameType
+
+
+class UploadError(Exception):
+    """Загрузка не удалась: исчерпаны повторы, программа отвергнута или соединение закрыто"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class UploadReport:
+    """Результат загрузки"""
+
+    program_size: int
+    """Размер программы"""
+    frames: int
+    """Количество кадров данных"""
+    retransmissions: int
+    """Количество повторно отправленных кадров"""
+    seconds: float
+    """Длительность загрузки"""
+    mean_latency: float
+    """Среднее время от отправки кадра до подтверждения (по кадрам без повторов)"""
+    max_latency: float
+    """Наибольшее время от отправки кадра до подтверждения (по кадрам без повторов)"""
+
+    def getThroughput(self) -> float:
+        """Полезная скорость (байт программы в секунду)"""
+        return self.program_size / self.seconds if self.seconds > 0 else 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.program_size} Bytes in {self.frames} frames, {self.retransmissions} retransmissions : "
+            f"{self.seconds:.3f} s ({self.getThroughput() / 1024:.1f} KiB/s), latency {self.mean_latency * 1000:.1f} ms mean, {self.max_latency * 1000:.1f} ms max"
+        )
+
+
+class ChunkedUploader:
+    """
+    Загрузка байт-кода кадрами с выборочным повтором.
+    В пути находится не больше window неподтверждённых кадров, кадр отправляется повторно по NAK или по истечении timeout.
+    После подтверждения всех кадров данных отправляется кадр END с CRC всей программы (повторяется по NAK, как и кадры данных).
+    Неустранимая ошибка - только REJECT: устройство приняло END, но CRC собранной программы не совпадает
+    """
+
+    DEFAULT_CHUNK_SIZE: Final[int] = 240
+    """Размер данных кадра по умолчанию"""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, window: int = 8, timeout: float = 0.5, max_retries: int = 8) -> None:
+        """
+        :param chunk_size: Размер данных кадра
+        :param window: Наибольшее количество неподтверждённых кадров
+        :param timeout: Время ожидания подтверждения кадра (с)
+        :param max_retries: Наибольшее количество повторов одного кадра
+        """
+        if not 0 < chunk_size <= Frame.MAX_PAYLOAD:
+            raise ValueError(f"Размер данных кадра должен быть в диапазоне [1, {Frame.MAX_PAYLOAD}]: {chunk_size}")
+
+        if window < 1:
+            raise ValueError(f"Окно должно вмещать хотя бы один кадр: {window}")
+
+        self.__chunk_size = chunk_size
+        self.__window = window
+        self.__timeout = timeout
+        self.__max_retries = max_retries
+
+    async def uploadTo(self, host: str, port: int, buffer: ByteCodeBuffer, on_progress: Callable[[int, int], None] = lambda *_: None) -> UploadReport:
+        """Загрузить программу на устройство по сокету"""
+        reader, writer = await asyncio.open_connection(host, port)
+
+        try:
+            return await self.upload(buffer, reader, writer, on_progress)
+
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def upload(self, buffer: ByteCodeBuffer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, on_progress: Callable[[int, int], None] = lambda *_: None) -> UploadReport:
+        """
+        Загрузить программу. Данные кадров - срезы буфера программы без копирования
+        :param buffer: Байт-код (bytes, memoryview, mmap)
+        :param reader: Поток подтверждений устройства
+        :param writer: Поток кадров к устройству
+        :param on_progress: Вызывается при подтверждении кадра данных (подтверждено байт, всего байт)
+        :raises UploadError: Загрузка не удалась
+        """
+        start_time = time.perf_counter()
+
+        data = memoryview(buffer).cast("B")
+        size = len(data)
+        frames = -(-size // self.__chunk_size)
+        end_sequence = frames
+        """Номер кадра END"""
+
+        if size > 0xFFFF_FFFF:
+            raise UploadError(f"Программа слишком велика для загрузки: {size} B")
+
+        sent_at = dict[int, float]()
+        """Неподтверждённые кадры и время их последней отправки"""
+        retries = dict[int, int]()
+        latencies = list[float]()
+
+        next_sequence = 0
+        acked_frames = 0
+        acked_bytes = 0
+        retransmissions = 0
+
+        def send(sequence: int) -> None:
+            if sequence == end_sequence:
+                writer.writelines(Frame.encode(FrameType.END, sequence, size, Frame.CRC.pack(zlib.crc32(data))))
+
+            else:
+                offset = sequence * self.__chunk_size
+                writer.writelines(Frame.encode(FrameType.DATA, sequence, offset, data[offset:offset + self.__chunk_size]))
+
+            sent_at[sequence] = time.perf_counter()
+
+        def resend(sequence: int) -> None:
+            nonlocal retransmissions
+
+            if (count := retries.get(sequence, 0) + 1) > self.__max_retries:
+                raise UploadError(f"Кадр {sequence} не подтверждён после {self.__max_retries} повторов")
+
+            retries[sequence] = count
+            retransmissions += 1
+            send(sequence)
+
+        read_task = asyncio.ensure_future(Frame.read(reader))
+
+        try:
+            while acked_frames <= frames:
+                limit = frames if acked_frames < frames else end_sequence + 1
+
+                while next_sequence < limit and len(sent_at) < self.__window:
+                    send(next_sequence)
+                    next_sequence += 1
+
+                await writer.drain()
+
+                deadline = min(sent_at.values()) + self.__timeout
+                done, _ = await asyncio.wait((read_task,), timeout=max(0.0, deadline - time.perf_counter()))
+
+                if read_task in done:
+                    frame = self.__getFrame(read_task)
+                    read_task = asyncio.ensure_future(Frame.read(reader))
+
+                    if frame is None or frame.sequence not in sent_at:
+                        pass
+
+                    elif frame.type == FrameType.ACK:
+                        if frame.sequence not in retries:
+                            latencies.append(time.perf_counter() - sent_at[frame.sequence])
+
+                        del sent_at[frame.sequence]
+                        acked_frames += 1
+
+                        if frame.sequence != end_sequence:
+                            acked_bytes += min(self.__chunk_size, size - frame.sequence * self.__chunk_size)
+                            on_progress(acked_bytes, size)
+
+                    elif frame.type == FrameType.NAK:
+                        resend(frame.sequence)
+
+                    elif frame.type == FrameType.REJECT:
+                        raise UploadError("Устройство отвергло программу: CRC программы не совпадает")
+
+                now = time.perf_counter()
+
+                for sequence in tuple(sequence for sequence, sent in sent_at.items() if now - sent >= self.__timeout):
+                    resend(sequence)
+
+        finally:
+            read_task.cancel()
+
+        return UploadReport(
+            program_size=size,
+            frames=frames,
+            retransmissions=retransmissions,
+            seconds=time.perf_counter() - start_time,
+            mean_latency=sum(latencies) / len(latencies) if latencies else 0,
+            max_latency=max(latencies, default=0)
+        )
+
+    @staticmethod
+    def __getFrame(read_task: asyncio.Future[Frame]) -> Optional[Frame]:
+        """Прочитанный кадр. None, если кадр повреждён"""
+        try:
+            return read_task.result()
+
+        except FrameError:
+            return None
+
+        except asyncio.IncompleteReadError as e:
+            raise UploadError("Соединение с устройством закрыто") from e
@@ -5,7 +5,9 @@ from abc import ABC
 from abc import abstractmethod
 from typing import Final
 from typing import Iterable
+from typing import Optional
 
+import numpy as np
 from dearpygui import dearpygui as dpg
 
 from ui.abc import ItemID
@@ -22,16 +24,126 @@ from ui.dpg.impl import Text
 
 
 class Figure(LineSeries, ABC):
+    """
+    Линия фигуры с пирамидой уровней детализации. Уровень строится один раз: из каждой группы
+    подряд идущих вершин предыдущего уровня остаются первая и вершины с крайними X и Y.
+    На холст отдаётся самый подробный уровень, число вершин которого не превышает число пикселей, занимаемых фигурой
+    """
+
+    DETAIL_PER_PIXEL: Final[float] = 2.0
+    """Вершин уровня детализации на пиксель фигуры"""
+    __LEVEL_GROUP_SIZE: Final[int] = 16
+    """Размер группы вершин, прореживаемой при построении следующего уровня"""
+    __MIN_LEVEL_VERTICES: Final[int] = 1024
+    """Фигуры с меньшим числом вершин не прореживаются"""
 
     def __init__(self, vertices: tuple[Iterable[float], Iterable[float]], label: str, size: tuple[int, int] = (0, 0)) -> None:
         super().__init__(label)
         source_x, source_y = vertices
-        self.source_vertices_x: Final[Iterable[float]] = source_x
-        self.source_vertices_y: Final[Iterable[float]] = source_y
+        source = np.stack((self.__toArray(source_x), self.__toArray(source_y)))
+        self.__levels: Final[tuple[np.ndarray, ...]] = self.__buildLevels(source)
+        """Уровни детализации, форма (2, n). Нулевой - исходные вершины"""
+        self.__level: int = len(self.__levels) - 1
+        """Текущий уровень. До первого масштаба холста - самый грубый"""
+        self.__units_per_pixel: float = 0
+        """Последний масштаб холста (0 - неизвестен)"""
+        self.source_vertices_x: Final[np.ndarray] = source[0]
+        self.source_vertices_y: Final[np.ndarray] = source[1]
         self.__size = size
 
+    @staticmethod
+    def __toArray(values: Iterable[float]) -> np.ndarray:
+        """Непрерывный массив float64 (массивы и последовательности преобразуются без обхода в Python)"""
+        if not isinstance(values, (np.ndarray, tuple, list, range)) and not hasattr(values, "__buffer__"):
+            values = np.fromiter(values, dtype=np.float64)
+
+        return np.ascontiguousarray(values, dtype=np.float64)
+
+    @classmethod
+    def __buildLevels(cls, source: np.ndarray) -> tuple[np.ndarray, ...]:
+        """Пирамида уровней: каждый следующий строится из предыдущего, пока прореживание сокращает вершины"""
+        levels = [source]
+
+        while (count := levels[-1].shape[1]) > cls.__MIN_LEVEL_VERTICES:
+            level = cls.__decimate(levels[-1])
+
+            if level.shape[1] * 2 > count:
+                break
+
+            levels.append(level)
+
+        return tuple(levels)
+
+    @classmethod
+    def __decimate(cls, vertices: np.ndarray) -> np.ndarray:
+        """
+        Прореживание min/max: из каждой группы остаются первая вершина и вершины с крайними X и Y (в исходном порядке).
+        Крайние вершины группы уровня - крайние среди крайних вершин её подгрупп, поэтому ограничивающий прямоугольник
+        всех уровней совпадает с исходным
+        """
+        group_size = cls.__LEVEL_GROUP_SIZE
+        count = vertices.shape[1]
+        groups = -(-count // group_size)
+
+        padded = np.pad(vertices, ((0, 0), (0, groups * group_size - count)), mode="edge").reshape(2, groups, group_size)
+        starts = np.arange(0, groups * group_size, group_size)
+
+        indices = np.concatenate((
+            starts,
+            (starts + padded.argmin(axis=2)).ravel(),
+            (starts + padded.argmax(axis=2)).ravel(),
+            (count - 1,),
+        ))
+
+        return vertices[:, np.unique(np.minimum(indices, count - 1))]
+
+    def getLevel(self) -> int:
+        """Текущий уровень детализации (0 - исходные вершины)"""
+        return self.__level
+
+    def getLevelCount(self) -> int:
+        return len(self.__levels)
+
+    def getLevelVertices(self) -> np.ndarray:
+        """Вершины текущего уровня детализации, форма (2, n)"""
+        return self.__levels[self.__level]
+
+    def setScale(self, units_per_pixel: float) -> None:
+        """
+        Задать масштаб холста. Фигура обновляется, только если изменился уровень детализации
+        :param units_per_pixel: Единиц холста на пиксель
+        """
+        if units_per_pixel == self.__units_per_pixel:
+            return
+
+        self.__units_per_pixel = units_per_pixel
+
+        if self.__selectLevel():
+            self.setValue(self.getTransformedVertices())
+
+    def __selectLevel(self) -> bool:
+        """
+        Выбрать уровень детализации по масштабу холста и размеру фигуры на экране:
+        плотность вершин на пиксель постоянна при любом приближении и размере фигуры
+        :return: Уровень изменился
+        """
+        if len(self.__levels) == 1 or self.__units_per_pixel <= 0:
+            return False
+
+        x, y = self.getTransformedVertices()
+        budget = self.DETAIL_PER_PIXEL * (np.ptp(x) + np.ptp(y)) / self.__units_per_pixel
+
+        level = next((index for index, vertices in enumerate(self.__levels) if vertices.shape[1] <= budget), len(self.__levels) - 1)
+
+        if level == self.__level:
+            return False
+
+        self.__level = level
+        return True
+
     @abstractmethod
-    def getTransformedVertices(self) -> tuple[list[float], list[float]]:
+    def getTransformedVertices(self) -> tuple[np.ndarray, np.ndarray]:
+        """Вершины текущего уровня детализации для отображения: непрерывные массивы float64"""
         pass
 
     @abstractmethod
@@ -45,14 +157,20 @@ class Figure(LineSeries, ABC):
         self.__size = size
 
     def update(self) -> None:
+        """Отобразить вершины. Уровень детализации выбирается заново: преобразование могло изменить размер фигуры на экране"""
+        self.__selectLevel()
         self.setValue(self.getTransformedVertices())
 
 
 class Canvas(Plot):
+    """Холст фигур. Уровни детализации фигур выбираются по масштабу оси X (пропорции осей равны)"""
 
     def __init__(self) -> None:
         super().__init__()
         self.axis = Axis(dpg.mvXAxis)
+        self.__figures = list[Figure]()
+        self.__units_per_pixel: float = 0
+        """Масштаб, по которому выбраны уровни детализации"""
 
     def placeRaw(self, parent_id: ItemID) -> None:
         super().placeRaw(parent_id)
@@ -60,6 +178,27 @@ class Canvas(Plot):
 
     def attachFigure(self, figure: Figure) -> None:
         figure.attachIntoCanvas(self)
+        self.__figures.append(figure)
+        self.__units_per_pixel = 0
+
+    def getUnitsPerPixel(self) -> float:
+        """Единиц холста на пиксель. 0, если холст ещё не отображён"""
+        x_min, x_max = dpg.get_axis_limits(self.axis.getItemID())
+        width, _ = dpg.get_item_rect_size(self.getItemID())
+        return (x_max - x_min) / width if width > 0 else 0
+
+    def updateDetail(self) -> None:
+        """Выбрать уровни детализации фигур, если масштаб или размер холста изменились (вызывается каждый кадр)"""
+        units_per_pixel = self.getUnitsPerPixel()
+
+        if units_per_pixel == self.__units_per_pixel:
+            return
+
+        self.__units_per_pixel = units_per_pixel
+        self.__figures = [figure for figure in self.__figures if dpg.does_item_exist(figure.getItemID())]
+
+        for figure in self.__figures:
+            figure.setScale(units_per_pixel)
 
 
 class WorkAreaFigure(Figure):
@@ -108,7 +247,7 @@ class WorkAreaFigure(Figure):
         canvas.axis.add(self)
         canvas.add(self.__border)
 
-    def getTransformedVertices(self) -> tuple[list[float], list[float]]:
+    def getTransformedVertices(self) -> tuple[np.ndarray, np.ndarray]:
         size_x, size_y = self.getSize()
 
         left_dead_zone = self.getLeftDeadZone()
@@ -123,8 +262,8 @@ class WorkAreaFigure(Figure):
         offset_y = (bottom_dead_zone - top_dead_zone) / 2 + self.getVerticalOffset()
 
         return (
-            [x * area_width + offset_x for x in self.source_vertices_x],
-            [y * area_height + offset_y for y in self.source_vertices_y],
+            self.source_vertices_x * area_width + offset_x,
+            self.source_vertices_y * area_height + offset_y,
         )
 
     def placeRaw(self, parent_id: ItemID) -> None:
@@ -175,10 +314,21 @@ class FigureStatusText(Text):
 
 
 class TransformableFigure(Figure):
+    """
+    Фигура с масштабом, поворотом и смещением. Преобразования составляются в одну аффинную матрицу,
+    которая пересчитывается только после их изменения. Вершины текущего уровня детализации преобразуются
+    одним умножением матриц в постоянные буферы (буферы заменяются при смене уровня)
+    """
 
     def __init__(self, vertices: tuple[Iterable[float], Iterable[float]], label: str) -> None:
         super().__init__(vertices, label, (100, 100))
-        self.__source_vertices_x, self.__source_vertices_y = vertices
+        self.__transformed = np.empty_like(self.getLevelVertices())
+        """Буфер преобразованных вершин текущего уровня детализации (строки X и Y непрерывны)"""
+
+        self.__matrix: Optional[np.ndarray] = None
+        """Составленное преобразование, форма (2, 3). None - требует пересчёта"""
+        self.__vertices_dirty: bool = True
+        """Буфер вершин не соответствует преобразованию"""
 
         self.__sin_angle: float = 0
         self.__cos_angle: float = 0
@@ -193,37 +343,58 @@ class TransformableFigure(Figure):
         angle = math.radians(angle)
         self.__sin_angle = math.sin(angle)
         self.__cos_angle = math.cos(angle)
+        self.__invalidate()
+
+    def __invalidate(self) -> None:
+        """Преобразование изменилось"""
+        self.__matrix = None
+        self.__vertices_dirty = True
 
     def getPosition(self) -> tuple[float, float]:
         return self.__position_point.getValue()
 
     def setPosition(self, position: tuple[float, float]) -> None:
         self.__position_point.setValue(position)
+        self.__invalidate()
 
     def setSize(self, size: tuple[float, float]) -> None:
         super().setSize(size)
+        self.__invalidate()
         size_x, size_y = size
         position_x, position_y = self.getPosition()
         self.__size_point.setValue((position_x + size_x, position_y + size_y))
 
-    def getTransformedVertices(self) -> tuple[list[float], list[float]]:
-        transformed_x = list[float]()
-        transformed_y = list[float]()
+    def getTransform(self) -> np.ndarray:
+        """Матрица преобразования (2, 3): масштаб, затем поворот, затем смещение"""
+        if self.__matrix is None:
+            size_x, size_y = self.getSize()
+            position_x, position_y = self.getPosition()
 
-        size_x, size_y = self.getSize()
-        position_x, position_y = self.getPosition()
+            sin_angle = self.__sin_angle
+            cos_angle = self.__cos_angle
+
+            self.__matrix = np.array((
+                (cos_angle * size_x, -sin_angle * size_y, position_x),
+                (sin_angle * size_x, cos_angle * size_y, position_y),
+            ))
+
+        return self.__matrix
 
-        sin_angle = self.__sin_angle
-        cos_angle = self.__cos_angle
+    def getTransformedVertices(self) -> tuple[np.ndarray, np.ndarray]:
+        """Вершины в постоянных буферах: значения действительны до следующего изменения преобразования"""
+        source = self.getLevelVertices()
 
-        for x, y in zip(self.__source_vertices_x, self.__source_vertices_y):
-            x *= size_x
-            y *= size_y
+        if self.__transformed.shape != source.shape:
+            self.__transformed = np.empty_like(source)
+            self.__vertices_dirty = True
 
-            transformed_x.append(cos_angle * x - sin_angle * y + position_x)
-            transformed_y.append(sin_angle * x + cos_angle * y + position_y)
+        if self.__vertices_dirty:
+            matrix = self.getTransform()
+            np.matmul(matrix[:, :2], source, out=self.__transformed)
+            self.__transformed += matrix[:, 2:]
+            self.__vertices_dirty = False
 
-        return transformed_x, transformed_y
+        return self.__transformed[0], self.__transformed[1]
 
     def attachIntoCanvas(self, canvas: Canvas) -> None:
         canvas.axis.add(self)
@@ -244,6 +415,7 @@ class TransformableFigure(Figure):
         self.add(Button("Remove", self.delete))
 
     def __onPositionChanged(self, new_position: tuple[float, float]) -> None:
+        self.__invalidate()
         position_x, position_y = new_position
         scale_x, scale_y = self.getSize()
         self.__size_point.setValue((position_x + scale_x, position_y + scale_y))
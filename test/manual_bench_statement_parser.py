@@ -0,0 +1,26 @@
+import time
+from pathlib import Path
+
+from bytelang.core.handlers.errors import ErrorHandler
+from bytelang.parsers.impl.statement import StatementParser
+from tools.filetool import FileTool
+from tools.string import FixedStringIO
+
+SOURCE_PATH = Path(__file__).parent.parent / "res" / "out" / "test.bls"
+SCALE = 50
+REPEATS = 3
+
+source = FileTool.read(SOURCE_PATH) * SCALE
+source_size_mb = len(source.encode()) / 2 ** 20
+
+best_time = float("inf")
+statements_count = 0
+
+for _ in range(REPEATS):
+    errors_handler = ErrorHandler()
+    start_time = time.perf_counter()
+    statements_count = sum(1 for _ in StatementParser(errors_handler).run(FixedStringIO(source)))
+    best_time = min(best_time, time.perf_counter() - start_time)
+
+print(f"source: {source_size_mb:.2f} MB, statements: {statements_count}")
+print(f"parse: {best_time:.3f} s, {source_size_mb / best_time:.2f} MB/s, {statements_count / best_time:.0f} statements/s")